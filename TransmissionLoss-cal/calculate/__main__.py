@@ -0,0 +1,11 @@
+import os
+import sys
+
+calculate_path = os.path.dirname(os.path.abspath(__file__))
+if calculate_path not in sys.path:
+    sys.path.append(calculate_path)
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
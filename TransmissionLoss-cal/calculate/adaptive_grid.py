@@ -0,0 +1,82 @@
+import numpy as np
+
+from layup_plan import air_state, compile_layup
+
+def coincidence_frequencies(plan, theta_deg, c0):
+    # Coincidence of each bending layer at theta, plus its critical (grazing) frequency
+    freqs = []
+    for mat_type, m in zip(plan.layers, plan.materials):
+        if mat_type not in ('stiff panel', 'plastic'):
+            continue
+        ms = m["density"] * m["h"]
+        D = m["youngs_modulus"] * m["h"] ** 3 / (12 * (1 - m["poissons_ratio"] ** 2))
+        fc = c0 ** 2 / (2 * np.pi) * np.sqrt(ms / D)
+        freqs.append(fc)
+        if np.sin(np.radians(theta_deg)) > 1e-3:
+            freqs.append(fc / np.sin(np.radians(theta_deg)) ** 2)
+    return freqs
+
+def mass_spring_mass_frequencies(plan, theta_deg, rho0, c0):
+    # Double-wall resonance between consecutive bending layers separated by poro/air layers
+    freqs = []
+    masses = [(j, m["density"] * m["h"]) for j, (mat_type, m) in enumerate(zip(plan.layers, plan.materials))
+              if mat_type in ('stiff panel', 'plastic')]
+    for (j1, m1), (j2, m2) in zip(masses, masses[1:]):
+        d = sum(plan.materials[j]["h"] for j in range(j1 + 1, j2) if plan.materials[j] is not None)
+        if d > 0:
+            f0 = np.sqrt(rho0 * c0 ** 2 / d * (1 / m1 + 1 / m2)) / (2 * np.pi)
+            freqs.append(f0 / max(np.cos(np.radians(theta_deg)), 1e-3))
+    return freqs
+
+def _curvature_scores(x, y, tol):
+    # Deviation of each interior sample from the chord of its neighbours in units of tol, per interval
+    # the larger of its two end samples (inf where y is not finite); > 1 means the interval needs refining
+    scores = np.zeros(len(x) - 1)
+    if len(x) < 3:
+        return scores
+    t = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+    deviation = np.abs(y[1:-1] - ((1 - t) * y[:-2] + t * y[2:])) / tol
+    deviation[~np.isfinite(deviation)] = np.inf
+    scores[:-1] = np.maximum(scores[:-1], deviation)
+    scores[1:] = np.maximum(scores[1:], deviation)
+    return scores
+
+def run_simulation_adaptive(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.2,
+                            f_min=100, f_max=10000, n_initial=200, tol_db=0.02, tol_alpha=0.0005,
+                            tol_phase=np.pi / 4, max_points=5000, max_iter=16, min_ratio=1e-5, solver="auto"):
+    # Coarse log grid, seeded with predicted coincidence and mass-spring-mass frequencies, then
+    # refined by interval bisection (in log f) wherever TL/alpha bend or the phase of tc turns quickly
+    plan = compile_layup(layer_data)
+    rho0, c0 = air_state(P0, T, RH)[:2]
+
+    seeds = np.array(coincidence_frequencies(plan, theta_deg, c0)
+                     + mass_spring_mass_frequencies(plan, theta_deg, rho0, c0))
+    seeds = seeds[(seeds > f_min) & (seeds < f_max)]
+    seeds = np.concatenate([seeds * r for r in (0.97, 0.99, 1.0, 1.01, 1.03)]) if len(seeds) else seeds
+
+    f = np.unique(np.concatenate([np.logspace(np.log10(f_min), np.log10(f_max), n_initial), seeds]))
+    _, TL, alpha, tc, rc = plan.run(f, theta_deg, P0, T, RH, solver=solver)
+
+    for _ in range(max_iter):
+        x = np.log(f)
+        score = np.maximum.reduce([_curvature_scores(x, TL, tol_db), _curvature_scores(x, alpha, tol_alpha),
+                                   np.abs(np.angle(tc[1:] * np.conj(tc[:-1]))) / tol_phase])
+        refine = (score > 1) & (np.diff(x) > min_ratio)
+        budget = max_points - len(f)
+        if not np.any(refine) or budget <= 0:
+            break
+
+        # When the budget runs out, the worst intervals first (not the lowest frequencies)
+        idx = np.flatnonzero(refine)
+        idx = np.sort(idx[np.argsort(-score[idx], kind="stable")[:budget]])
+        f_new = np.sqrt(f[idx] * f[idx + 1])
+        _, TL_new, alpha_new, tc_new, rc_new = plan.run(f_new, theta_deg, P0, T, RH, solver=solver)
+
+        order = np.argsort(np.concatenate([f, f_new]), kind="stable")
+        f = np.concatenate([f, f_new])[order]
+        TL = np.concatenate([TL, TL_new])[order]
+        alpha = np.concatenate([alpha, alpha_new])[order]
+        tc = np.concatenate([tc, tc_new])[order]
+        rc = np.concatenate([rc, rc_new])[order]
+
+    return f, TL, alpha, tc, rc
@@ -135,12 +135,7 @@ def bc_matrix(upper, lower, phi=None, phi2=None):
 
     # plastic and stiff panel
     elif upper == 'plastic' and lower == 'stiff panel':
-        B_pos = np.array([
-            [1, 0, 0, 0, 0],
-            [0, 1, 0, 0, 0],
-            [0, 0, 1, 0, 0],
-            [0, 0, 0, 1, 0]
-        ])
+        B_pos = np.eye(4)
         B_neg = np.array([
             [1, 0, 0, 0],
             [0, 1, 0, 0],
@@ -148,12 +143,7 @@ def bc_matrix(upper, lower, phi=None, phi2=None):
             [0, 0, 0, 1]
         ])
     elif upper == 'stiff panel' and lower == 'plastic':
-        B_neg = np.array([
-            [1, 0, 0, 0, 0],
-            [0, 1, 0, 0, 0],
-            [0, 0, 1, 0, 0],
-            [0, 0, 0, 1, 0]
-        ])
+        B_neg = np.eye(4)
         B_pos = np.array([
             [1, 0, 0, 0],
             [0, 1, 0, 0],
@@ -164,8 +154,10 @@ def bc_matrix(upper, lower, phi=None, phi2=None):
 
     # same type layer
     elif upper == 'poro' and lower == 'poro':
-        B_pos = np.eye(6)
-        B_neg = np.eye(6)
+        # Complex when the porosities are (complex-step derivatives, derivatives.py)
+        dtype = np.result_type(phi, phi2, float)
+        B_pos = np.eye(6, dtype=dtype)
+        B_neg = np.eye(6, dtype=dtype)
         B_pos[2, 1] = 1 - phi
         B_neg[2, 1] = 1 - phi2
         B_pos[2, 2] = phi
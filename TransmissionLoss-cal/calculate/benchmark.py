@@ -0,0 +1,216 @@
+import importlib.metadata
+import json
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import jit_backend
+from bc_matrix import bc_matrix
+from calculation import run_simulation_batched
+from jca_rigid import jca_rigid
+from layer_cache import layer_cache
+from layup_plan import air_state, compile_layup
+from material_json import calculation_layers, read_material
+from merge_layer import merge_layer_batch
+from one_layer_pred import one_layer_pred_batch
+from tm_panel import tm_panel
+from tm_poro import tm_poro
+from tm_solid import tm_solid
+
+BENCHMARK_VERSION = 1
+EXAMPLE_MATERIAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example_results",
+                                "result_material.json")
+# Case matrix per preset: frequency counts (log 100 Hz - 10 kHz), incidence angles [deg], layups (None: all)
+# and the layups also run with the global solver. "run" cases use the default (auto) solver, i.e. the
+# numba kernels when numba is installed
+PRESETS = {
+    "quick": {"n_freq": [100, 1000], "theta": [0.0], "layups": ["example", "poro", "poro_panel_poro"],
+              "global": []},
+    "standard": {"n_freq": [100, 1000, 10000], "theta": [0.0, 45.0], "layups": None,
+                 "global": ["stack10", "stack50"]},
+    "full": {"n_freq": [100, 1000, 10000, 100000], "theta": [0.0, 45.0], "layups": None,
+             "global": ["stack10", "stack50"]}
+}
+# Relative slow-down (or memory growth) against the baseline reported as a regression
+DEFAULT_THRESHOLD = 0.25
+# Slow-downs smaller than this [s] are timer noise, never regressions
+NOISE_FLOOR = 5e-5
+# Timing loop: at least MIN_REPEATS calls and MIN_TIME seconds, at most MAX_REPEATS calls
+MIN_REPEATS = 3
+MIN_TIME = 0.5
+MAX_REPEATS = 50
+
+POROUS = {"type": "Poro-elastic", "thickness": 0.03, "viscous_cl": 0.000199, "thermal_cl": 0.000445,
+          "airflow_resistivity": 13100.0, "tortuosity": 1.0, "porosity": 0.99, "youngs_modulus": 132000.0,
+          "loss_factor": 0.08, "poissons_ratio": 0.33, "density": 10.3}
+PANEL = {"type": "Viscoelastic", "thickness": 0.001, "youngs_modulus": 7e10, "loss_factor": 0.003,
+         "poissons_ratio": 0.33, "density": 2700.0}
+PLASTIC = {"type": "Linear Elastic", "thickness": 0.002, "youngs_modulus": 2e9, "poissons_ratio": 0.35,
+           "density": 1200.0}
+GAP = {"type": "Unbonded", "thickness": 0.0001}
+KERNELS = ("jca_rigid", "tm_poro", "tm_solid", "tm_panel", "merge_layer", "one_layer_pred", "bc_matrix")
+# Repeating unit of the 10 / 50 layer stacks
+STACK_UNIT = [PANEL, POROUS, GAP, PLASTIC, POROUS]
+
+def benchmark_layups():
+    # Canonical layups in calculation units, the example material first
+    layers, _ = read_material(EXAMPLE_MATERIAL)
+    return {
+        "example": calculation_layers(layers),
+        "poro": [dict(POROUS)],
+        "poro_panel_poro": [dict(POROUS), dict(PANEL), dict(POROUS)],
+        "plastic_unbonded_poro": [dict(PLASTIC), dict(GAP), dict(POROUS)],
+        "stack10": [dict(STACK_UNIT[i % len(STACK_UNIT)]) for i in range(10)],
+        "stack50": [dict(STACK_UNIT[i % len(STACK_UNIT)]) for i in range(50)]
+    }
+
+def time_call(fn):
+    # Median and best wall time of repeated calls
+    times = []
+    start = time.perf_counter()
+    while len(times) < MAX_REPEATS and (len(times) < MIN_REPEATS or time.perf_counter() - start < MIN_TIME):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return float(np.median(times)), float(np.min(times)), len(times)
+
+def peak_memory(fn):
+    # Peak traced allocation of one call [MB] (numpy buffers are traced too)
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+def measure(fn, evaluations):
+    wall, best, repeats = time_call(fn)
+    return {"wall_s": wall, "min_s": best, "repeats": repeats, "peak_mb": peak_memory(fn),
+            "evals_per_s": evaluations / wall if wall > 0 else float("inf")}
+
+def kernel_cases(n_freq, theta_deg=45.0):
+    # Each kernel alone on n_freq frequencies, with inputs taken from a compiled poro / panel layup
+    f = np.logspace(2, 4, n_freq)
+    w = 2 * np.pi * f
+    rho0, c0, gamma, eta, Pr, P0 = air = air_state(101325, 20, 0.2)
+    theta = np.radians(theta_deg)
+    p, s, m = POROUS, PANEL, PLASTIC
+
+    rhoeq, Keq = jca_rigid(w, p["airflow_resistivity"], p["porosity"], p["tortuosity"], p["viscous_cl"],
+                           p["thermal_cl"], rho0, eta, Pr, gamma, P0)
+    rho22 = p["porosity"] ** 2 * rhoeq
+    rho12 = p["porosity"] * rho0 - rho22
+    rho11 = p["density"] - rho12
+    E = p["youngs_modulus"] * (1 + 1j * p["loss_factor"])
+
+    plan = compile_layup([dict(POROUS), dict(PANEL)])
+    Phi0, Lambda0 = plan.compute_layer_matrices(0, w, theta_deg, air)
+    Phi1, Lambda1 = plan.compute_layer_matrices(1, w, theta_deg, air)
+    B0, B1, B2 = plan.interfaces
+    merged = merge_layer_batch(B0[0], B0[1], B1[0], B1[1], Phi0, Lambda0)
+
+    ms, h = s["density"] * s["thickness"], s["thickness"]
+    D = s["youngs_modulus"] * h ** 3 / (12 * (1 - s["poissons_ratio"] ** 2))
+    return {
+        "jca_rigid": (lambda: jca_rigid(w, p["airflow_resistivity"], p["porosity"], p["tortuosity"],
+                                        p["viscous_cl"], p["thermal_cl"], rho0, eta, Pr, gamma, P0), n_freq),
+        "tm_poro": (lambda: tm_poro(w, p["thickness"], p["porosity"], E, Keq, p["poissons_ratio"], theta, c0,
+                                    rho11, rho12, rho22, layout="Fnn"), n_freq),
+        "tm_solid": (lambda: tm_solid(w, m["thickness"], m["density"], m["youngs_modulus"], m["poissons_ratio"],
+                                      theta_deg, c0, layout="Fnn"), n_freq),
+        "tm_panel": (lambda: tm_panel(w, c0, h, ms, s["youngs_modulus"] * h, D, theta_deg, layout="Fnn"), n_freq),
+        "merge_layer": (lambda: merge_layer_batch(B0[0], B0[1], B1[0], B1[1], Phi0, Lambda0), n_freq),
+        "one_layer_pred": (lambda: one_layer_pred_batch(merged[0], merged[1], B2[0], B2[1], Phi1, Lambda1), n_freq),
+        # Frequency independent: one call per interface and layup compile
+        "bc_matrix": (lambda: [bc_matrix(upper, lower, 0.99) for upper, lower in
+                               [("fluid", "poro"), ("poro", "stiff panel"), ("stiff panel", "fluid")]], 3)
+    }
+
+def run_benchmarks(preset="standard", kernels=True, progress=None):
+    # {"version", "date", "preset", "machine", "results": {case: {wall_s, min_s, repeats, peak_mb,
+    # evals_per_s, ...}}}; full runs start from an empty layer cache every call
+    config = PRESETS[preset]
+    layups = benchmark_layups()
+    names = config["layups"] or list(layups)
+    cases = []
+    for solver, prefix, solver_names in (("auto", "run", names), ("global", "global", config["global"])):
+        for name in solver_names:
+            for n_freq in config["n_freq"]:
+                for theta in config["theta"]:
+                    cases.append((f"{prefix}/{name}/{n_freq}/{theta:g}", name, n_freq, theta, solver))
+    if kernels:
+        cases.extend((f"kernel/{k}/{n_freq}", k, n_freq, None, None) for n_freq in config["n_freq"] for k in KERNELS)
+
+    # Compile / load before timing, so "auto" is the same solver in every case
+    jit_backend.warm_up()
+    results = {}
+    kernel_sets = {}
+    for done, (case, name, n_freq, theta, solver) in enumerate(cases):
+        if theta is None:
+            if n_freq not in kernel_sets:
+                kernel_sets[n_freq] = kernel_cases(n_freq)
+            fn, evaluations = kernel_sets[n_freq][name]
+            results[case] = dict(measure(fn, evaluations), kind="kernel", kernel=name, n_freq=n_freq)
+        else:
+            layer_data = layups[name]
+            grid = {"kind": "log", "f_min": 100, "f_max": 10000, "n": n_freq}
+
+            def run():
+                layer_cache.clear()
+                run_simulation_batched(layer_data, theta, f=grid, solver=solver)
+            results[case] = dict(measure(run, n_freq), kind="run", layup=name, layers=len(layer_data),
+                                 n_freq=n_freq, theta=theta, solver=solver)
+        if progress is not None:
+            progress(done + 1, len(cases), case, results[case])
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "preset": preset,
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "numpy": np.__version__, "numba": numba_version(), "jit": jit_backend.ready(),
+                    "cpus": os.cpu_count()},
+        "results": results
+    }
+
+def numba_version():
+    try:
+        return importlib.metadata.version("numba")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def compare_to_baseline(report, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=DEFAULT_THRESHOLD):
+    # Rows (case, baseline s, current s, time ratio, memory ratio, status) for the cases in both, on the
+    # best-of-repeats times (less sensitive to machine load than the median); status is "regression"
+    # beyond the thresholds, "faster" below 1 / (1 + threshold), else "ok"
+    rows = []
+    for case, now in report["results"].items():
+        base = baseline.get("results", {}).get(case)
+        if base is None:
+            continue
+        ratio = now["min_s"] / base["min_s"] if base["min_s"] > 0 else float("inf")
+        memory = now["peak_mb"] / base["peak_mb"] if base["peak_mb"] > 0 else 1.0
+        slower = ratio > 1 + threshold and now["min_s"] - base["min_s"] > NOISE_FLOOR
+        if slower or memory > 1 + memory_threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((case, base["min_s"], now["min_s"], ratio, memory, status))
+    return rows
+
+def write_report(json_path, report):
+    with open(json_path, "w") as fjson:
+        json.dump(report, fjson, indent=2)
+
+def read_report(json_path):
+    with open(json_path, "r") as fjson:
+        report = json.load(fjson)
+    if report.get("version") != BENCHMARK_VERSION:
+        raise ValueError(f"[ERROR] Unsupported benchmark file version: {report.get('version')}")
+    return report
@@ -1,81 +1,78 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
 from air_properties import air_properties
-from bc_matrix import bc_matrix
 from jca_rigid import jca_rigid
+from frequency_grid import frequency_grid
+from layup_plan import BACKINGS, build_interfaces, build_layup, compile_layup
 from merge_layer import merge_layer
 from one_layer_pred import one_layer_pred
+# profile_stages is part of this module's interface: with profile_stages() as p: run_simulation_from_ui(...)
+from profiling import profile_stages, timed
 from tm_panel import tm_panel
 from tm_poro import tm_poro
 from tm_solid import tm_solid
 
-def compute_transfer_matrix(mat_type, mat, wi, theta, theta_deg, rho0, eta, Pr, gamma, P0, c0):
+def compute_transfer_matrix(mat_type, mat, wi, theta, theta_deg, rho0, eta, Pr, gamma, P0, c0, layout="nnF"):
     if mat_type == 'poro':
         params = [mat["airflow_resistivity"], mat["porosity"], mat["tortuosity"], mat["viscous_cl"], mat["thermal_cl"]]
+        # wi may be a single angular frequency or a whole frequency vector
+        wi = np.atleast_1d(wi)
         rhoeq, Keq = jca_rigid(wi, *params, rho0, eta, Pr, gamma, P0)
         rho22 = mat["porosity"] ** 2 * rhoeq
         rho12 = mat["porosity"] * rho0 - rho22
         rho11 = mat["density"] - rho12
         complex_E = mat["youngs_modulus"] * (1 + 1j * mat.get("loss_factor", 0))
-        return tm_poro(np.array([wi]), mat["h"], mat["porosity"], complex_E, Keq,
-                       mat["poissons_ratio"], theta, c0, rho11, rho12, rho22)
+        return tm_poro(wi, mat["h"], mat["porosity"], complex_E, Keq,
+                       mat["poissons_ratio"], theta, c0, rho11, rho12, rho22, layout)
     elif mat_type == 'plastic':
-        return tm_solid(np.array([wi]), mat["h"], mat["density"],
-                        mat["youngs_modulus"], mat["poissons_ratio"], theta_deg, c0)
+        return tm_solid(np.atleast_1d(wi), mat["h"], mat["density"],
+                        mat["youngs_modulus"], mat["poissons_ratio"], theta_deg, c0, layout)
     elif mat_type == 'stiff panel':
         E = mat["youngs_modulus"] * mat["h"]
         I = mat["youngs_modulus"] * mat["h"] ** 3 / (12 * (1 - mat["poissons_ratio"] ** 2))
-        return tm_panel(np.array([wi]), c0, mat["h"], mat["density"] * mat["h"], E, I, theta_deg)
+        return tm_panel(np.atleast_1d(wi), c0, mat["h"], mat["density"] * mat["h"], E, I, theta_deg, layout)
     else:
         raise ValueError(f"[ERROR] Unsupported material type: {mat_type}")
 
-def map_type(elastic_type):
-    if elastic_type == "Poro-elastic":
-        return "poro"
-    elif elastic_type == "Viscoelastic":
-        return "stiff panel"
-    elif elastic_type == "Linear Elastic":
-        return "plastic"
-    elif elastic_type in ["Unboned", "Unbonded"]:
-        return "fluid"
-
-def run_simulation_from_ui(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.2):
-    f = np.logspace(np.log10(100), np.log10(10000), 5000)
+def run_simulation_from_ui(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.2, backend="batched", f=None,
+                           progress=None, backing="anechoic"):
+    # f: frequency grid spec, see frequency_grid.frequency_grid (default 5000-point log grid)
+    # progress(done, total): optional callback, may raise layup_plan.CalculationCancelled
+    # backing: "anechoic" (air behind the layup) or "rigid" (wall behind the last layer, tc = 0)
+    if backend == "batched":
+        return run_simulation_batched(layer_data, theta_deg, P0, T, RH, f, progress, backing)
+    elif backend == "global":
+        return run_simulation_global(layer_data, theta_deg, P0, T, RH, f, progress, backing)
+    elif backend == "reference":
+        return run_simulation_reference(layer_data, theta_deg, P0, T, RH, f, progress, backing)
+    else:
+        raise ValueError(f"[ERROR] Unsupported backend: {backend}")
+
+def run_simulation_batched(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.2, f=None, progress=None,
+                           backing="anechoic", solver="auto"):
+    # Same model as run_simulation_reference, but the whole frequency vector is solved at once
+    # (compiled with numba when available, layup_plan.SOLVERS)
+    return compile_layup(layer_data).run(frequency_grid(f), theta_deg, P0, T, RH, progress, backing, solver)
+
+def run_simulation_global(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.2, f=None, progress=None,
+                          backing="anechoic"):
+    # Batched engine with the whole layup solved as one block-banded system (layup_plan.SOLVERS)
+    return compile_layup(layer_data).run(frequency_grid(f), theta_deg, P0, T, RH, progress, backing, solver="global")
+
+def run_simulation_reference(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.2, f=None, progress=None,
+                             backing="anechoic"):
+    # Per-frequency loop kept as the numerical reference for the batched engine
+    if backing not in BACKINGS:
+        raise ValueError(f"[ERROR] Unsupported backing: {backing}")
+    f = frequency_grid(f)
     w = 2 * np.pi * f
     theta = np.radians(theta_deg)
 
     rho0, c0, gamma, eta, Pr, *_ = air_properties(P0, T, RH)
     z0 = rho0 * c0
 
-    layers = [map_type(layer["type"]) for layer in layer_data]
-    material_map = {}
-    for i, layer in enumerate(layer_data):
-        mat_type = layers[i]
-        if mat_type != "fluid":
-            data = layer.copy()
-            data["h"] = data.pop("thickness")
-            material_map[mat_type + f"_{i}"] = data
-
-    BC = np.empty((len(layers) + 1, 2), dtype=object)
-    bc_types = []
-
-    for i in range(len(layers) + 1):
-        if i == 0:
-            mat1, mat2 = "fluid", layers[0]
-            phi = material_map.get(mat2 + "_0", {}).get("porosity", 0.99)
-        elif i == len(layers):
-            mat1, mat2 = layers[-1], "fluid"
-            phi = material_map.get(mat1 + f"_{i-1}", {}).get("porosity", 0.99)
-        else:
-            mat1, mat2 = layers[i - 1], layers[i]
-            phi = material_map.get(mat1 + f"_{i-1}", {}).get("porosity", 0.99)
-
-        bc_types.append((mat1, mat2))
-        try:
-            BC[i, 0], BC[i, 1] = bc_matrix(mat1, mat2, phi)
-        except:
-            BC[i, 0], BC[i, 1] = bc_matrix(mat1, mat2)
+    layers, material_map = build_layup(layer_data)
+    BC, bc_types = build_interfaces(layers, material_map)
 
     tc = np.zeros(len(w), dtype=np.complex128)
     rc = np.zeros(len(w), dtype=np.complex128)
@@ -96,24 +93,26 @@ def run_simulation_from_ui(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.
         TM_total = np.eye(2, dtype=np.complex128)
 
         for seg in segments:
-            BC_working = BC.copy()
+            BC_working = timed("bc_copy", "reference", BC.copy)
 
             for j in seg:
                 mat_type = bc_types[j + 1][0]
                 if mat_type == 'fluid':
                     continue
                 mat = material_map[mat_type + f"_{j}"]
-                Phi, Lambda = compute_transfer_matrix(mat_type, mat, wi, theta, theta_deg, rho0, eta, Pr, gamma, P0, c0)
+                Phi, Lambda = timed("transfer_matrix", mat_type, compute_transfer_matrix, mat_type, mat, wi, theta,
+                                    theta_deg, rho0, eta, Pr, gamma, P0, c0)
 
                 mat1_next, mat2_next = bc_types[j + 1]
+                interface = f"{mat1_next}|{mat2_next}"
                 if mat1_next != "fluid" and mat2_next != "fluid":
-                    B1_pos, B2_neg = merge_layer(
+                    B1_pos, B2_neg = timed("merge_layer", interface, merge_layer,
                         BC_working[j, 0], BC_working[j, 1],
                         BC_working[j + 1, 0], BC_working[j + 1, 1],
                         Phi[:, :, 0], Lambda[:, :, 0])
                     BC_working[j + 1, 0], BC_working[j + 1, 1] = B1_pos, B2_neg
                 else:
-                    TM_seg = one_layer_pred(
+                    TM_seg = timed("one_layer_pred", interface, one_layer_pred,
                         BC_working[j, 0], BC_working[j, 1],
                         BC_working[j + 1, 0], BC_working[j + 1, 1],
                         Phi[:, :, 0], Lambda[:, :, 0])
@@ -122,12 +121,21 @@ def run_simulation_from_ui(layer_data: list, theta_deg=0, P0=101325, T=20, RH=0.
         TM_all[:, :, i_freq] = TM_total
 
         total_d = sum(m["h"] for k, m in material_map.items() if not k.startswith("fluid"))
-        denom = (TM_total[0, 0] + TM_total[0, 1] * np.cos(theta) / z0 + TM_total[1, 0] * z0 / np.cos(theta) + TM_total[1, 1])
+        if backing == "rigid":
+            # Zero normal velocity behind the last layer, nothing is transmitted
+            denom = TM_total[0, 0] + TM_total[1, 0] * z0 / np.cos(theta)
+            rc[i_freq] = (TM_total[0, 0] - TM_total[1, 0] * z0 / np.cos(theta)) / denom if np.abs(denom) >= 1e-12 else 0
+        else:
+            denom = (TM_total[0, 0] + TM_total[0, 1] * np.cos(theta) / z0 + TM_total[1, 0] * z0 / np.cos(theta) + TM_total[1, 1])
+
+            tc[i_freq] = 0 if np.abs(denom) < 1e-12 else 2 * np.exp(1j * wi * total_d * np.cos(theta) / c0) / denom
+            rc[i_freq] = (TM_total[0, 0] + TM_total[0, 1] * np.cos(theta) / z0 - TM_total[1, 0] * z0 / np.cos(theta) - TM_total[1, 1]) / denom if np.abs(denom) >= 1e-12 else 0
 
-        tc[i_freq] = 0 if np.abs(denom) < 1e-12 else 2 * np.exp(1j * wi * total_d * np.cos(theta) / c0) / denom
-        rc[i_freq] = (TM_total[0, 0] + TM_total[0, 1] * np.cos(theta) / z0 - TM_total[1, 0] * z0 / np.cos(theta) - TM_total[1, 1]) / denom if np.abs(denom) >= 1e-12 else 0
+        if progress is not None and (i_freq % 50 == 49 or i_freq == len(w) - 1):
+            progress(i_freq + 1, len(w))
 
-    TL = 20 * np.log10(1 / np.abs(tc))
+    with np.errstate(divide="ignore"):
+        TL = 20 * np.log10(1 / np.abs(tc))
     alpha = 1 - np.abs(rc)**2
 
     return f, TL, alpha, tc, rc
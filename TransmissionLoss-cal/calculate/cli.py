@@ -0,0 +1,587 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import jit_backend
+from adaptive_grid import run_simulation_adaptive
+from benchmark import (DEFAULT_THRESHOLD, PRESETS, compare_to_baseline, read_report, run_benchmarks,
+                       write_report)
+from calculation import run_simulation_batched
+from derivatives import parse_wrt, run_simulation_derivatives
+from diffuse_field import run_simulation_diffuse
+from equivalence import BACKENDS, canonical_layups, check_equivalence, random_layups
+from frequency_grid import band_levels
+from graph_csv import read_graph_csv, write_graph_csv
+from jca_fit import fit_layer_parameters, jca_parameters
+from layer_cache import layer_cache
+from layup_plan import SOLVERS
+from material_json import calculation_layers, read_material
+from optimizer import optimize_layup
+from pareto import explore_design_space, write_front_csv
+from profiling import profile_stages
+from param_batch import update_cleaned_layers
+from result_cache import DEFAULT_CACHE_DIR, ResultCache, cached_run
+from result_store import STORE_EXT, ResultStore
+from sensitivity import sobol_indices, write_sobol_csv
+from uncertainty import DEFAULT_PERCENTILES, layer_uncertainties, run_monte_carlo
+
+def parse_grid(text):
+    # "log:100:10000:5000", "linear:100:10000:500", "bands:3:50:10000:8", "list:100,200,400" or a JSON spec
+    if text is None:
+        return None
+    if text.lstrip().startswith("{"):
+        return json.loads(text)
+    kind, *args = text.split(":")
+    if kind in ("log", "linear"):
+        return {"kind": kind, "f_min": float(args[0]), "f_max": float(args[1]), "n": int(args[2])}
+    elif kind == "bands":
+        return {"kind": kind, "fraction": int(args[0]), "f_min": float(args[1]), "f_max": float(args[2]),
+                "points": int(args[3])}
+    elif kind == "list":
+        return {"kind": kind, "values": [float(v) for v in args[0].split(",")]}
+    raise argparse.ArgumentTypeError(f"Unsupported grid: {text}")
+
+def expand_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.json")
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(os.path.abspath(p) for p in matches)
+    return list(dict.fromkeys(paths))
+
+def output_paths(json_paths, out_dir, ext):
+    # One output per input, named after the input; clashing names get a numeric suffix
+    used = {}
+    outputs = []
+    for path in json_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = used.get(stem, 0)
+        used[stem] = count + 1
+        name = stem if count == 0 else f"{stem}_{count}"
+        outputs.append(os.path.join(out_dir or os.path.dirname(path), f"{name}_result.{ext}"))
+    return outputs
+
+def simulate(layer_data, env, grid=None, adaptive=False, solver="auto"):
+    theta = env.get("theta", 0)
+    P0 = env.get("P0", 101325)
+    T = env.get("T", 20)
+    RH = env.get("RH", 0.2)
+    backing = env.get("backing", "anechoic")
+    if env.get("field") == "diffuse":
+        return run_simulation_diffuse(layer_data, theta_max=env.get("theta_max", 78), P0=P0, T=T, RH=RH, f=grid,
+                                      backing=backing, solver=solver)
+    elif adaptive:
+        if backing != "anechoic":
+            raise ValueError("[ERROR] Adaptive refinement needs an anechoic backing")
+        return run_simulation_adaptive(layer_data, theta_deg=theta, P0=P0, T=T, RH=RH, solver=solver)
+    return run_simulation_batched(layer_data, theta_deg=theta, P0=P0, T=T, RH=RH, f=grid, backing=backing,
+                                  solver=solver)
+
+def write_result(out_path, json_path, f, TL, alpha, tc, rc, bands=None):
+    if out_path.endswith(".npz"):
+        arrays = {"f": f, "TL": TL, "alpha": alpha, "tc": tc, "rc": rc}
+        if bands is not None:
+            arrays["band_f"], arrays["band_TL"], arrays["band_alpha"] = bands
+        np.savez_compressed(out_path, **arrays)
+        return
+
+    # Same layout as SoundInsulationUI.save_results, so the file opens with "Load Graph"
+    name = os.path.basename(json_path)
+    write_graph_csv(out_path, [graph_info(json_path, os.path.splitext(name)[0], f, TL, alpha)])
+    if bands is not None:
+        band_path = out_path[:-len(".csv")] + "_bands.csv"
+        np.savetxt(band_path, np.column_stack(bands), delimiter=",", fmt="%.10g", comments="",
+                   header="Band centre [Hz],Transmission Loss [dB],Absorption Coefficient")
+
+def write_derivatives(out_path, derivatives):
+    # npz: dTL, dalpha, dtc, drc (P, ...) and the parameter labels; csv: <out>_derivatives.csv with one
+    # dTL and one dalpha column per parameter (per UI unit, e.g. dB/mm for thickness)
+    labels = [f"L{int(p['layer']) + 1} {p['name']}" for p in derivatives["wrt"]]
+    if out_path.endswith(".npz"):
+        np.savez_compressed(out_path[:-len(".npz")] + "_derivatives.npz", f=derivatives["f"],
+                            wrt=np.array(labels), dTL=derivatives["dTL"], dalpha=derivatives["dalpha"],
+                            dtc=derivatives["dtc"], drc=derivatives["drc"])
+        return
+    header = ["Frequency [Hz]"] + [f"dTL/d({l})" for l in labels] + [f"dalpha/d({l})" for l in labels]
+    np.savetxt(out_path[:-len(".csv")] + "_derivatives.csv",
+               np.column_stack([derivatives["f"], derivatives["dTL"].T, derivatives["dalpha"].T]),
+               delimiter=",", fmt="%.10g", comments="", header=",".join(header))
+
+def graph_info(json_path, legend, f, TL, alpha):
+    return {"legend": legend, "material_info": os.path.basename(json_path), "file_path": json_path,
+            "date": datetime.now().strftime("%Y-%m-%d"), "f": f, "TL": TL, "alpha": alpha}
+
+def run_one(task):
+    json_path, out_path, grid, adaptive, band_fraction, cache_dir, wrt, solver = task
+    start = time.perf_counter()
+    try:
+        layers, env = read_material(json_path)
+        cache = ResultCache(cache_dir) if cache_dir else None
+        cache_grid = {"kind": "adaptive"} if adaptive and env.get("field") != "diffuse" else grid
+        compute = lambda: simulate(calculation_layers(layers), env, grid, adaptive, solver)
+        (f, TL, alpha, tc, rc), hit = cached_run(cache, layers, env, cache_grid, compute)
+        if out_path.endswith(STORE_EXT):
+            # Appended to the shared store by the main process
+            legend = os.path.splitext(os.path.basename(json_path))[0]
+            graph = dict(graph_info(json_path, legend, f, TL, alpha), tc=tc, rc=rc)
+            return json_path, out_path, time.perf_counter() - start, None, hit, graph
+        bands = band_levels(f, TL, alpha, band_fraction) if band_fraction else None
+        write_result(out_path, json_path, f, TL, alpha, tc, rc, bands)
+        if wrt:
+            # On the result's own frequencies, so adaptive grids line up too
+            write_derivatives(out_path, run_simulation_derivatives(calculation_layers(layers), wrt, env, f))
+        return json_path, out_path, time.perf_counter() - start, None, hit, None
+    except Exception as e:
+        return json_path, out_path, time.perf_counter() - start, f"{type(e).__name__}: {e}", False, None
+
+def init_worker(layer_cache_mb, jit_threads=None):
+    if layer_cache_mb is not None:
+        layer_cache.set_budget(int(layer_cache_mb * 1024 ** 2))
+    # Short-lived processes only use kernels that are already compiled (see warm-up)
+    jit_backend.set_background_compile(False)
+    if jit_threads is not None:
+        jit_backend.set_threads(jit_threads)
+
+def run_command(args):
+    json_paths = expand_inputs(args.inputs)
+    if not json_paths:
+        print("[ERROR] No material JSON files matched.")
+        return 1
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    store = None
+    if args.format == "tlr":
+        if args.bands or args.derivatives:
+            print("[ERROR] --bands and --derivatives are not stored in a .tlr result store, use csv or npz.")
+            return 1
+        # All layups go into one store; results already in it are kept
+        store = ResultStore(os.path.join(args.out or ".", "results" + STORE_EXT))
+
+    grid = parse_grid(args.grid)
+    outputs = output_paths(json_paths, args.out, args.format)
+    cache_dir = None if args.no_cache else args.cache_dir
+    wrt = parse_wrt(args.derivatives) if args.derivatives else None
+    tasks = [(p, o, grid, args.adaptive, args.bands, cache_dir, wrt, args.solver) for p, o in zip(json_paths, outputs)]
+
+    init_worker(args.layer_cache_mb)
+    if args.verbose and args.solver == "auto" and jit_backend.available() and not jit_backend.cached():
+        print("[INFO] numba kernels are not compiled yet, solving with NumPy (see python -m calculate warm-up)")
+    start = time.perf_counter()
+    failed = 0
+    cached = 0
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        results = map(run_one, tasks)
+        executor = None
+    else:
+        # One process per core already, so the compiled kernels run single threaded in each
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(args.layer_cache_mb, 1))
+        results = executor.map(run_one, tasks, chunksize=max(1, len(tasks) // (workers * 8)))
+
+    try:
+        graphs = []
+        for json_path, out_path, elapsed, error, hit, graph in results:
+            cached += hit
+            if error:
+                failed += 1
+                print(f"[ERROR] {json_path}: {error}")
+                continue
+            if graph is not None:
+                graphs.append(graph)
+                out_path = store.path
+            if args.verbose:
+                print(f"[INFO] {os.path.basename(json_path)} -> {out_path} ({elapsed:.2f}s{', cached' if hit else ''})")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if store is not None and graphs:
+        store.extend(graphs)
+        print(f"[INFO] {len(graphs)} results added to {store.path} ({len(store)} in total)")
+
+    print(f"[INFO] {len(tasks) - failed}/{len(tasks)} layups done in {time.perf_counter() - start:.1f}s"
+          + (f", {cached} from cache" if cached else "") + (f" ({failed} failed)" if failed else ""))
+    return 1 if failed else 0
+
+def read_spec(spec_path):
+    # Study spec (JSON); "material" / "target" paths are relative to the spec file
+    with open(spec_path, "r") as fjson:
+        spec = json.load(fjson)
+    base = os.path.dirname(os.path.abspath(spec_path))
+    for key in ("material", "target"):
+        if isinstance(spec.get(key), str):
+            spec[key] = os.path.join(base, spec[key])
+    return spec
+
+def read_target(spec):
+    # "target": a graph CSV (graph "target_graph", default the first) or {"f": [...], "values": [...]}
+    quantity = spec.get("quantity", "TL")
+    target = spec["target"]
+    if isinstance(target, dict):
+        return np.asarray(target["f"], dtype=float), np.asarray(target["values"], dtype=float)
+    graph = read_graph_csv(target)[spec.get("target_graph", 0)]
+    values = graph["TL"] if quantity == "TL" else graph["alpha"]
+    # Graphs that only carry the other quantity have blank cells here
+    known = ~np.isnan(values)
+    return graph["f"][known], values[known]
+
+def optimize_command(args):
+    # spec: {"material", "target", "quantity", "parameters": [{"layer", "name", "min", "max", "log"}],
+    #        "max_mass", "max_thickness", "one_sided", "population", "generations", "seed", "grid"}
+    spec = read_spec(args.spec)
+    layers, env = read_material(spec["material"])
+    target_f, target_values = read_target(spec)
+
+    def report(generation, total):
+        if args.verbose:
+            print(f"[INFO] generation {generation}/{total}")
+
+    start = time.perf_counter()
+    result = optimize_layup(calculation_layers(layers), spec["parameters"], target_f, target_values,
+                            quantity=spec.get("quantity", "TL"), environment=env,
+                            weights=spec.get("weights"), one_sided=spec.get("one_sided", False),
+                            max_mass=spec.get("max_mass"), max_thickness=spec.get("max_thickness"),
+                            f=parse_grid(spec["grid"]) if isinstance(spec.get("grid"), str) else spec.get("grid"),
+                            population=spec.get("population"), generations=spec.get("generations", 100),
+                            seed=spec.get("seed"), progress=report)
+
+    for p, value in zip(result["parameters"], result["values"]):
+        print(f"[INFO] layer {int(p['layer']) + 1} {p['name']} = {value:.6g}")
+    print(f"[INFO] deviation {result['deviation']:.3f}, mass {result['mass']:.3f} kg/m2, "
+          f"thickness {result['thickness']:.2f} mm, {'feasible' if result['feasible'] else 'INFEASIBLE'}, "
+          f"{result['evaluations']} evaluations in {time.perf_counter() - start:.1f}s")
+
+    out_json = args.out or os.path.splitext(args.spec)[0] + "_best.json"
+    material_info = {"layers": update_cleaned_layers(layers, result["parameters"], result["values"]),
+                     "environment": env,
+                     "optimization": {"deviation": result["deviation"], "mass": result["mass"],
+                                      "thickness": result["thickness"], "feasible": result["feasible"]}}
+    with open(out_json, "w") as fjson:
+        json.dump(material_info, fjson, indent=2)
+
+    curve = graph_info(out_json, "optimized", result["f"], result["TL"], result["alpha"])
+    target = graph_info(spec["target"] if isinstance(spec["target"], str) else args.spec, "target",
+                        result["f"], result["target"], result["target"])
+    if spec.get("quantity", "TL") == "TL":
+        target["alpha"] = np.full_like(result["f"], np.nan)
+    else:
+        target["TL"] = np.full_like(result["f"], np.nan)
+    write_graph_csv(os.path.splitext(out_json)[0] + ".csv", [curve, target])
+    print(f"[INFO] Optimized layup saved to {out_json}")
+    return 0 if result["feasible"] else 1
+
+def explore_command(args):
+    # spec: {"material", "parameters": [{"layer", "name", "min", "max", "log"}], "n_candidates",
+    #        "batch_size", "seed", "grid"}
+    spec = read_spec(args.spec)
+    layers, env = read_material(spec["material"])
+    n_candidates = args.candidates or spec.get("n_candidates", 10000)
+
+    def report(done, total):
+        if args.verbose:
+            print(f"[INFO] {done}/{total} candidates")
+
+    start = time.perf_counter()
+    front = explore_design_space(calculation_layers(layers), spec["parameters"], n_candidates, env,
+                                 f=parse_grid(spec["grid"]) if isinstance(spec.get("grid"), str) else spec.get("grid"),
+                                 batch_size=spec.get("batch_size", 2000), workers=args.workers or os.cpu_count() or 1,
+                                 seed=spec.get("seed"), progress=report)
+
+    out_csv = args.out or os.path.splitext(args.spec)[0] + "_front.csv"
+    write_front_csv(out_csv, front)
+    print(f"[INFO] {len(front)} non-dominated of {n_candidates} layups in {time.perf_counter() - start:.1f}s, "
+          f"saved to {out_csv}")
+    return 0
+
+def uncertainty_command(args):
+    # spec: {"material", "uncertainties": [{"layer", "name", "dist", "spread"}], "n_samples",
+    #        "percentiles", "seed", "grid"}; without "uncertainties" the distributions saved in the
+    #        material JSON are used
+    spec = read_spec(args.spec)
+    layers, env = read_material(spec["material"])
+    uncertainties = spec.get("uncertainties") or layer_uncertainties(layers)
+    if not uncertainties:
+        print(f"[ERROR] No uncertain properties in {args.spec}")
+        return 1
+    n_samples = args.samples or spec.get("n_samples", 1000)
+
+    def report(done, total):
+        if args.verbose:
+            print(f"[INFO] {done}/{total} samples")
+
+    start = time.perf_counter()
+    result = run_monte_carlo(calculation_layers(layers), uncertainties, n_samples, env,
+                             f=parse_grid(spec["grid"]) if isinstance(spec.get("grid"), str) else spec.get("grid"),
+                             percentiles=spec.get("percentiles", DEFAULT_PERCENTILES), seed=spec.get("seed"),
+                             progress=report)
+
+    out_csv = args.out or os.path.splitext(args.spec)[0] + "_uncertainty.csv"
+    graphs = [graph_info(spec["material"], "nominal", result["f"], result["TL_nominal"], result["alpha_nominal"])]
+    graphs += [graph_info(spec["material"], f"P{p:g}", result["f"], result["TL"][k], result["alpha"][k])
+               for k, p in enumerate(result["percentiles"])]
+    write_graph_csv(out_csv, graphs)
+    print(f"[INFO] {n_samples} samples in {time.perf_counter() - start:.1f}s, saved to {out_csv}")
+    return 0
+
+def sensitivity_command(args):
+    # spec: {"material", "parameters": [{"layer", "name", "min", "max", "log"}], "n_samples",
+    #        "quantity", "n_bootstrap", "seed", "grid"}
+    spec = read_spec(args.spec)
+    layers, env = read_material(spec["material"])
+    n_samples = args.samples or spec.get("n_samples", 1024)
+
+    def report(done, total):
+        if args.verbose:
+            print(f"[INFO] {done}/{total} evaluations")
+
+    start = time.perf_counter()
+    result = sobol_indices(calculation_layers(layers), spec["parameters"], n_samples,
+                           quantity=spec.get("quantity", "TL"), environment=env,
+                           f=parse_grid(spec["grid"]) if isinstance(spec.get("grid"), str) else spec.get("grid"),
+                           n_bootstrap=spec.get("n_bootstrap", 100), seed=spec.get("seed"), progress=report)
+
+    # Most influential parameter per band, by total index
+    for b, k in enumerate(np.argmax(np.nan_to_num(result["ST"], nan=-np.inf), axis=0)):
+        p = result["parameters"][k]
+        print(f"[INFO] {result['centres'][b]:7.0f} Hz: layer {int(p['layer']) + 1} {p['name']} "
+              f"(S1 {result['S1'][k, b]:.2f}, ST {result['ST'][k, b]:.2f})")
+
+    out_csv = args.out or os.path.splitext(args.spec)[0] + "_sobol.csv"
+    write_sobol_csv(out_csv, result)
+    print(f"[INFO] {result['evaluations']} evaluations in {time.perf_counter() - start:.1f}s, saved to {out_csv}")
+    return 0
+
+def fit_command(args):
+    # spec: {"material", "target", "quantity" (default "alpha"), "layer" or "parameters": [{"layer", "name",
+    #        "min", "max", "log"}], "environment" (overrides, e.g. {"backing": "rigid"}), "n_starts",
+    #        "max_iter", "seed", "grid"}
+    spec = read_spec(args.spec)
+    spec.setdefault("quantity", "alpha")
+    layers, env = read_material(spec["material"])
+    env.update(spec.get("environment", {}))
+    layer_data = calculation_layers(layers)
+    parameters = spec.get("parameters") or jca_parameters(layer_data, spec.get("layer"))
+    target_f, target_values = read_target(spec)
+
+    def report(iteration, total):
+        if args.verbose:
+            print(f"[INFO] iteration {iteration}/{total}")
+
+    start = time.perf_counter()
+    result = fit_layer_parameters(layer_data, parameters, target_f, target_values, quantity=spec["quantity"],
+                                  environment=env, weights=spec.get("weights"),
+                                  f=parse_grid(spec["grid"]) if isinstance(spec.get("grid"), str) else spec.get("grid"),
+                                  n_starts=spec.get("n_starts", 64), max_iter=spec.get("max_iter", 50),
+                                  seed=spec.get("seed"), progress=report)
+
+    for p, value, std, at_bound in zip(result["parameters"], result["values"], result["std"], result["at_bound"]):
+        print(f"[INFO] layer {int(p['layer']) + 1} {p['name']} = {value:.6g} +/- {std:.2g}"
+              + (" (at search bound)" if at_bound else ""))
+    print(f"[INFO] rms residual {result['rms']:.4g}, {result['iterations']} iterations, "
+          f"{result['evaluations']} evaluations in {time.perf_counter() - start:.1f}s")
+
+    out_json = args.out or os.path.splitext(args.spec)[0] + "_fit.json"
+    material_info = {"layers": update_cleaned_layers(layers, result["parameters"], result["values"]),
+                     "environment": env,
+                     "fit": {"rms": result["rms"], "quantity": spec["quantity"],
+                             "std": {f"L{int(p['layer']) + 1} {p['name']}": s
+                                     for p, s in zip(result["parameters"], result["std"])}}}
+    with open(out_json, "w") as fjson:
+        json.dump(material_info, fjson, indent=2)
+
+    curve = graph_info(out_json, "fitted", result["f"], result["TL"], result["alpha"])
+    measured = graph_info(spec["target"] if isinstance(spec["target"], str) else args.spec, "measured",
+                          result["f"], result["target"], result["target"])
+    if spec["quantity"] == "TL":
+        measured["alpha"] = np.full_like(result["f"], np.nan)
+    else:
+        measured["TL"] = np.full_like(result["f"], np.nan)
+    write_graph_csv(os.path.splitext(out_json)[0] + ".csv", [curve, measured])
+    print(f"[INFO] Fitted layup saved to {out_json}")
+    return 0
+
+def bench_command(args):
+    def report(done, total, case, result):
+        if args.verbose:
+            print(f"[INFO] {done}/{total} {case}: {result['wall_s'] * 1e3:.2f} ms, {result['peak_mb']:.1f} MB, "
+                  f"{result['evals_per_s']:.3g} evals/s")
+
+    start = time.perf_counter()
+    results = run_benchmarks(args.preset, kernels=not args.no_kernels, progress=report)
+    out_path = args.out or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    write_report(out_path, results)
+    print(f"[INFO] {len(results['results'])} cases in {time.perf_counter() - start:.1f}s, saved to {out_path}")
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline or not os.path.exists(args.baseline):
+        write_report(args.baseline, results)
+        print(f"[INFO] Baseline saved to {args.baseline}")
+        return 0
+
+    rows = compare_to_baseline(results, read_report(args.baseline), args.threshold)
+    regressions = 0
+    for case, base, now, ratio, memory, status in rows:
+        regressions += status == "regression"
+        if args.verbose or status == "regression":
+            tag = "[WARNING]" if status == "regression" else "[INFO]"
+            print(f"{tag} {case}: {base * 1e3:.2f} -> {now * 1e3:.2f} ms (x{ratio:.2f}, memory x{memory:.2f}) {status}")
+    print(f"[INFO] {len(rows)} cases compared with {args.baseline}, {regressions} regressions "
+          f"(threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+def profile_command(args):
+    layers, env = read_material(args.input)
+    with profile_stages(trace_memory=args.memory) as profile:
+        simulate(calculation_layers(layers), env, parse_grid(args.grid), solver=args.solver)
+    print(profile.report())
+    if args.out:
+        with open(args.out, "w") as fjson:
+            json.dump(dict(profile.to_dict(), material=args.input, environment=env), fjson, indent=2)
+        print(f"[INFO] Stage timings saved to {args.out}")
+    return 0
+
+def warm_up_command(args):
+    if not jit_backend.available():
+        print("[INFO] numba is not installed, the NumPy solvers are used")
+        return 0
+    seconds = jit_backend.warm_up()
+    if not jit_backend.ready():
+        print("[ERROR] numba kernels failed to compile, the NumPy solvers are used")
+        return 1
+    print(f"[INFO] numba kernels ready in {seconds:.1f}s (cached: {jit_backend.cached()})")
+    return 0
+
+def equivalence_command(args):
+    layups = canonical_layups()
+    layups.update(random_layups(args.random, args.seed))
+    backends = args.backends.split(",") if args.backends else list(BACKENDS)
+
+    def report(done, total, name):
+        if args.verbose:
+            print(f"[INFO] {done}/{total} {name}")
+
+    start = time.perf_counter()
+    result = check_equivalence(layups, backends, {"kind": "log", "f_min": 100, "f_max": 10000, "n": args.n_freq},
+                               progress=report)
+
+    failures = [c for c in result["cases"] if not c["passed"]]
+    for c in failures:
+        tolerances = result["tolerances"][c["backend"]]
+        worst = ", ".join(f"{q} {v:.2e}" for q, v in c["deviations"].items() if v > tolerances[q])
+        print(f"[ERROR] {c['backend']} on {c['layup']} (theta {c['theta']:g}, {c['backing']}): {worst}")
+    for name, summary in result["classes"].items():
+        reference = summary["seconds"]["reference"]
+        fastest = summary["fastest"]
+        failed = f", failed: {', '.join(summary['failed'])}" if summary["failed"] else ""
+        print(f"[INFO] {name:<22} fastest within tolerance: {fastest} "
+              f"(x{reference / summary['seconds'][fastest]:.1f} vs reference){failed}")
+
+    if args.out:
+        with open(args.out, "w") as fjson:
+            json.dump(result, fjson, indent=2)
+    print(f"[INFO] {len(result['cases'])} runs on {len(layups)} layups in {time.perf_counter() - start:.1f}s, "
+          f"{len(failures)} outside tolerance")
+    return 1 if failures else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m calculate",
+                                     description="Headless transmission loss / absorption calculations")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run material JSON files (result_material.json format)")
+    run.add_argument("inputs", nargs="+", help="JSON files, directories or glob patterns")
+    run.add_argument("-o", "--out", help="output directory (default: next to each input)")
+    run.add_argument("-j", "--workers", type=int, default=0, help="worker processes (default: all cores)")
+    run.add_argument("--format", choices=["csv", "npz", "tlr"], default="csv",
+                     help="tlr: all results in one memory-mapped store <out>/results.tlr")
+    run.add_argument("--grid", help="frequency grid, e.g. log:100:10000:5000, bands:3:50:10000:8 or JSON")
+    run.add_argument("--adaptive", action="store_true", help="adaptive frequency refinement (oblique only)")
+    run.add_argument("--bands", type=int, choices=[1, 3], help="also write 1/1 or 1/3 octave band levels")
+    run.add_argument("--derivatives", help="also write dTL / dalpha, e.g. 1:thickness,2:airflow_resistivity")
+    run.add_argument("--solver", choices=SOLVERS, default="auto",
+                     help="auto: numba kernels when compiled (see warm-up), else condense; "
+                          "global: one block-banded system per frequency (tall stacks, thick layers)")
+    run.add_argument("--layer-cache-mb", type=float, help="per-process layer matrix cache budget [MB]")
+    run.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="result cache directory")
+    run.add_argument("--no-cache", action="store_true", help="always recompute, never read or write the cache")
+    run.add_argument("-v", "--verbose", action="store_true")
+    run.set_defaults(func=run_command)
+
+    optimize = sub.add_parser("optimize", help="fit layer parameters to a target TL / absorption curve")
+    optimize.add_argument("spec", help="optimization spec JSON")
+    optimize.add_argument("-o", "--out", help="best layup JSON (default: <spec>_best.json)")
+    optimize.add_argument("-v", "--verbose", action="store_true")
+    optimize.set_defaults(func=optimize_command)
+
+    explore = sub.add_parser("explore", help="Pareto front of TL vs surface mass vs thickness")
+    explore.add_argument("spec", help="exploration spec JSON")
+    explore.add_argument("-o", "--out", help="front CSV (default: <spec>_front.csv)")
+    explore.add_argument("-n", "--candidates", type=int, help="number of sampled layups")
+    explore.add_argument("-j", "--workers", type=int, default=0, help="worker processes (default: all cores)")
+    explore.add_argument("-v", "--verbose", action="store_true")
+    explore.set_defaults(func=explore_command)
+
+    uncertainty = sub.add_parser("uncertainty", help="Monte Carlo percentile bands of TL / absorption")
+    uncertainty.add_argument("spec", help="uncertainty spec JSON")
+    uncertainty.add_argument("-o", "--out", help="percentile CSV (default: <spec>_uncertainty.csv)")
+    uncertainty.add_argument("-n", "--samples", type=int, help="number of Monte Carlo samples")
+    uncertainty.add_argument("-v", "--verbose", action="store_true")
+    uncertainty.set_defaults(func=uncertainty_command)
+
+    sensitivity = sub.add_parser("sensitivity", help="Sobol first-order / total indices per 1/3 octave band")
+    sensitivity.add_argument("spec", help="sensitivity spec JSON")
+    sensitivity.add_argument("-o", "--out", help="indices CSV (default: <spec>_sobol.csv)")
+    sensitivity.add_argument("-n", "--samples", type=int, help="base sample count N (N * (d + 2) runs)")
+    sensitivity.add_argument("-v", "--verbose", action="store_true")
+    sensitivity.set_defaults(func=sensitivity_command)
+
+    profile = sub.add_parser("profile", help="per-stage timings of one material JSON (no result cache)")
+    profile.add_argument("input", help="material JSON (result_material.json format)")
+    profile.add_argument("--grid", help="frequency grid, e.g. log:100:10000:5000, bands:3:50:10000:8 or JSON")
+    profile.add_argument("--solver", choices=SOLVERS, default="auto")
+    profile.add_argument("--memory", action="store_true", help="also trace peak allocations (slower)")
+    profile.add_argument("-o", "--out", help="also write the stage table as JSON")
+    profile.set_defaults(func=profile_command)
+
+    warm_up = sub.add_parser("warm-up", help="compile the optional numba kernels into their on-disk cache")
+    warm_up.set_defaults(func=warm_up_command)
+
+    equivalence = sub.add_parser("equivalence", help="check every backend against the reference loop")
+    equivalence.add_argument("--random", type=int, default=20, help="randomized layups on top of the canonical ones")
+    equivalence.add_argument("--seed", type=int, default=0)
+    equivalence.add_argument("--n-freq", type=int, default=100, help="log-spaced frequencies, 100 Hz - 10 kHz")
+    equivalence.add_argument("--backends", help=f"comma separated subset of {','.join(BACKENDS)}")
+    equivalence.add_argument("-o", "--out", help="per-run deviations and timings as JSON")
+    equivalence.add_argument("-v", "--verbose", action="store_true")
+    equivalence.set_defaults(func=equivalence_command)
+
+    bench = sub.add_parser("bench", help="time full runs and the kernels, compare with a stored baseline")
+    bench.add_argument("--preset", choices=list(PRESETS), default="standard", help="case matrix size")
+    bench.add_argument("-o", "--out", help="results JSON (default: benchmark_<timestamp>.json)")
+    bench.add_argument("--baseline", help="baseline JSON to compare with (written if it does not exist)")
+    bench.add_argument("--update-baseline", action="store_true", help="replace the baseline with this run")
+    bench.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help="relative slow-down / memory growth reported as a regression")
+    bench.add_argument("--no-kernels", action="store_true", help="full runs only")
+    bench.add_argument("-v", "--verbose", action="store_true")
+    bench.set_defaults(func=bench_command)
+
+    fit = sub.add_parser("fit", help="identify layer (JCA) parameters from a measured absorption / TL curve")
+    fit.add_argument("spec", help="fit spec JSON")
+    fit.add_argument("-o", "--out", help="fitted layup JSON (default: <spec>_fit.json)")
+    fit.add_argument("-v", "--verbose", action="store_true")
+    fit.set_defaults(func=fit_command)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
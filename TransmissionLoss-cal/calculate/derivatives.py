@@ -0,0 +1,84 @@
+import numpy as np
+
+from diffuse_field import diffuse_quadrature
+from param_batch import UI_UNITS, check_parameters, iter_batches
+
+# Relative contour radius; the truncation error is O(step^4), the round-off O(eps / step)
+CONTOUR_STEP = 1e-4
+# i^k for the four contour points p + i^k h
+CONTOUR = np.array([1, 1j, -1, -1j])
+
+def parse_wrt(text):
+    # "1:thickness,2:airflow_resistivity" (1-based layers) -> [{"layer": 0, "name": "thickness"}, ...]
+    wrt = []
+    for item in text.split(","):
+        layer, name = item.split(":")
+        wrt.append({"layer": int(layer) - 1, "name": name.strip()})
+    return wrt
+
+def contour_samples(layer_data, wrt, step=CONTOUR_STEP):
+    # Candidate 0 is the nominal layup, candidates 1 + 4k .. 4 + 4k move parameter k to p + i^j h
+    n = 1 + 4 * len(wrt)
+    nominal = [complex(layer_data[int(p["layer"])][p["name"]]) for p in wrt]
+    samples = {(int(p["layer"]), p["name"]): np.full(n, value) for p, value in zip(wrt, nominal)}
+    steps = []
+    for k, (p, value) in enumerate(zip(wrt, nominal)):
+        h = step * abs(value) if value != 0 else step
+        samples[(int(p["layer"]), p["name"])][1 + 4 * k:5 + 4 * k] += CONTOUR * h
+        steps.append(h)
+    return samples, np.array(steps)
+
+def contour_derivative(values, steps):
+    # values (1 + 4P, ...) -> d/dp (P, ...): f'(p) = sum_j i^-j f(p + i^j h) / (4h), exact to O(h^4)
+    # for quantities holomorphic in p (tc and rc are: every layer, interface and solve is analytic)
+    stencil = values[1:].reshape((len(steps), 4) + values.shape[1:])
+    weights = (np.conj(CONTOUR) / 4).reshape((1, 4) + (1,) * (values.ndim - 1))
+    return np.sum(weights * stencil, axis=1) / steps.reshape((-1,) + (1,) * (values.ndim - 1))
+
+def run_simulation_derivatives(layer_data, wrt, environment=None, f=None, step=CONTOUR_STEP, progress=None):
+    # Nominal f, TL, alpha, tc, rc plus dTL, dalpha, dtc, drc (P, F) with respect to the properties in
+    # wrt ([{"layer", "name"}], derivatives per UI unit, e.g. per mm of thickness). All 1 + 4P layups
+    # go through the solver in one batched pass; TL and alpha follow from tc and rc by the chain rule.
+    # For a diffuse field tc / rc and their derivatives are per angle, (n_angles, F) and (P, n_angles, F).
+    check_parameters(layer_data, wrt)
+    env = environment or {}
+    samples, steps = contour_samples(layer_data, wrt, step)
+
+    parts = list(iter_batches(layer_data, samples, env, f, progress=progress))
+    f = parts[0][1]
+    tc = np.concatenate([p[4] for p in parts])
+    rc = np.concatenate([p[5] for p in parts])
+    dtc = contour_derivative(tc, steps)
+    drc = contour_derivative(rc, steps)
+    tc, rc = tc[0], rc[0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if str(env.get("field", "oblique")).lower() == "diffuse":
+            _, weights = diffuse_quadrature(env.get("theta_max", 78))
+            tau = weights @ np.abs(tc) ** 2
+            TL = -10 * np.log10(tau)
+            alpha = weights @ (1 - np.abs(rc) ** 2)
+            dTL = -10 / np.log(10) * np.einsum("a,paf->pf", weights, 2 * np.real(np.conj(tc) * dtc)) / tau
+            dalpha = -np.einsum("a,paf->pf", weights, 2 * np.real(np.conj(rc) * drc))
+        else:
+            TL = -20 * np.log10(np.abs(tc))
+            alpha = 1 - np.abs(rc) ** 2
+            dTL = -20 / np.log(10) * np.real(dtc / tc)
+            dalpha = -2 * np.real(np.conj(rc) * drc)
+
+    # Per calculation unit -> per UI unit
+    units = np.array([UI_UNITS.get(p["name"], 1.0) for p in wrt])
+    per_ui = units.reshape((-1,) + (1,) * (dtc.ndim - 1))
+
+    return {
+        "wrt": wrt,
+        "f": f,
+        "TL": TL,
+        "alpha": alpha,
+        "tc": tc,
+        "rc": rc,
+        "dTL": dTL * units[:, None],
+        "dalpha": dalpha * units[:, None],
+        "dtc": dtc * per_ui,
+        "drc": drc * per_ui
+    }
@@ -0,0 +1,47 @@
+import numpy as np
+
+from frequency_grid import frequency_grid
+from layup_plan import compile_layup
+
+def diffuse_quadrature(theta_max=78, n_angles=30, method="gauss", theta_min=0):
+    # Nodes [deg] and weights for tau_d = int tau(theta) sin cos dtheta / int sin cos dtheta
+    a, b = np.radians(theta_min), np.radians(theta_max)
+    if method == "gauss":
+        x, wx = np.polynomial.legendre.leggauss(n_angles)
+        theta = (b - a) / 2 * x + (a + b) / 2
+        weights = wx * (b - a) / 2
+    elif method == "trapezoid":
+        theta = np.linspace(a, b, n_angles)
+        weights = np.full(n_angles, (b - a) / (n_angles - 1))
+        weights[[0, -1]] /= 2
+    elif method == "simpson":
+        if n_angles % 2 == 0:
+            n_angles += 1
+        theta = np.linspace(a, b, n_angles)
+        weights = np.ones(n_angles)
+        weights[1:-1:2] = 4
+        weights[2:-1:2] = 2
+        weights *= (b - a) / (n_angles - 1) / 3
+    else:
+        raise ValueError(f"[ERROR] Unsupported quadrature: {method}")
+
+    # Normalise with the exact integral of sin*cos so that tau = 1 integrates to 1
+    weights = weights * np.sin(theta) * np.cos(theta) / ((np.sin(b) ** 2 - np.sin(a) ** 2) / 2)
+    return np.degrees(theta), weights
+
+def run_simulation_diffuse(layer_data: list, theta_max=78, n_angles=30, quadrature="gauss",
+                           P0=101325, T=20, RH=0.2, f=None, progress=None, backing="anechoic", solver="auto"):
+    # Paris-formula diffuse field: every (angle x frequency) point is solved in one batched pass.
+    # tc and rc are returned per angle, shape (n_angles, F); TL and alpha are the integrated values.
+    theta_deg, weights = diffuse_quadrature(theta_max, n_angles, quadrature)
+
+    # Frequency-only quantities (jca_rigid, air) broadcast across the angle axis
+    f, _, _, tc, rc = compile_layup(layer_data).run(frequency_grid(f), theta_deg[:, None], P0, T, RH, progress,
+                                                    backing, solver)
+
+    tau = weights @ np.abs(tc) ** 2
+    with np.errstate(divide="ignore"):
+        TL = -10 * np.log10(tau)
+    alpha = weights @ (1 - np.abs(rc) ** 2)
+
+    return f, TL, alpha, tc, rc
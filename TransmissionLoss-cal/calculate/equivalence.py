@@ -0,0 +1,186 @@
+import time
+
+import numpy as np
+
+import jit_backend
+from benchmark import GAP, PANEL, PLASTIC, POROUS, benchmark_layups
+from calculation import run_simulation_batched, run_simulation_global, run_simulation_reference
+from layer_cache import layer_cache
+from param_batch import run_batch
+
+# TL is compared only where the reference is within TL_RANGE dB of its lowest TL. In deeper notches |tc| is
+# below ~1e-5 max |tc| and a relative tc tolerance no longer bounds the dB value
+TL_RANGE = 100.0
+# Largest accepted deviation from the reference loop, per backend: tc / rc relative to max |reference|,
+# alpha absolute, TL in dB (20 log10(e) * tc tolerance * 10^(TL_RANGE / 20)).
+# batched, cached and param_batch run the same equilibrated condensation as the reference and only
+# differ by LU solve vs inverse (~5e-10 on random stacks). global solves the whole stack as one system
+# of face amplitudes and jit eliminates with partial pivoting over all rows in scalar cmath arithmetic:
+# neither shares the reference's rounding, and global is better conditioned on thick or evanescent
+# layers, so its deviation measures the reference as much as itself.
+EXACT = {"tc": 1e-9, "rc": 1e-9, "TL": 1e-3, "alpha": 1e-9}
+INDEPENDENT = {"tc": 1e-8, "rc": 1e-8, "TL": 1e-2, "alpha": 1e-8}
+TOLERANCES = {"reference": EXACT, "batched": EXACT, "cached": EXACT, "param_batch": EXACT,
+              "global": INDEPENDENT, "jit": INDEPENDENT}
+# (theta [deg], backing) every layup is solved for
+ENVIRONMENTS = [(0.0, "anechoic"), (45.0, "anechoic"), (0.0, "rigid")]
+LAYER_KINDS = {"poro": POROUS, "panel": PANEL, "plastic": PLASTIC}
+
+def run_reference(layer_data, theta, backing, f):
+    return run_simulation_reference(layer_data, theta, f=f, backing=backing)
+
+def run_batched(layer_data, theta, backing, f):
+    layer_cache.clear()
+    return run_simulation_batched(layer_data, theta, f=f, backing=backing, solver="condense")
+
+def prepare_cached(layer_data, theta, backing, f):
+    # Fills the layer matrix cache, the timed run then reads every layer from it
+    layer_cache.clear()
+    run_simulation_batched(layer_data, theta, f=f, backing=backing, solver="condense")
+
+def run_cached(layer_data, theta, backing, f):
+    return run_simulation_batched(layer_data, theta, f=f, backing=backing, solver="condense")
+
+def run_global(layer_data, theta, backing, f):
+    layer_cache.clear()
+    return run_simulation_global(layer_data, theta, f=f, backing=backing)
+
+def prepare_jit(layer_data, theta, backing, f):
+    # The first call compiles (or loads) the kernels, outside the timed run
+    jit_backend.warm_up()
+
+def run_jit(layer_data, theta, backing, f):
+    return run_simulation_batched(layer_data, theta, f=f, backing=backing, solver="jit")
+
+def run_param_batch(layer_data, theta, backing, f):
+    # One candidate through the batched-parameter path (array valued layer properties)
+    samples = {(0, "thickness"): np.array([layer_data[0]["thickness"]])}
+    f, TL, alpha, tc, rc = run_batch(layer_data, samples, {"theta": theta, "backing": backing}, f)
+    return f, TL[0], alpha[0], tc[0], rc[0]
+
+# name -> (prepare or None, run); run(layer_data, theta, backing, f) -> f, TL, alpha, tc, rc.
+# "reference" is what every other backend is checked against.
+BACKENDS = {
+    "reference": (None, run_reference),
+    "batched": (None, run_batched),
+    "cached": (prepare_cached, run_cached),
+    "param_batch": (None, run_param_batch),
+    "global": (None, run_global)
+}
+
+def register_backend(name, run, prepare=None, tolerances=INDEPENDENT):
+    BACKENDS[name] = (prepare, run)
+    TOLERANCES[name] = dict(tolerances)
+
+# Only with numba installed, "jit" would silently be "batched" otherwise
+if jit_backend.available():
+    register_backend("jit", run_jit, prepare_jit)
+
+def canonical_layups():
+    # Every bc_matrix combination: each ordered pair of solid kinds directly bonded and across an
+    # unbonded (fluid) gap, poro|poro with differing porosities, plus the example material.
+    # Returns {name: (class, layer_data)}
+    second = {"poro": dict(POROUS, porosity=0.7, airflow_resistivity=40000.0, density=30.0),
+              "panel": dict(PANEL, thickness=0.002), "plastic": dict(PLASTIC, thickness=0.003)}
+    layups = {"example": ("example", benchmark_layups()["example"])}
+    for a, upper in LAYER_KINDS.items():
+        for b in LAYER_KINDS:
+            lower = second[b]
+            layups[f"{a}|{b}"] = (f"{a}|{b}", [dict(upper), dict(lower)])
+            layups[f"{a}|gap|{b}"] = (f"{a}|gap|{b}", [dict(upper), dict(GAP, thickness=0.01), dict(lower)])
+    return layups
+
+def random_layer(kind, rng):
+    def log_uniform(lo, hi):
+        return float(np.exp(rng.uniform(np.log(lo), np.log(hi))))
+
+    if kind == "gap":
+        return dict(GAP, thickness=rng.uniform(0.001, 0.02))
+    if kind == "poro":
+        vcl = log_uniform(2e-5, 3e-4)
+        return dict(POROUS, thickness=rng.uniform(0.005, 0.06), porosity=rng.uniform(0.7, 0.99),
+                    airflow_resistivity=log_uniform(5e3, 1e5), tortuosity=rng.uniform(1.0, 2.5),
+                    viscous_cl=vcl, thermal_cl=vcl * rng.uniform(1.5, 3.0),
+                    youngs_modulus=log_uniform(5e4, 5e5), loss_factor=rng.uniform(0.02, 0.15),
+                    poissons_ratio=rng.uniform(0.1, 0.4), density=rng.uniform(8, 60))
+    if kind == "panel":
+        return dict(PANEL, thickness=rng.uniform(0.0005, 0.003), youngs_modulus=log_uniform(2e9, 2e11),
+                    loss_factor=rng.uniform(1e-3, 1e-2), density=rng.uniform(1000, 8000))
+    return dict(PLASTIC, thickness=rng.uniform(0.001, 0.005), youngs_modulus=log_uniform(5e8, 5e9),
+                poissons_ratio=rng.uniform(0.3, 0.4), density=rng.uniform(900, 1500))
+
+def random_layups(n, seed=None):
+    # 1-6 layers with random kinds and properties; gaps only between solid layers, never two in a row
+    rng = np.random.default_rng(seed)
+    layups = {}
+    for k in range(n):
+        kinds = []
+        for i in range(rng.integers(1, 7)):
+            options = list(LAYER_KINDS)
+            if 0 < i and kinds[-1] != "gap":
+                options.append("gap")
+            kinds.append(options[rng.integers(len(options))])
+        while kinds[-1] == "gap":
+            kinds.pop()
+        layups[f"random{k}:{'|'.join(kinds)}"] = ("random", [random_layer(kind, rng) for kind in kinds])
+    return layups
+
+def deviations(result, reference):
+    # Largest deviation of tc, rc, TL and alpha from the reference, on the TOLERANCES scales
+    _, TL, alpha, tc, rc = result
+    _, TL_ref, alpha_ref, tc_ref, rc_ref = reference
+    out = {}
+    for name, values, ref in (("tc", tc, tc_ref), ("rc", rc, rc_ref)):
+        scale = np.max(np.abs(ref))
+        out[name] = float(np.max(np.abs(values - ref)) / scale) if scale > 0 else float(np.max(np.abs(values)))
+    finite = np.isfinite(TL_ref)
+    if np.any(np.isfinite(TL) != finite):
+        out["TL"] = float("inf")
+    else:
+        compared = finite & (TL_ref <= np.min(TL_ref[finite], initial=np.inf) + TL_RANGE)
+        out["TL"] = float(np.max(np.abs(TL[compared] - TL_ref[compared]), initial=0.0))
+    out["alpha"] = float(np.max(np.abs(alpha - alpha_ref)))
+    return out
+
+def check_equivalence(layups=None, backends=None, f=None, environments=ENVIRONMENTS, tolerances=TOLERANCES,
+                      progress=None):
+    # Runs every backend on every layup / environment and compares it with "reference".
+    # Returns {"cases": [{layup, class, theta, backing, backend, seconds, deviations, passed}],
+    #          "classes": {class: {"fastest": backend, "seconds": {backend: s}, "failed": [backend]}}}
+    layups = canonical_layups() if layups is None else layups
+    backends = backends or list(BACKENDS)
+    f = {"kind": "log", "f_min": 100, "f_max": 10000, "n": 100} if f is None else f
+    cases = []
+    total = len(layups) * len(environments)
+    done = 0
+    for name, (layup_class, layer_data) in layups.items():
+        for theta, backing in environments:
+            reference = None
+            for backend in ["reference"] + [b for b in backends if b != "reference"]:
+                prepare, run = BACKENDS[backend]
+                if prepare is not None:
+                    prepare(layer_data, theta, backing, f)
+                start = time.perf_counter()
+                result = run(layer_data, theta, backing, f)
+                seconds = time.perf_counter() - start
+                if reference is None:
+                    reference = result
+                dev = deviations(result, reference)
+                cases.append({"layup": name, "class": layup_class, "theta": theta, "backing": backing,
+                              "backend": backend, "seconds": seconds, "deviations": dev,
+                              "passed": all(dev[q] <= tolerances[backend][q] for q in dev)})
+            done += 1
+            if progress is not None:
+                progress(done, total, name)
+
+    classes = {}
+    for case in cases:
+        summary = classes.setdefault(case["class"], {"seconds": {}, "failed": []})
+        summary["seconds"][case["backend"]] = summary["seconds"].get(case["backend"], 0.0) + case["seconds"]
+        if not case["passed"] and case["backend"] not in summary["failed"]:
+            summary["failed"].append(case["backend"])
+    for summary in classes.values():
+        passing = {b: s for b, s in summary["seconds"].items() if b not in summary["failed"]}
+        summary["fastest"] = min(passing, key=passing.get)
+    return {"tolerances": {b: dict(tolerances[b]) for b in ["reference"] + backends if b in tolerances},
+            "cases": cases, "classes": classes}
@@ -0,0 +1,76 @@
+import numpy as np
+
+from layup_plan import default_frequencies
+
+# Base-10 octave ratio (IEC 61260-1)
+OCTAVE_RATIO = 10 ** 0.3
+
+def band_centres(fraction=3, f_min=50, f_max=10000):
+    # Exact mid-band frequencies of the 1/fraction-octave bands nearest to f_min .. f_max
+    scale = fraction / np.log10(OCTAVE_RATIO)
+    x_min = int(np.round(scale * np.log10(f_min / 1000)))
+    x_max = int(np.round(scale * np.log10(f_max / 1000)))
+    x = np.arange(x_min, x_max + 1)
+    if fraction % 2 == 0:
+        return 1000 * OCTAVE_RATIO ** ((2 * x + 1) / (2 * fraction))
+    return 1000 * OCTAVE_RATIO ** (x / fraction)
+
+def band_edges(centres, fraction=3):
+    half = OCTAVE_RATIO ** (1 / (2 * fraction))
+    return centres / half, centres * half
+
+def frequency_grid(spec=None):
+    # spec: None (default 5000-point log grid), an explicit array/list of frequencies, or a dict
+    #   {"kind": "linear", "f_min", "f_max", "n"}
+    #   {"kind": "log", "f_min", "f_max", "n"}
+    #   {"kind": "list", "values"}
+    #   {"kind": "bands", "fraction", "f_min", "f_max", "points"}  (points per band, log-centred)
+    if spec is None:
+        return default_frequencies()
+    if not isinstance(spec, dict):
+        return np.sort(np.asarray(spec, dtype=float).ravel())
+
+    kind = spec.get("kind", "log")
+    if kind == "linear":
+        return np.linspace(spec["f_min"], spec["f_max"], int(spec["n"]))
+    elif kind == "log":
+        return np.logspace(np.log10(spec["f_min"]), np.log10(spec["f_max"]), int(spec["n"]))
+    elif kind == "list":
+        return np.sort(np.asarray(spec["values"], dtype=float).ravel())
+    elif kind == "bands":
+        fraction = spec.get("fraction", 3)
+        points = int(spec.get("points", 8))
+        centres = band_centres(fraction, spec.get("f_min", 50), spec.get("f_max", 10000))
+        lower, upper = band_edges(centres, fraction)
+        # Midpoints of `points` equal log-width slices of each band
+        t = (np.arange(points) + 0.5) / points
+        return (lower[:, None] * (upper / lower)[:, None] ** t).ravel()
+    else:
+        raise ValueError(f"[ERROR] Unsupported frequency grid: {kind}")
+
+def band_average(f, values, fraction=3, f_min=None, f_max=None):
+    # Mean of `values` (last axis matches f) over the samples in each band; empty bands give nan
+    f = np.asarray(f, dtype=float)
+    values = np.asarray(values)
+    centres = band_centres(fraction, f.min() if f_min is None else f_min, f.max() if f_max is None else f_max)
+    lower, upper = band_edges(centres, fraction)
+
+    edges = np.append(lower, upper[-1])
+    band = np.searchsorted(edges, f, side="right") - 1
+    inside = (band >= 0) & (band < len(centres))
+
+    counts = np.bincount(band[inside], minlength=len(centres))
+    flat = values.reshape(-1, len(f))[:, inside]
+    sums = np.zeros((flat.shape[0], len(centres)), dtype=np.result_type(flat, float))
+    np.add.at(sums.T, band[inside], flat.T)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averaged = sums / counts
+    return centres, averaged.reshape(values.shape[:-1] + (len(centres),))
+
+def band_levels(f, TL, alpha, fraction=3, f_min=None, f_max=None):
+    # Band TL from the energy average of tau = 10^(-TL/10), band alpha as a plain energy average
+    tau = 10 ** (-np.asarray(TL) / 10)
+    centres, tau_band = band_average(f, tau, fraction, f_min, f_max)
+    _, alpha_band = band_average(f, alpha, fraction, f_min, f_max)
+    return centres, -10 * np.log10(tau_band), alpha_band
@@ -0,0 +1,64 @@
+import numpy as np
+
+def layer_faces(Phi, Lambda, diagonal=True):
+    # State at the upper and lower face of a layer as linear maps of its wave amplitudes a
+    # (upper = Phi @ Lambda @ a, lower = Phi @ a, as in merge_layer). With a diagonal Lambda (poro,
+    # plastic: one exponential per wave) every growing wave is referenced to the face where it is
+    # largest instead, so no entry exceeds |Phi|, also for thick layers where exp(Alpha * -d) overflows
+    if not diagonal:
+        return Phi @ Lambda, Phi
+    lam = np.diagonal(Lambda, axis1=-2, axis2=-1)
+    grows = ~(np.abs(lam) <= 1)  # overflowed (inf / nan) entries included
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lower = np.where(grows, np.where(np.isfinite(lam), 1 / lam, 0), 1)
+    upper = np.where(grows, 1, lam)
+    return Phi * upper[..., None, :], Phi * lower[..., None, :]
+
+def _block_rows(parts, batch):
+    # Concatenate the column blocks of one block row, broadcast to the common batch shape
+    rows = max(p.shape[-2] for p in parts)
+    return np.concatenate([np.broadcast_to(p, batch + (rows, p.shape[-1])) for p in parts], axis=-1)
+
+def solve_global(faces, interfaces, excitation, batch):
+    # Block-banded system of a whole layup, one per grid point (leading axes batch):
+    #   faces: (upper, lower) face maps of every unknown block from the top, e.g. the incident fluid
+    #   state, the amplitudes of each layer, the transmitted wave amplitude
+    #   interfaces: (B_pos, B_neg) between consecutive blocks, B_pos @ lower_k @ u_k = B_neg @ upper_k+1 @ u_k+1
+    #   excitation: (E, e), the only inhomogeneous rows E @ u_0 = e
+    # Factorized block column by block column with QR (orthogonal, so no pivoting is needed), then
+    # back-substituted: O(layers) work, every step batched over the grid. Returns u per block.
+    E, e = excitation
+    n_rhs = e.shape[-1]
+    factors = []
+    carry = np.zeros(batch + (0, faces[0][1].shape[-1] + n_rhs), dtype=np.complex128)
+    for k in range(len(faces)):
+        n_k = faces[k][1].shape[-1] if faces[k][1] is not None else faces[k][0].shape[-1]
+        n_next = faces[k + 1][0].shape[-1] if k + 1 < len(faces) else 0
+        new_rows = []
+        if k == 0:
+            new_rows.append(_block_rows([E, np.zeros(E.shape[-2:-1] + (n_next,)), e], batch))
+        if k < len(interfaces):
+            B_pos, B_neg = interfaces[k]
+            new_rows.append(_block_rows([B_pos @ faces[k][1], -B_neg @ faces[k + 1][0],
+                                         np.zeros(B_pos.shape[-2:-1] + (n_rhs,))], batch))
+        # Rows left over from the block above only involve this block and the right hand side
+        carry = np.concatenate([carry[..., :n_k], np.zeros(carry.shape[:-1] + (n_next,)), carry[..., n_k:]],
+                               axis=-1)
+        A = np.concatenate([carry] + new_rows, axis=-2)
+        if A.shape[-2] < n_k:
+            raise ValueError(f"[ERROR] Layup system is under-determined at block {k}")
+
+        # Equilibrate rows (stress rows ~E, velocity rows ~w*k), then rotate to upper triangular form.
+        # The first n_k rows eliminate this block; the ones below (any row basis of the remaining
+        # equations will do) carry over to the next block
+        scale = np.max(np.abs(A), axis=-1, keepdims=True)
+        A = np.linalg.qr(A / np.where(scale > 0, scale, 1), mode="r")
+        factors.append((A[..., :n_k, :n_k], A[..., :n_k, n_k:n_k + n_next], A[..., :n_k, n_k + n_next:]))
+        carry = A[..., n_k:, n_k:]
+
+    solution = []
+    for R, R_next, rhs in reversed(factors):
+        if solution:
+            rhs = rhs - R_next @ solution[0]
+        solution.insert(0, np.linalg.solve(R, rhs))
+    return solution
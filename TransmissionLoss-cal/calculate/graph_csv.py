@@ -0,0 +1,85 @@
+import csv
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+META_KEYS = ["material_info", "file_path", "date", "legend"]
+META_LABELS = ["material info.", "path", "date", "graph name"]
+COLUMNS = ["Frequency [Hz]", "Transmission Loss [dB]", "Absorption Coefficient"]
+# Rows formatted / parsed per chunk
+CHUNK_ROWS = 1000
+# 12 significant digits; the .tlr result store is the lossless format
+VALUE_FORMAT = "%.12g"
+
+def read_graph_csv(csv_path):
+    # Graphs from a CSV in the SoundInsulationUI export layout: 4 metadata rows, a blank row,
+    # a header row, then (Frequency, TL, alpha) column triples, one per graph. A blank TL or alpha
+    # cell (e.g. a target curve of one quantity only) stays NaN
+    with open(csv_path, newline='') as fcsv:
+        head = list(islice(csv.reader(fcsv), 16))
+    header_index = next((k for k, row in enumerate(head) if row[:1] == [COLUMNS[0]]), None)
+    if header_index is None:
+        raise ValueError(f"[ERROR] No '{COLUMNS[0]}' header row in {csv_path}")
+    meta_lines = head[:header_index]
+    n_graphs = len(head[header_index]) // 3
+
+    def meta(row, i, default):
+        return meta_lines[row][i * 3 + 1] if len(meta_lines) > row and len(meta_lines[row]) > i * 3 + 1 else default
+
+    # Blank cells (below shorter graphs) and unparsable ones become NaN
+    chunks = []
+    for chunk in pd.read_csv(csv_path, skiprows=header_index + 1, header=None, skip_blank_lines=True,
+                             chunksize=CHUNK_ROWS):
+        if any(dtype == object for dtype in chunk.dtypes):
+            chunk = chunk.apply(pd.to_numeric, errors="coerce")
+        chunks.append(chunk.to_numpy(dtype=float))
+    data = np.concatenate(chunks) if chunks else np.empty((0, 3 * n_graphs))
+    if data.shape[1] < 3 * n_graphs:
+        data = np.pad(data, ((0, 0), (0, 3 * n_graphs - data.shape[1])), constant_values=np.nan)
+
+    graphs = []
+    for i in range(n_graphs):
+        values = data[:, 3 * i:3 * i + 3]
+        # Rows without a frequency are the padding below shorter graphs
+        values = values[~np.isnan(values[:, 0])]
+        graphs.append({
+            "legend": meta(3, i, f"Data{i + 1}"),
+            "material_info": meta(0, i, "-"),
+            "file_path": meta(1, i, csv_path),
+            "date": meta(2, i, "-"),
+            "f": values[:, 0],
+            "TL": values[:, 1],
+            "alpha": values[:, 2]
+        })
+    return graphs
+
+def write_graph_csv(csv_path, graphs):
+    # Inverse of read_graph_csv; graphs of different lengths leave blank cells below the shorter ones
+    graphs = list(graphs)
+    lengths = [len(g["f"]) for g in graphs]
+    max_len = max(lengths, default=0)
+    row_format = ",".join([VALUE_FORMAT] * (3 * len(graphs))) + "\r\n"
+
+    with open(csv_path, "w", newline="") as fcsv:
+        writer = csv.writer(fcsv)
+        for label, key in zip(META_LABELS, META_KEYS):
+            row = [label]
+            for g in graphs:
+                row.extend([g.get(key, "-"), "", ""])
+            writer.writerow(row)
+        writer.writerow([])
+        writer.writerow(COLUMNS * len(graphs))
+
+        # One (rows, 3 * n_graphs) block at a time, formatted by a single %-operation
+        for start in range(0, max_len, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, max_len)
+            block = np.full((stop - start, 3 * len(graphs)), np.nan)
+            for i, (g, n) in enumerate(zip(graphs, lengths)):
+                if n > start:
+                    end = min(n, stop)
+                    block[:end - start, 3 * i] = g["f"][start:end]
+                    block[:end - start, 3 * i + 1] = g["TL"][start:end]
+                    block[:end - start, 3 * i + 2] = g["alpha"][start:end]
+            text = (row_format * len(block)) % tuple(block.ravel().tolist())
+            fcsv.write(text.replace("nan", ""))
@@ -0,0 +1,139 @@
+import numpy as np
+
+from optimizer import interpolate_curve, target_grid
+from param_batch import check_parameters, run_batch, scale_unit, to_ui_units
+from pareto import latin_hypercube
+
+JCA_PARAMETERS = ("airflow_resistivity", "tortuosity", "viscous_cl", "thermal_cl", "porosity")
+# Default search box per JCA parameter: (min, max, log scaled)
+JCA_BOUNDS = {
+    "airflow_resistivity": (1e3, 1e6, True),
+    "tortuosity": (1.0, 4.0, False),
+    "viscous_cl": (1e-6, 1e-3, True),
+    "thermal_cl": (1e-6, 3e-3, True),
+    "porosity": (0.5, 1.0, False)
+}
+# Central-difference step in unit-cube coordinates
+JACOBIAN_STEP = 1e-5
+# Damping factors tried side by side in every Levenberg-Marquardt iteration
+DAMPING_FACTORS = np.array([0.1, 1.0, 10.0, 100.0])
+
+def jca_parameters(layer_data, layer=None, names=JCA_PARAMETERS):
+    # Fit parameters for the JCA properties of a poro-elastic layer (default: the first one)
+    if layer is None:
+        layer = next((i for i, l in enumerate(layer_data) if l["type"] == "Poro-elastic"), None)
+        if layer is None:
+            raise ValueError("[ERROR] The layup has no Poro-elastic layer to fit")
+    return [{"layer": layer, "name": name, "min": JCA_BOUNDS[name][0], "max": JCA_BOUNDS[name][1],
+             "log": JCA_BOUNDS[name][2]} for name in names]
+
+def values_to_unit(parameters, values):
+    # Inverse of param_batch.scale_unit for one point given in calculation units, clipped to the box
+    u = []
+    for p, value in zip(parameters, values):
+        lo, hi = float(p["min"]), float(p["max"])
+        value = float(to_ui_units(p["name"], value))
+        if p.get("log", False):
+            u.append(np.log(value / lo) / np.log(hi / lo))
+        else:
+            u.append((value - lo) / (hi - lo))
+    return np.clip(u, 0, 1)
+
+def fit_layer_parameters(layer_data, parameters, measured_f, measured_values, quantity="alpha", environment=None,
+                         weights=None, f=None, n_starts=64, max_iter=50, tol=1e-8, seed=None, progress=None):
+    # Least-squares identification of layer properties (e.g. the JCA set of jca_parameters) from a
+    # measured absorption / TL curve, through the full solver. A batched Latin hypercube picks the
+    # start, then Levenberg-Marquardt runs in the unit cube of `parameters`: the central-difference
+    # Jacobian (2d layups) and the trial steps for several damping factors are each one batched
+    # solver call. For impedance tube data pass environment={"backing": "rigid", "theta": 0}.
+    check_parameters(layer_data, parameters)
+    rng = np.random.default_rng(seed)
+    d = len(parameters)
+
+    f = target_grid(measured_f, f)
+    target = interpolate_curve(measured_f, measured_values, f)
+    sqrt_w = np.sqrt(np.ones_like(f) if weights is None else interpolate_curve(measured_f, weights, f))
+
+    evaluations = 0
+
+    def residuals(u):
+        nonlocal evaluations
+        evaluations += len(u)
+        _, TL, alpha, _, _ = run_batch(layer_data, scale_unit(parameters, u), environment, f)
+        return sqrt_w * ((TL if quantity == "TL" else alpha) - target)
+
+    def cost(r):
+        return 0.5 * np.sum(r ** 2, axis=-1)
+
+    # Starts: the layup's own values plus a Latin hypercube
+    current = values_to_unit(parameters, [layer_data[int(p["layer"])][p["name"]] for p in parameters])
+    starts = np.vstack([current, latin_hypercube(n_starts, d, rng)])
+    start_cost = cost(residuals(starts))
+    x = starts[np.nanargmin(start_cost)]
+    r = residuals(x[None])[0]
+    c = cost(r)
+    damping = 1e-2
+    history = [c]
+    JTJ = None
+
+    for iteration in range(max_iter):
+        # Jacobian from one batch of x + h e_i and x - h e_i (one-sided at the box faces)
+        up = np.minimum(x + JACOBIAN_STEP * np.eye(d), 1)
+        down = np.maximum(x - JACOBIAN_STEP * np.eye(d), 0)
+        r_step = residuals(np.vstack([up, down]))
+        J = ((r_step[:d] - r_step[d:]) / (np.diag(up) - np.diag(down))[:, None]).T
+
+        JTJ = J.T @ J
+        g = J.T @ r
+        scale = np.diag(JTJ) + 1e-12
+        trials = np.array([np.clip(x - np.linalg.solve(JTJ + damping * k * np.diag(scale), g), 0, 1)
+                           for k in DAMPING_FACTORS])
+        r_trial = residuals(trials)
+        c_trial = cost(r_trial)
+        best = np.nanargmin(c_trial)
+
+        if c_trial[best] < c:
+            step = np.max(np.abs(trials[best] - x))
+            improvement = (c - c_trial[best]) / max(c, 1e-300)
+            x, r, c = trials[best], r_trial[best], c_trial[best]
+            damping *= DAMPING_FACTORS[best] / 10
+        else:
+            step, improvement = 0.0, 0.0
+            damping *= DAMPING_FACTORS[-1] * 10
+        history.append(c)
+
+        if progress is not None:
+            progress(iteration + 1, max_iter)
+        if (0 < improvement < tol) or (improvement > 0 and step < 1e-10) or damping > 1e12:
+            break
+
+    samples = scale_unit(parameters, x[None])
+    _, TL, alpha, tc, rc = run_batch(layer_data, samples, environment, f)
+    values = [float(to_ui_units(p["name"], samples[(int(p["layer"]), p["name"])])[0]) for p in parameters]
+
+    # Linearised 1-sigma uncertainty of the identified values, from the last Jacobian
+    if JTJ is None:
+        du = np.full(d, np.nan)
+    else:
+        du = np.sqrt(np.abs(np.diag(np.linalg.pinv(JTJ))) * 2 * c / max(len(f) - d, 1))
+    std = []
+    for p, value, s in zip(parameters, values, du):
+        lo, hi = float(p["min"]), float(p["max"])
+        std.append(float(value * np.log(hi / lo) * s if p.get("log", False) else (hi - lo) * s))
+
+    return {
+        "parameters": parameters,
+        "values": values,
+        "std": std,
+        "rms": float(np.sqrt(2 * c / np.sum(sqrt_w ** 2))),
+        "at_bound": [bool(v <= 0 or v >= 1) for v in x],
+        "history": np.array(history),
+        "iterations": len(history) - 1,
+        "evaluations": evaluations,
+        "f": f,
+        "target": target,
+        "TL": TL[0],
+        "alpha": alpha[0],
+        "tc": tc[0],
+        "rc": rc[0]
+    }
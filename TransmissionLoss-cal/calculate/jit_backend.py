@@ -0,0 +1,175 @@
+import glob
+import importlib.util
+import os
+import threading
+import time
+
+import numpy as np
+
+# Optional numba backend. Nothing here imports numba: jit_kernels (which does) is loaded on first use,
+# so commands that never solve start as fast as without numba. The first compile takes ~30 s and is
+# cached on disk (njit(cache=True)); later processes load it in well under a second. The "auto"
+# solver never waits for a compile: until the kernels are cached it solves with NumPy. Only the UI
+# compiles in a background thread meanwhile (set_background_compile), library calls and the CLI do not.
+# `python -m calculate warm-up` compiles ahead, e.g. after installing numba.
+
+# Layer kind codes and parameter columns, as unpacked by jit_kernels
+KINDS = {"fluid": 0, "poro": 1, "plastic": 2, "stiff panel": 3}
+PARAMS = {
+    "poro": ("h", "porosity", "airflow_resistivity", "tortuosity", "viscous_cl", "thermal_cl", "density", "Kb", "N"),
+    "plastic": ("h", "density", "lam", "mu"),
+    "stiff panel": ("h", "ms", "Dp", "D")
+}
+MAX_PARAMS = 9
+MAX_STATE = 6  # largest bc_matrix block (poro)
+# Work (grid points x layers) a process solves with NumPy before "auto" loads cached kernels; loading
+# takes ~0.6 s, which the compiled path wins back after ~2e5 layer points on a single core
+LOAD_WORK = 200_000
+
+_kernels = None
+_failed = False
+_ready = False  # kernels compiled / loaded in this process
+_warming = None  # background warm_up thread
+_background = False  # auto may start a background compile (set_background_compile)
+_threads = None
+_numpy_work = 0
+_lock = threading.Lock()
+
+def available():
+    # numba is installed (looked up, not imported) and has not failed in this process
+    return not _failed and importlib.util.find_spec("numba") is not None
+
+def kernels():
+    # jit_kernels, imported on first use; None without a working numba
+    global _kernels, _failed
+    with _lock:
+        if _kernels is None and available():
+            try:
+                import jit_kernels
+                _kernels = jit_kernels
+                if _threads is not None:
+                    apply_threads(_threads)
+            except Exception as e:
+                _failed = True
+                print(f"[WARNING] numba backend unavailable, using NumPy: {type(e).__name__}: {e}")
+        return _kernels
+
+def usable(plan):
+    # Compiled path handles scalar layer parameters only; batched (array valued) layups use NumPy
+    return available() and plan.batch_shape == () and all(
+        np.ndim(v) == 0 for m in plan.materials if m is not None for v in m.values())
+
+def ready():
+    return _ready and not _failed
+
+def cached():
+    # The compiled kernels are in numba's on-disk cache (loading them takes well under a second)
+    cache_dir = os.environ.get("NUMBA_CACHE_DIR") or os.path.join(os.path.dirname(__file__), "__pycache__")
+    return bool(glob.glob(os.path.join(cache_dir, "**", "jit_kernels.solve_points-*.nbi"), recursive=True))
+
+def auto_solver(plan, n_points):
+    # "jit" when the kernels are ready, or cached and worth loading, else "condense" (and the kernels
+    # compile in the background when they are not cached yet and background compiling is on)
+    global _numpy_work
+    if not usable(plan):
+        return "condense"
+    work = n_points * len(plan.layers)
+    if not ready() and cached() and _numpy_work + work >= LOAD_WORK:
+        warm_up()
+    if ready():
+        return "jit"
+    if _background and not cached():
+        warm_up(background=True)
+    _numpy_work += work
+    return "condense"
+
+def set_background_compile(enabled):
+    # Opt-in for long-lived processes; elsewhere a ~30 s compile would only compete with the caller for the CPU
+    global _background
+    _background = enabled
+
+def set_threads(n):
+    # Threads per compiled solve, e.g. 1 in worker processes that already use every core. Applied when
+    # the kernels are loaded, numba is not imported for this
+    global _threads
+    _threads = n
+    if _kernels is not None:
+        apply_threads(n)
+
+def apply_threads(n):
+    import numba
+    numba.set_num_threads(max(1, min(n, numba.config.NUMBA_NUM_THREADS)))
+
+def pack_layup(plan):
+    # LayupPlan -> flat arrays for jit_kernels.solve_points
+    n_layers = len(plan.layers)
+    kinds = np.array([KINDS[k] for k in plan.layers], dtype=np.int64)
+    params = np.zeros((n_layers, MAX_PARAMS), dtype=np.complex128)
+    for j, (mat_type, m) in enumerate(zip(plan.layers, plan.materials)):
+        if m is not None:
+            params[j, :len(PARAMS[mat_type])] = [m[key] for key in PARAMS[mat_type]]
+
+    n_interfaces = len(plan.interfaces)
+    B_pos = np.zeros((n_interfaces, MAX_STATE, MAX_STATE), dtype=np.complex128)
+    B_neg = np.zeros((n_interfaces, MAX_STATE, MAX_STATE), dtype=np.complex128)
+    B_pos_dims = np.zeros((n_interfaces, 2), dtype=np.int64)
+    B_neg_dims = np.zeros((n_interfaces, 2), dtype=np.int64)
+    for i, (Bp, Bn) in enumerate(plan.interfaces):
+        B_pos_dims[i], B_neg_dims[i] = Bp.shape, Bn.shape
+        B_pos[i, :Bp.shape[0], :Bp.shape[1]] = Bp
+        B_neg[i, :Bn.shape[0], :Bn.shape[1]] = Bn
+
+    steps = [(j, action == "merge", k == 0) for seg in plan.steps for k, (j, action) in enumerate(seg)]
+    step_layer = np.array([s[0] for s in steps], dtype=np.int64)
+    step_merge = np.array([s[1] for s in steps], dtype=np.bool_)
+    step_first = np.array([s[2] for s in steps], dtype=np.bool_)
+    return kinds, params, B_pos, B_pos_dims, B_neg, B_neg_dims, step_layer, step_merge, step_first
+
+def solve(plan, w, theta_deg, air, backing="anechoic"):
+    # tc, rc as LayupPlan.solve, or None when the compiled path is not available (caller falls back)
+    global _failed
+    jk = kernels()
+    if jk is None:
+        return None
+    shape = np.broadcast_shapes(np.shape(w), np.shape(theta_deg))
+    # Writable copies: numba compiles read-only (broadcast) inputs as a separate signature
+    w_flat = np.array(np.broadcast_to(w, shape), dtype=float).ravel()
+    theta_flat = np.array(np.broadcast_to(np.radians(theta_deg), shape), dtype=float).ravel()
+    try:
+        tc, rc = jk.solve_points(w_flat, theta_flat, *pack_layup(plan), np.array([complex(a).real for a in air]),
+                                 float(plan.total_d), backing == "rigid")
+    except Exception as e:
+        # Compilation problems (unsupported numba / llvmlite versions) disable the backend for good
+        _failed = True
+        print(f"[WARNING] numba backend failed, using NumPy: {type(e).__name__}: {e}")
+        return None
+    return tc.reshape(shape), rc.reshape(shape)
+
+def warm_up(background=False):
+    # Compile (or load from the on-disk cache) before the first real solve. background=True starts a
+    # daemon thread once and returns it, e.g. at UI startup; otherwise returns the seconds it took
+    # (None without numba)
+    global _warming, _ready
+    if not available():
+        return None
+    if background:
+        with _lock:
+            if _warming is None:
+                _warming = threading.Thread(target=warm_up, daemon=True)
+                _warming.start()
+        return _warming
+
+    from layup_plan import air_state, compile_layup
+    start = time.perf_counter()
+    # Every layer kind, merge and pred steps
+    plan = compile_layup([
+        {"type": "Poro-elastic", "thickness": 0.02, "viscous_cl": 1e-4, "thermal_cl": 3e-4, "airflow_resistivity": 1e4,
+         "tortuosity": 1.0, "porosity": 0.98, "youngs_modulus": 1e5, "loss_factor": 0.1, "poissons_ratio": 0.3,
+         "density": 10.0},
+        {"type": "Viscoelastic", "thickness": 0.001, "youngs_modulus": 7e10, "loss_factor": 0.003,
+         "poissons_ratio": 0.33, "density": 2700.0},
+        {"type": "Unbonded", "thickness": 0.001},
+        {"type": "Linear Elastic", "thickness": 0.002, "youngs_modulus": 2e9, "poissons_ratio": 0.35,
+         "density": 1200.0}])
+    _ready = solve(plan, np.array([1000.0]), 30.0, air_state(101325, 20, 0.2)) is not None
+    return time.perf_counter() - start
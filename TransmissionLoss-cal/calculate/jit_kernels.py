@@ -0,0 +1,245 @@
+import cmath
+import math
+
+import numpy as np
+from numba import njit, prange
+
+# Compiled per-point versions of jca_rigid, tm_poro / tm_solid / tm_panel, merge_layer, one_layer_pred
+# and terminate, imported only through jit_backend (numba is optional). Layer kinds and parameter
+# columns are packed by jit_backend.pack_layup. error_model="numpy": singular systems give inf / nan
+# like the NumPy path instead of raising.
+FLUID, PORO, PLASTIC, PANEL = 0, 1, 2, 3
+EPS = np.finfo(np.float64).eps
+
+@njit(cache=True, error_model="numpy")
+def matmul(A, B):
+    out = np.zeros((A.shape[0], B.shape[1]), dtype=np.complex128)
+    for i in range(A.shape[0]):
+        for k in range(A.shape[1]):
+            a = A[i, k]
+            if a != 0:
+                for j in range(B.shape[1]):
+                    out[i, j] += a * B[k, j]
+    return out
+
+@njit(cache=True, error_model="numpy")
+def equilibrate(M):
+    # Scale every row to a largest entry of 1 (stress rows ~E, velocity rows ~w*k)
+    for i in range(M.shape[0]):
+        scale = 0.0
+        for j in range(M.shape[1]):
+            scale = max(scale, abs(M[i, j]))
+        if scale > 0:
+            for j in range(M.shape[1]):
+                M[i, j] /= scale
+
+@njit(cache=True, error_model="numpy")
+def eliminate(M, c_start, c_end):
+    # Gaussian elimination with partial pivoting over all rows on columns c_start:c_end of M, in place.
+    # Pivot k ends up in row k - c_start; the rows below the last pivot are zero in those columns.
+    for k in range(c_start, c_end):
+        r = k - c_start
+        p = r
+        for i in range(r + 1, M.shape[0]):
+            if abs(M[i, k]) > abs(M[p, k]):
+                p = i
+        if p != r:
+            for j in range(M.shape[1]):
+                M[r, j], M[p, j] = M[p, j], M[r, j]
+        pivot = M[r, k]
+        if pivot == 0:
+            continue
+        for i in range(r + 1, M.shape[0]):
+            factor = M[i, k] / pivot
+            if factor != 0:
+                # Pivot row is already zero on c_start:k, the columns left of c_start still count
+                for j in range(c_start):
+                    M[i, j] -= factor * M[r, j]
+                for j in range(k, M.shape[1]):
+                    M[i, j] -= factor * M[r, j]
+
+@njit(cache=True, error_model="numpy")
+def jca_rigid(w, sigma, phi, a1, VCL, TCL, rho0, eta, Pr, gamma, P0):
+    M = sigma * phi / (1j * w * a1 * rho0)
+    N = cmath.sqrt(1 + 4j * eta * rho0 * w * a1**2 / (sigma**2 * VCL**2 * phi**2))
+    rhoeq = rho0 * a1 / phi * (1 + M * N)
+
+    Q = 8j * eta / (TCL**2 * Pr * rho0 * w)
+    S = cmath.sqrt(1 + 1j * TCL**2 * Pr * rho0 * w / (16 * eta))
+    U = (gamma - 1) / (1 - Q * S)
+    Keq = gamma * P0 / phi / (gamma - U)
+    return rhoeq, Keq
+
+@njit(cache=True, error_model="numpy")
+def poro_matrices(p, w, kt, rho0, c0, gamma, eta, Pr, P0):
+    d, phi = p[0].real, p[1].real
+    rhoeq, Kf = jca_rigid(w, p[2].real, phi, p[3].real, p[4].real, p[5].real, rho0, eta, Pr, gamma, P0)
+    rho22 = phi ** 2 * rhoeq
+    rho12 = phi * rho0 - rho22
+    rho11 = p[6].real - rho12
+    Kb, N = p[7], p[8]
+
+    P = 4 / 3 * N + Kb + Kf * (1 - phi) ** 2
+    Q = Kf * phi * (1 - phi)
+    R = Kf * phi ** 2
+    delta = (P * rho22 + R * rho11 - 2 * Q * rho12) ** 2 - 4 * (P * R - Q ** 2) * (rho11 * rho22 - rho12 ** 2)
+    k1 = cmath.sqrt((w ** 2 * (P * rho22 + R * rho11 - 2 * Q * rho12 - cmath.sqrt(delta))) / (2 * (P * R - Q ** 2)))
+    k2 = cmath.sqrt((w ** 2 * (P * rho22 + R * rho11 - 2 * Q * rho12 + cmath.sqrt(delta))) / (2 * (P * R - Q ** 2)))
+    k3 = cmath.sqrt(w ** 2 * (rho11 * rho22 - rho12 ** 2) / (N * rho22))
+    k13 = cmath.sqrt(k1 ** 2 - kt ** 2)
+    k23 = cmath.sqrt(k2 ** 2 - kt ** 2)
+    k33 = cmath.sqrt(k3 ** 2 - kt ** 2)
+
+    mu1 = (P * k1 ** 2 - w ** 2 * rho11) / (w ** 2 * rho12 - Q * k1 ** 2)
+    mu2 = (P * k2 ** 2 - w ** 2 * rho11) / (w ** 2 * rho12 - Q * k2 ** 2)
+    mu3 = -rho12 / rho22
+    D1 = (P + Q * mu1) * k1 ** 2 - 2 * N * kt ** 2
+    D2 = (P + Q * mu2) * k2 ** 2 - 2 * N * kt ** 2
+    E1 = (R * mu1 + Q) * k1 ** 2
+    E2 = (R * mu2 + Q) * k2 ** 2
+
+    Phi = np.zeros((6, 6), dtype=np.complex128)
+    Phi[0, 0], Phi[0, 1], Phi[0, 2], Phi[0, 3], Phi[0, 4], Phi[0, 5] = w*kt, w*kt, w*kt, w*kt, -w*k33, w*k33
+    Phi[1, 0], Phi[1, 1], Phi[1, 2], Phi[1, 3], Phi[1, 4], Phi[1, 5] = w*k13, -w*k13, w*k23, -w*k23, w*kt, w*kt
+    Phi[2, 0], Phi[2, 1], Phi[2, 2] = w*k13*mu1, -w*k13*mu1, w*k23*mu2
+    Phi[2, 3], Phi[2, 4], Phi[2, 5] = -w*k23*mu2, w*kt*mu3, w*kt*mu3
+    Phi[3, 0], Phi[3, 1], Phi[3, 2], Phi[3, 3] = -D1, -D1, -D2, -D2
+    Phi[3, 4], Phi[3, 5] = -2*N*k33*kt, 2*N*k33*kt
+    Phi[4, 0], Phi[4, 1], Phi[4, 2], Phi[4, 3] = -2*N*kt*k13, 2*N*kt*k13, -2*N*kt*k23, 2*N*kt*k23
+    Phi[4, 4], Phi[4, 5] = N*(k33**2 - kt**2), N*(k33**2 - kt**2)
+    Phi[5, 0], Phi[5, 1], Phi[5, 2], Phi[5, 3] = -E1, -E1, -E2, -E2
+
+    Lambda = np.zeros((6, 6), dtype=np.complex128)
+    Lambda[0, 0], Lambda[1, 1] = cmath.exp(-1j * k13 * -d), cmath.exp(1j * k13 * -d)
+    Lambda[2, 2], Lambda[3, 3] = cmath.exp(-1j * k23 * -d), cmath.exp(1j * k23 * -d)
+    Lambda[4, 4], Lambda[5, 5] = cmath.exp(-1j * k33 * -d), cmath.exp(1j * k33 * -d)
+    return Phi, Lambda
+
+@njit(cache=True, error_model="numpy")
+def solid_matrices(p, w, kt):
+    d, rho, lam, mu = p[0].real, p[1].real, p[2].real, p[3].real
+    k1 = w * math.sqrt(rho / (lam + 2 * mu))
+    k3 = w * math.sqrt(rho / mu)
+    # Evanescent above the critical angle, as in tm_solid
+    a1, a3 = k1 ** 2 - kt ** 2, k3 ** 2 - kt ** 2
+    k13 = cmath.sqrt(complex(EPS if a1 == 0 else a1))
+    k33 = cmath.sqrt(complex(EPS if a3 == 0 else a3))
+    D1 = lam * (k13 ** 2 + kt ** 2) + 2 * mu * k13 ** 2
+    D2 = 2 * mu * kt
+
+    Phi = np.zeros((4, 4), dtype=np.complex128)
+    Phi[0, 0], Phi[1, 0], Phi[2, 0], Phi[3, 0] = w * kt, w * k13, -D1, -D2 * k13
+    Phi[0, 1], Phi[1, 1], Phi[2, 1], Phi[3, 1] = w * kt, -w * k13, -D1, D2 * k13
+    Phi[0, 2], Phi[1, 2], Phi[2, 2], Phi[3, 2] = -w * k33, w * kt, -D2 * k33, D1
+    Phi[0, 3], Phi[1, 3], Phi[2, 3], Phi[3, 3] = w * k33, w * kt, D2 * k33, D1
+
+    Lambda = np.zeros((4, 4), dtype=np.complex128)
+    Lambda[0, 0], Lambda[1, 1] = cmath.exp(-1j * k13 * -d), cmath.exp(1j * k13 * -d)
+    Lambda[2, 2], Lambda[3, 3] = cmath.exp(-1j * k33 * -d), cmath.exp(1j * k33 * -d)
+    return Phi, Lambda
+
+@njit(cache=True, error_model="numpy")
+def panel_matrices(p, w, kt):
+    hp, ms, Dp, D = p[0].real, p[1].real, p[2].real, p[3].real
+    k = kt
+    C1 = Dp * k**2 - ms * w**2
+    C2 = D * k**4 - ms * w**2
+
+    # Phi = I, Lambda = the panel transfer matrix itself (see tm_panel)
+    T = np.zeros((4, 4), dtype=np.complex128)
+    T[0, 0], T[0, 1] = 1, -1j * k * hp
+    T[1, 1] = 1
+    T[2, 0], T[2, 1] = k * hp / (2 * w) * C1, (1 / (1j * w)) * (k**2 * hp**2 / 4 * C1 + C2)
+    T[2, 2], T[2, 3] = 1, 1j * k * hp
+    T[3, 0], T[3, 1], T[3, 3] = C1 / (1j * w), -k * hp / (2 * w) * C1, 1
+    return np.eye(4, dtype=np.complex128), T
+
+@njit(cache=True, error_model="numpy")
+def layer_matrices(kind, p, w, kt, rho0, c0, gamma, eta, Pr, P0):
+    if kind == PORO:
+        return poro_matrices(p, w, kt, rho0, c0, gamma, eta, Pr, P0)
+    elif kind == PLASTIC:
+        return solid_matrices(p, w, kt)
+    return panel_matrices(p, w, kt)
+
+@njit(cache=True, error_model="numpy")
+def merge_layer(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda):
+    # Condensed (B1_pos*, B2_neg*) as merge_layer, by eliminating the layer columns with row pivoting
+    N = Phi.shape[0]
+    row_st, col_st = B1_pos.shape
+    col_ed = col_st + N
+    A = np.zeros((row_st + B2_neg.shape[0], col_ed + B2_neg.shape[1]), dtype=np.complex128)
+    A[:row_st, :col_st] = B1_pos
+    A[:row_st, col_st:col_ed] = -matmul(B1_neg, matmul(Phi, Lambda))
+    A[row_st:, col_st:col_ed] = matmul(B2_pos, Phi)
+    A[row_st:, col_ed:] = -B2_neg
+    equilibrate(A)
+    eliminate(A, col_st, col_ed)
+    return A[N:, :col_st].copy(), -A[N:, col_ed:]
+
+@njit(cache=True, error_model="numpy")
+def one_layer_pred(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda):
+    # 2x2 transfer matrix of a fluid-bounded segment, as one_layer_pred_batch
+    N = B1_pos.shape[1] + B1_neg.shape[1]
+    B1_h = B1_pos.shape[0]
+    n_out = B2_neg.shape[1]
+    M = np.zeros((N, N + n_out), dtype=np.complex128)
+    M[:B1_h, :2] = B1_pos
+    M[:B1_h, 2:N] = -matmul(B1_neg, matmul(Phi, Lambda))
+    M[B1_h:, 2:N] = matmul(B2_pos, Phi)
+    M[N - B2_neg.shape[0]:, N:] = B2_neg
+    equilibrate(M)
+    eliminate(M, 0, N)
+
+    # Back substitution, only the two fluid unknowns are kept
+    X = np.zeros((N, n_out), dtype=np.complex128)
+    for k in range(N - 1, -1, -1):
+        for j in range(n_out):
+            s = M[k, N + j]
+            for m in range(k + 1, N):
+                s -= M[k, m] * X[m, j]
+            X[k, j] = s / M[k, k]
+    return X[:2, :]
+
+@njit(cache=True, error_model="numpy")
+def terminate(TM, w, theta, total_d, z0, c0, rigid):
+    cos = math.cos(theta)
+    if rigid:
+        denom = TM[0, 0] + TM[1, 0] * z0 / cos
+        numer = TM[0, 0] - TM[1, 0] * z0 / cos
+    else:
+        denom = TM[0, 0] + TM[0, 1] * cos / z0 + TM[1, 0] * z0 / cos + TM[1, 1]
+        numer = TM[0, 0] + TM[0, 1] * cos / z0 - TM[1, 0] * z0 / cos - TM[1, 1]
+    if abs(denom) < 1e-12:
+        return 0j, 0j
+    tc = 0j if rigid else 2 * cmath.exp(1j * w * total_d * cos / c0) / denom
+    return tc, numer / denom
+
+@njit(parallel=True, cache=True, error_model="numpy")
+def solve_points(w, theta, kinds, params, B_pos, B_pos_dims, B_neg, B_neg_dims, step_layer, step_merge,
+                 step_first, air, total_d, rigid):
+    # tc, rc per grid point (w, theta [rad] flat and of equal length); every point runs the whole
+    # layup (layer matrices, condensation, termination) in one compiled loop, in parallel
+    rho0, c0, gamma, eta, Pr, P0 = air[0], air[1], air[2], air[3], air[4], air[5]
+    tc = np.zeros(w.shape[0], dtype=np.complex128)
+    rc = np.zeros(w.shape[0], dtype=np.complex128)
+    for i in prange(w.shape[0]):
+        kt = w[i] / c0 * math.sin(theta[i])
+        TM = np.eye(2, dtype=np.complex128)
+        B1_pos = np.zeros((1, 1), dtype=np.complex128)
+        B1_neg = np.zeros((1, 1), dtype=np.complex128)
+        for s in range(step_layer.shape[0]):
+            j = step_layer[s]
+            Phi, Lambda = layer_matrices(kinds[j], params[j], w[i], kt, rho0, c0, gamma, eta, Pr, P0)
+            if step_first[s]:
+                B1_pos = B_pos[j, :B_pos_dims[j, 0], :B_pos_dims[j, 1]].copy()
+                B1_neg = B_neg[j, :B_neg_dims[j, 0], :B_neg_dims[j, 1]].copy()
+            # Contiguous copies: one compiled layout variant of every helper (shorter first compile)
+            B2_pos = B_pos[j + 1, :B_pos_dims[j + 1, 0], :B_pos_dims[j + 1, 1]].copy()
+            B2_neg = B_neg[j + 1, :B_neg_dims[j + 1, 0], :B_neg_dims[j + 1, 1]].copy()
+            if step_merge[s]:
+                B1_pos, B1_neg = merge_layer(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda)
+            else:
+                TM = matmul(TM, one_layer_pred(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda))
+        tc[i], rc[i] = terminate(TM, w[i], theta[i], total_d, rho0 * c0, c0, rigid)
+    return tc, rc
@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Default memory budget for cached (Phi, Lambda) stacks
+DEFAULT_BUDGET_BYTES = 512 * 1024 ** 2
+
+def array_key(a):
+    # Content hash of an array (frequency grid, angles), shape and dtype included
+    a = np.ascontiguousarray(a)
+    return a.shape, a.dtype.str, hashlib.blake2b(a.tobytes(), digest_size=16).hexdigest()
+
+def material_key(mat_type, m):
+    # Layer type plus a hash of every parameter (thickness "h" included)
+    digest = hashlib.blake2b(digest_size=16)
+    for k in sorted(m):
+        digest.update(repr((k, np.shape(m[k]))).encode())
+        if isinstance(m[k], np.ndarray):
+            digest.update(np.ascontiguousarray(m[k]).tobytes())
+        else:
+            digest.update(repr(m[k]).encode())
+    return mat_type, digest.hexdigest()
+
+class LayerMatrixCache:  # LRU cache of per-layer (Phi, Lambda) stacks with a memory budget
+    def __init__(self, max_bytes=DEFAULT_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        # value: tuple of arrays, stored read-only and returned
+        for a in value:
+            a.setflags(write=False)
+        size = sum(a.nbytes for a in value)
+        if size > self.max_bytes:
+            return value
+
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= sum(a.nbytes for a in self.entries.pop(key))
+            self.entries[key] = value
+            self.nbytes += size
+            self._evict()
+        return value
+
+    def set_budget(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self.entries:
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= sum(a.nbytes for a in old)
+
+# Shared by every LayupPlan in the process
+layer_cache = LayerMatrixCache()
@@ -0,0 +1,348 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+
+import jit_backend
+from air_properties import air_properties
+from bc_matrix import bc_matrix
+from global_matrix import layer_faces, solve_global
+from jca_rigid import jca_rigid
+from layer_cache import array_key, layer_cache, material_key
+from merge_layer import merge_layer_batch
+from one_layer_pred import one_layer_pred_batch
+from profiling import count, timed
+from tm_panel import tm_panel
+from tm_poro import biot_moduli, tm_poro_biot
+from tm_solid import lame_constants, tm_solid_lame
+
+# Upper bound on grid points (frequency x angle) solved in one batch, keeps peak memory bounded
+CHUNK_POINTS = 20000
+# Smaller batches when a progress callback is attached, so the UI sees regular updates
+PROGRESS_CHUNK_POINTS = 1000
+
+# Termination behind the last layer: an air half-space (transmission) or a rigid wall (impedance tube)
+BACKINGS = ("anechoic", "rigid")
+# "condense": layer by layer with merge_layer / one_layer_pred, "global": one block-banded system per
+# grid point (global_matrix), robust for thick layers and tall stacks, "jit": condense compiled with
+# numba (jit_backend, waits for the first compile), "auto": "jit" when its kernels are compiled and worth
+# loading (jit_backend.auto_solver), else "condense"
+SOLVERS = ("auto", "condense", "global", "jit")
+
+class CalculationCancelled(Exception):
+    # Raised from a progress callback to abandon a running calculation
+    pass
+
+def default_frequencies():
+    return np.logspace(np.log10(100), np.log10(10000), 5000)
+
+def frequency_chunks(n_freq, points_per_freq=1, max_points=CHUNK_POINTS):
+    # Slices over the frequency axis that keep each batch at about max_points grid points
+    step = max(1, max_points // max(1, points_per_freq))
+    return [slice(i, min(i + step, n_freq)) for i in range(0, n_freq, step)]
+
+def air_state(P0, T, RH):
+    rho0, c0, gamma, eta, Pr, *_ = air_properties(P0, T, RH)
+    return rho0, c0, gamma, eta, Pr, P0
+
+def map_type(elastic_type):
+    if elastic_type == "Poro-elastic":
+        return "poro"
+    elif elastic_type == "Viscoelastic":
+        return "stiff panel"
+    elif elastic_type == "Linear Elastic":
+        return "plastic"
+    elif elastic_type in ["Unboned", "Unbonded"]:
+        return "fluid"
+
+def build_layup(layer_data):
+    layers = [map_type(layer["type"]) for layer in layer_data]
+    material_map = {}
+    for i, layer in enumerate(layer_data):
+        mat_type = layers[i]
+        if mat_type != "fluid":
+            data = layer.copy()
+            data["h"] = data.pop("thickness")
+            material_map[mat_type + f"_{i}"] = data
+    return layers, material_map
+
+def interface_matrices(mat1, mat2, phi, phi2=None):
+    # bc_matrix for scalar porosities, or stacked per value pair for a batch of porosities
+    if np.ndim(phi) > 0 or np.ndim(phi2) > 0:
+        pairs = np.stack(np.broadcast_arrays(np.asarray(phi), np.asarray(phi if phi2 is None else phi2)), axis=-1)
+        shape = pairs.shape[:-1]
+        unique, inverse = np.unique(pairs.reshape(-1, 2), axis=0, return_inverse=True)
+        matrices = [interface_matrices(mat1, mat2, a, None if phi2 is None else b) for a, b in unique]
+        inverse = inverse.reshape(-1)
+        B_pos = np.stack([np.asarray(B[0]) for B in matrices])[inverse]
+        B_neg = np.stack([np.asarray(B[1]) for B in matrices])[inverse]
+        return (B_pos.reshape(shape + B_pos.shape[1:]),
+                B_neg.reshape(shape + B_neg.shape[1:]))
+    try:
+        return bc_matrix(mat1, mat2, phi, phi2)
+    except:
+        return bc_matrix(mat1, mat2)
+
+def build_interfaces(layers, material_map):
+    BC = np.empty((len(layers) + 1, 2), dtype=object)
+    bc_types = []
+
+    for i in range(len(layers) + 1):
+        mat1 = layers[i - 1] if i > 0 else "fluid"
+        mat2 = layers[i] if i < len(layers) else "fluid"
+        upper = material_map.get(mat1 + f"_{i-1}", {})
+        lower = material_map.get(mat2 + f"_{i}", {})
+        # Porosity of the poro side of the interface; poro|poro needs both (phi above, phi2 below)
+        if mat1 == "poro":
+            phi = upper.get("porosity", 0.99)
+            phi2 = lower.get("porosity", 0.99) if mat2 == "poro" else None
+        else:
+            phi = lower.get("porosity", 0.99)
+            phi2 = None
+
+        bc_types.append((mat1, mat2))
+        BC[i, 0], BC[i, 1] = timed("bc_matrix", f"{mat1}|{mat2}", interface_matrices, mat1, mat2, phi, phi2)
+
+    return BC, bc_types
+
+def build_segments(bc_types):
+    # Split the interface indices into fluid-bounded segments
+    segments = []
+    current_segment = []
+    for i in range(len(bc_types) - 1):
+        current_segment.append(i)
+        _, mat2 = bc_types[i]
+        if mat2 == "fluid":
+            segments.append(current_segment)
+            current_segment = []
+    if current_segment:
+        segments.append(current_segment)
+    return segments
+
+def material_constants(mat_type, mat):
+    # Everything about a layer that does not depend on frequency, angle or air state
+    consts = dict(mat)
+    if mat_type == 'poro':
+        complex_E = mat["youngs_modulus"] * (1 + 1j * mat.get("loss_factor", 0))
+        consts["Kb"], consts["N"] = biot_moduli(complex_E, mat["poissons_ratio"])
+    elif mat_type == 'plastic':
+        consts["lam"], consts["mu"] = lame_constants(mat["youngs_modulus"], mat["poissons_ratio"])
+    elif mat_type == 'stiff panel':
+        consts["ms"] = mat["density"] * mat["h"]
+        consts["Dp"] = mat["youngs_modulus"] * mat["h"]
+        consts["D"] = mat["youngs_modulus"] * mat["h"] ** 3 / (12 * (1 - mat["poissons_ratio"] ** 2))
+    else:
+        raise ValueError(f"[ERROR] Unsupported material type: {mat_type}")
+    return MappingProxyType(consts)
+
+def _frozen(array):
+    array = np.array(array)
+    array.setflags(write=False)
+    return array
+
+def terminate(TM_total, w, theta, total_d, air, backing="anechoic"):
+    # tc, rc from the overall 2x2 transfer matrix, with air (anechoic) or a rigid wall behind it
+    rho0, c0 = air[0], air[1]
+    z0 = rho0 * c0
+    if backing == "rigid":
+        # Zero normal velocity behind the last layer, nothing is transmitted
+        denom = TM_total[..., 0, 0] + TM_total[..., 1, 0] * z0 / np.cos(theta)
+        numer = TM_total[..., 0, 0] - TM_total[..., 1, 0] * z0 / np.cos(theta)
+    else:
+        denom = (TM_total[..., 0, 0] + TM_total[..., 0, 1] * np.cos(theta) / z0
+                 + TM_total[..., 1, 0] * z0 / np.cos(theta) + TM_total[..., 1, 1])
+        numer = (TM_total[..., 0, 0] + TM_total[..., 0, 1] * np.cos(theta) / z0
+                 - TM_total[..., 1, 0] * z0 / np.cos(theta) - TM_total[..., 1, 1])
+
+    valid = np.abs(denom) >= 1e-12
+    denom = np.where(valid, denom, 1)
+    if backing == "rigid":
+        tc = np.zeros(np.shape(denom), dtype=np.complex128)
+    else:
+        tc = np.where(valid, 2 * np.exp(1j * w * total_d * np.cos(theta) / c0) / denom, 0)
+    rc = np.where(valid, numer / denom, 0)
+
+    return tc, rc
+
+@dataclass(frozen=True)
+class LayupPlan:
+    layers: tuple        # mapped layer kinds ('poro', 'plastic', 'stiff panel', 'fluid')
+    bc_types: tuple      # (upper, lower) kind per interface
+    interfaces: tuple    # (B_pos, B_neg) per interface, read-only arrays
+    materials: tuple     # per layer constants (read-only mapping), None for fluid layers
+    steps: tuple         # per fluid-bounded segment: ((layer index, "merge" | "pred"), ...)
+    total_d: float
+    batch_shape: tuple = ()  # leading shape of batched (array-valued) layer parameters, e.g. (N, 1)
+
+    def layer_matrices(self, j, w, theta_deg, air):
+        # Cached per layer on (type, parameters, frequencies, angles, air), so a layup where only
+        # one layer changed recomputes only that layer. Batched layers are never cached.
+        if any(np.ndim(v) > 0 for v in self.materials[j].values()):
+            return self.compute_layer_matrices(j, w, theta_deg, air)
+        key = (material_key(self.layers[j], self.materials[j]), array_key(w), array_key(theta_deg),
+               tuple(complex(a) for a in air))
+        cached = layer_cache.get(key)
+        if cached is not None:
+            count("layer_cache", f"{self.layers[j]} hit")
+            return cached
+        count("layer_cache", f"{self.layers[j]} miss")
+        return layer_cache.put(key, self.compute_layer_matrices(j, w, theta_deg, air))
+
+    def compute_layer_matrices(self, j, w, theta_deg, air):
+        rho0, c0, gamma, eta, Pr, P0 = air
+        mat_type = self.layers[j]
+        m = self.materials[j]
+        if mat_type == 'poro':
+            rhoeq, Keq = timed("jca_rigid", mat_type, jca_rigid, w, m["airflow_resistivity"], m["porosity"],
+                               m["tortuosity"], m["viscous_cl"], m["thermal_cl"], rho0, eta, Pr, gamma, P0)
+            rho22 = m["porosity"] ** 2 * rhoeq
+            rho12 = m["porosity"] * rho0 - rho22
+            rho11 = m["density"] - rho12
+            return timed("tm_poro", mat_type, tm_poro_biot, w, m["h"], m["porosity"], m["Kb"], m["N"], Keq,
+                         np.radians(theta_deg), c0, rho11, rho12, rho22, layout="Fnn")
+        elif mat_type == 'plastic':
+            return timed("tm_solid", mat_type, tm_solid_lame, w, m["h"], m["density"], m["lam"], m["mu"],
+                         theta_deg, c0, layout="Fnn")
+        else:
+            return timed("tm_panel", mat_type, tm_panel, w, c0, m["h"], m["ms"], m["Dp"], m["D"], theta_deg,
+                         layout="Fnn")
+
+    def solve(self, w, theta_deg, air, backing="anechoic"):
+        # w and theta_deg broadcast against each other (e.g. (F,) with (A, 1)); every step
+        # works on stacks of matrices with those leading axes
+        theta = np.radians(theta_deg)
+        shape = np.broadcast_shapes(np.shape(w), np.shape(theta))
+        TM_total = np.broadcast_to(np.eye(2, dtype=np.complex128), shape + (2, 2))
+
+        for seg in self.steps:
+            BC_working = list(self.interfaces)
+            for j, action in seg:
+                Phi, Lambda = self.layer_matrices(j, w, theta_deg, air)
+                (B1_pos, B1_neg), (B2_pos, B2_neg) = BC_working[j], BC_working[j + 1]
+                interface = "|".join(self.bc_types[j + 1])
+                if action == "merge":
+                    BC_working[j + 1] = timed("merge_layer", interface, merge_layer_batch,
+                                              B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda)
+                else:
+                    TM_total = TM_total @ timed("one_layer_pred", interface, one_layer_pred_batch,
+                                                B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda)
+
+        return timed("termination", backing, terminate, TM_total, w, theta, self.total_d, air, backing)
+
+    def solve_global(self, w, theta_deg, air, backing="anechoic"):
+        # Same result as solve, from the whole layup assembled into one system per grid point with the
+        # incident and transmitted waves as unknowns, so no transfer matrix (which grows like the
+        # evanescent waves of thick layers) is ever formed
+        rho0, c0 = air[0], air[1]
+        z0 = rho0 * c0
+        theta = np.radians(theta_deg)
+        cos = np.cos(theta)
+        batch = np.broadcast_shapes(np.shape(w), np.shape(theta), self.batch_shape)
+        identity = np.eye(2, dtype=np.complex128)
+
+        # Incident fluid state (p, v) = (1 + R, (1 - R) cos / z0): p + v z0 / cos = 2
+        excitation = (np.stack([np.ones(np.shape(cos)), z0 / cos], axis=-1)[..., None, :],
+                      np.full(np.shape(cos) + (1, 1), 2.0))
+        faces = [(None, identity)]
+        # Repeated layers share one cached (Phi, Lambda) tuple, and so their faces
+        shared = {}
+        # Very thick layers overflow single Lambda entries, layer_faces maps those to exact zeros
+        with np.errstate(over="ignore", invalid="ignore"):
+            for j, mat_type in enumerate(self.layers):
+                if mat_type == "fluid":
+                    faces.append((identity, identity))
+                    continue
+                matrices = self.layer_matrices(j, w, theta_deg, air)
+                if id(matrices) not in shared:
+                    shared[id(matrices)] = (matrices, timed("layer_faces", mat_type, layer_faces, *matrices,
+                                                            mat_type != "stiff panel"))
+                faces.append(shared[id(matrices)][1])
+        # Transmitted state T (1, cos / z0), or (p, 0) against a rigid wall
+        behind = cos / z0 if backing == "anechoic" else np.zeros(np.shape(cos))
+        faces.append((np.stack([np.ones(np.shape(cos)), behind], axis=-1)[..., :, None], None))
+
+        solution = timed("global_solve", f"{len(self.layers)} layers", solve_global, faces, self.interfaces,
+                         excitation, batch)
+        rc = solution[0][..., 0, 0] - 1
+        if backing == "rigid":
+            tc = np.zeros(np.shape(rc), dtype=np.complex128)
+        else:
+            tc = solution[-1][..., 0, 0] * np.exp(1j * w * self.total_d * cos / c0)
+        return tc, rc
+
+    def solve_jit(self, w, theta_deg, air, backing="anechoic"):
+        # Same result as solve from jit_backend's compiled kernels, solve itself without numba
+        result = timed("jit_solve", backing, jit_backend.solve, self, w, theta_deg, air, backing)
+        return self.solve(w, theta_deg, air, backing) if result is None else result
+
+    def run(self, f=None, theta_deg=0, P0=101325, T=20, RH=0.2, progress=None, backing="anechoic",
+            solver="auto"):
+        # theta_deg may be a scalar or an array broadcasting against f (e.g. angles[:, None]);
+        # the frequency axis is always the last one and is solved in chunks.
+        # progress(done, total) is called after every chunk and may raise CalculationCancelled.
+        # With a rigid backing tc is 0 and TL infinite
+        if backing not in BACKINGS:
+            raise ValueError(f"[ERROR] Unsupported backing: {backing}")
+        if solver not in SOLVERS:
+            raise ValueError(f"[ERROR] Unsupported solver: {solver}")
+        f = default_frequencies() if f is None else np.asarray(f, dtype=float)
+        w = 2 * np.pi * f
+        theta_deg = np.asarray(theta_deg, dtype=float)
+        air = air_state(P0, T, RH)
+
+        shape = np.broadcast_shapes(theta_deg.shape, w.shape, self.batch_shape)
+        if solver == "auto":
+            solver = jit_backend.auto_solver(self, int(np.prod(shape)))
+        elif solver == "jit" and not jit_backend.usable(self):
+            solver = "condense"
+        solve = {"condense": self.solve, "global": self.solve_global, "jit": self.solve_jit}[solver]
+        per_theta = theta_deg.ndim > 0 and theta_deg.shape[-1] == len(w) and len(w) > 1
+        tc = np.zeros(shape, dtype=np.complex128)
+        rc = np.zeros(shape, dtype=np.complex128)
+        max_points = CHUNK_POINTS if progress is None else PROGRESS_CHUNK_POINTS
+        for sl in frequency_chunks(len(w), int(np.prod(shape[:-1])), max_points):
+            theta_chunk = theta_deg[..., sl] if per_theta else theta_deg
+            tc[..., sl], rc[..., sl] = solve(w[sl], theta_chunk, air, backing)
+            if progress is not None:
+                progress(sl.stop, len(w))
+
+        with np.errstate(divide="ignore"):
+            TL = 20 * np.log10(1 / np.abs(tc))
+        alpha = 1 - np.abs(rc)**2
+
+        return f, TL, alpha, tc, rc
+
+def compile_layup(layer_data):
+    # Turn UI/JSON layer data into an immutable plan holding all frequency-independent work
+    layers, material_map = build_layup(layer_data)
+    BC, bc_types = build_interfaces(layers, material_map)
+
+    materials = tuple(
+        timed("material_constants", mat_type, material_constants, mat_type, material_map[mat_type + f"_{j}"])
+        if mat_type != "fluid" else None
+        for j, mat_type in enumerate(layers))
+
+    steps = []
+    for seg in build_segments(bc_types):
+        seg_steps = []
+        for j in seg:
+            if bc_types[j + 1][0] == 'fluid':
+                continue
+            mat1_next, mat2_next = bc_types[j + 1]
+            seg_steps.append((j, "merge" if mat1_next != "fluid" and mat2_next != "fluid" else "pred"))
+        steps.append(tuple(seg_steps))
+
+    total_d = sum(m["h"] for k, m in material_map.items() if not k.startswith("fluid"))
+
+    batch_shape = np.broadcast_shapes(
+        *(np.shape(v) for m in materials if m is not None for v in m.values() if not isinstance(v, str)),
+        *(np.shape(B)[:-2] for B in BC.ravel()))
+
+    return LayupPlan(
+        layers=tuple(layers),
+        bc_types=tuple(bc_types),
+        interfaces=tuple((_frozen(BC[i, 0]), _frozen(BC[i, 1])) for i in range(len(bc_types))),
+        materials=materials,
+        steps=tuple(steps),
+        total_d=total_d,
+        batch_shape=batch_shape)
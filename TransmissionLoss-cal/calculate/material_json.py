@@ -0,0 +1,32 @@
+import json
+
+def calculation_layers(layers):
+    # UI layers (SoundInsulationUI.layers, result_material.json) -> calculation input: thickness mm -> m,
+    # numeric material values only
+    calculation_layers = []
+    for i, layer in enumerate(layers):
+        entry = {
+            "type": layer["type"],
+            "thickness": layer["thickness"] / 1000.0
+        }
+
+        for key, value in layer.get("values", {}).items():
+            if key not in ["thickness", "material"]:
+                try:
+                    entry[key] = float(value)
+                except (ValueError, TypeError):
+                    print(f"[WARNING] Layer {i + 1}: Invalid value for {key}: {value}")
+                    continue
+
+        calculation_layers.append(entry)
+    return calculation_layers
+
+def read_material(json_path):
+    # result_material.json as written by SoundInsulationUI.calculate_and_plot: (cleaned layers, environment)
+    with open(json_path, "r") as fjson:
+        loaded = json.load(fjson)
+    return loaded.get("layers", []), loaded.get("environment", {})
+
+def load_material(json_path):
+    layers, environment = read_material(json_path)
+    return calculation_layers(layers), environment
@@ -1,28 +1,63 @@
 import numpy as np
 
 def merge_layer(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda):
-    N = Phi.shape[0]
-    row_st = B1_pos.shape[0]
-    col_st = B1_pos.shape[1]
+    # Leading axes (e.g. frequency) are treated as a stack of independent matrices
+    N = Phi.shape[-2]
+    row_st = B1_pos.shape[-2]
+    col_st = B1_pos.shape[-1]
     col_ed = col_st + N
 
     # Construct big matrix A
-    N1 = row_st + B2_neg.shape[0]
-    N2 = col_st + N + B2_neg.shape[1]
-    A = np.zeros((N1, N2), dtype=np.complex128)
+    N1 = row_st + B2_neg.shape[-2]
+    N2 = col_st + N + B2_neg.shape[-1]
+    batch = np.broadcast_shapes(B1_pos.shape[:-2], B1_neg.shape[:-2], B2_pos.shape[:-2],
+                                B2_neg.shape[:-2], Phi.shape[:-2], Lambda.shape[:-2])
+    A = np.zeros(batch + (N1, N2), dtype=np.complex128)
 
     # Fill A blockwise
-    A[:row_st, :col_st] = B1_pos
-    A[:row_st, col_st:col_ed] = -B1_neg @ Phi @ Lambda
-    A[row_st:, col_st:col_ed] = B2_pos @ Phi
-    A[row_st:, col_ed:] = -B2_neg
+    A[..., :row_st, :col_st] = B1_pos
+    A[..., :row_st, col_st:col_ed] = -B1_neg @ Phi @ Lambda
+    A[..., row_st:, col_st:col_ed] = B2_pos @ Phi
+    A[..., row_st:, col_ed:] = -B2_neg
 
-    # Elimination
-    A_inv = A[:N, col_st:col_ed]
-    A_BC = A[N:, col_st:col_ed] @ np.linalg.inv(A_inv) @ A[:N, :]
+    # Elimination, on row-equilibrated equations (stress rows are ~E, velocity rows ~w*k)
+    scale = np.max(np.abs(A), axis=-1, keepdims=True)
+    A = A / np.where(scale > 0, scale, 1)
+    A_inv = A[..., :N, col_st:col_ed]
+    A_BC = A[..., N:, col_st:col_ed] @ np.linalg.inv(A_inv) @ A[..., :N, :]
 
     # Compute updated BC matrices
-    B1_pos_star = A[N:, :col_st] - A_BC[:, :col_st]
-    B2_neg_star = -(A[N:, col_ed:] - A_BC[:, col_ed:])
+    B1_pos_star = A[..., N:, :col_st] - A_BC[..., :col_st]
+    B2_neg_star = -(A[..., N:, col_ed:] - A_BC[..., col_ed:])
 
-    return B1_pos_star, B2_neg_star
\ No newline at end of file
+    return B1_pos_star, B2_neg_star
+
+def merge_layer_batch(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda):
+    # Same condensation as merge_layer on (F, n, m) stacks, without any explicit inverse
+    N = Phi.shape[-2]
+    row_st = B1_pos.shape[-2]
+    col_st = B1_pos.shape[-1]
+    col_ed = col_st + N
+
+    N1 = row_st + B2_neg.shape[-2]
+    N2 = col_st + N + B2_neg.shape[-1]
+    batch = np.broadcast_shapes(B1_pos.shape[:-2], B1_neg.shape[:-2], B2_pos.shape[:-2],
+                                B2_neg.shape[:-2], Phi.shape[:-2], Lambda.shape[:-2])
+    A = np.zeros(batch + (N1, N2), dtype=np.complex128)
+
+    A[..., :row_st, :col_st] = B1_pos
+    A[..., :row_st, col_st:col_ed] = -B1_neg @ Phi @ Lambda
+    A[..., row_st:, col_st:col_ed] = B2_pos @ Phi
+    A[..., row_st:, col_ed:] = -B2_neg
+
+    # Equilibrate rows (stress rows are ~E, velocity rows ~w*k), then eliminate the layer
+    # amplitudes with one LU solve against the first N rows, as merge_layer does with the inverse.
+    # All-zero rows (e.g. decoupled panel rows at kt = 0) stay zero instead of 0 / 0.
+    scale = np.max(np.abs(A), axis=-1, keepdims=True)
+    A = A / np.where(scale > 0, scale, 1)
+    A_BC = A[..., N:, :] - A[..., N:, col_st:col_ed] @ np.linalg.solve(A[..., :N, col_st:col_ed], A[..., :N, :])
+
+    B1_pos_star = A_BC[..., :col_st]
+    B2_neg_star = -A_BC[..., col_ed:]
+
+    return B1_pos_star, B2_neg_star
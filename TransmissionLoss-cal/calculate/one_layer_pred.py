@@ -1,21 +1,51 @@
 import numpy as np
 
 def one_layer_pred(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda):
-    N = B1_pos.shape[1] + B1_neg.shape[1]
-    B1_h = B1_pos.shape[0]
+    # Leading axes (e.g. frequency) are treated as a stack of independent matrices
+    N = B1_pos.shape[-1] + B1_neg.shape[-1]
+    B1_h = B1_pos.shape[-2]
 
     Lambda_inv = np.linalg.inv(Lambda)
 
-    A = np.zeros((N, N), dtype=np.complex128)
-    A[:B1_h, :2] = B1_pos
-    A[:B1_h, 2:] = -B1_neg @ Phi
-    A[B1_h:, 2:] = B2_pos @ Phi @ Lambda_inv
+    batch = np.broadcast_shapes(B1_pos.shape[:-2], B1_neg.shape[:-2], B2_pos.shape[:-2],
+                                Phi.shape[:-2], Lambda.shape[:-2])
+    A = np.zeros(batch + (N, N), dtype=np.complex128)
+    A[..., :B1_h, :2] = B1_pos
+    A[..., :B1_h, 2:] = -B1_neg @ Phi
+    A[..., B1_h:, 2:] = B2_pos @ Phi @ Lambda_inv
 
     A_inv = np.linalg.inv(A)
 
     # 추출할 열 개수 = B2_neg.shape[0] (ex: 3)
-    num_output = B2_neg.shape[0]
-    TM_block = A_inv[:2, -num_output:]  # (2, 3)
+    num_output = B2_neg.shape[-2]
+    TM_block = A_inv[..., :2, -num_output:]  # (2, 3)
     TM = TM_block @ B2_neg              # (2, 2)
 
     return TM
+
+
+def one_layer_pred_batch(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda):
+    # Same result as one_layer_pred on (F, n, m) stacks, without any explicit inverse.
+    # Writing the layer amplitudes as Lambda @ u moves Lambda into the first block row,
+    # which leaves the two fluid unknowns (the rows we keep) unchanged.
+    N = B1_pos.shape[-1] + B1_neg.shape[-1]
+    B1_h = B1_pos.shape[-2]
+
+    batch = np.broadcast_shapes(B1_pos.shape[:-2], B1_neg.shape[:-2], B2_pos.shape[:-2],
+                                B2_neg.shape[:-2], Phi.shape[:-2], Lambda.shape[:-2])
+    A = np.zeros(batch + (N, N), dtype=np.complex128)
+    A[..., :B1_h, :2] = B1_pos
+    A[..., :B1_h, 2:] = -B1_neg @ Phi @ Lambda
+    A[..., B1_h:, 2:] = B2_pos @ Phi
+
+    # A^-1[:2, -num_output:] @ B2_neg is the top of the solution of A X = [0; B2_neg]
+    num_output = B2_neg.shape[-2]
+    rhs = np.zeros(batch + (N, B2_neg.shape[-1]), dtype=np.complex128)
+    rhs[..., -num_output:, :] = B2_neg
+
+    # Row equilibration as in merge_layer_batch; all-zero rows stay zero instead of 0 / 0
+    scale = np.max(np.abs(A), axis=-1, keepdims=True)
+    scale = np.where(scale > 0, scale, 1)
+    TM = np.linalg.solve(A / scale, rhs / scale)[..., :2, :]
+
+    return TM
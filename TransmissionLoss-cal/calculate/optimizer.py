@@ -0,0 +1,119 @@
+import numpy as np
+
+from frequency_grid import frequency_grid
+from param_batch import (batch_layer_data, check_parameters, run_batch, sample_count, scale_unit,
+                         surface_mass, to_calculation_units, to_ui_units, total_thickness)
+
+# Cost per unit of relative constraint violation, dominates any reachable curve deviation
+CONSTRAINT_PENALTY = 1e3
+
+def target_grid(target_f, f=None):
+    # Default: 4 points per 1/3 octave inside the measured range
+    if f is not None:
+        return frequency_grid(f)
+    f_min, f_max = np.min(target_f), np.max(target_f)
+    grid = frequency_grid({"kind": "bands", "fraction": 3, "f_min": f_min, "f_max": f_max, "points": 4})
+    return grid[(grid >= f_min) & (grid <= f_max)]
+
+def interpolate_curve(target_f, values, f):
+    # Linear in log f, as the curves are plotted
+    order = np.argsort(target_f)
+    return np.interp(np.log(f), np.log(np.asarray(target_f)[order]), np.asarray(values)[order])
+
+def curve_deviation(model, target, weights, one_sided=False):
+    # Weighted RMS difference per candidate; one_sided only counts points below the target
+    diff = model - target
+    if one_sided:
+        diff = np.minimum(diff, 0)
+    return np.sqrt(np.sum(weights * diff ** 2, axis=-1) / np.sum(weights))
+
+def constraint_violation(layer_data, samples, max_mass=None, max_thickness=None):
+    # Relative excess over the surface mass [kg/m2] / total thickness [mm] limits, 0 when feasible
+    n = sample_count(samples)
+    batched = batch_layer_data(layer_data, samples, extra_axes=0)
+    violation = np.zeros(n)
+    if max_mass is not None:
+        violation += np.maximum(np.broadcast_to(surface_mass(batched), (n,)) / max_mass - 1, 0)
+    if max_thickness is not None:
+        limit = to_calculation_units("thickness", max_thickness)
+        violation += np.maximum(np.broadcast_to(total_thickness(batched), (n,)) / limit - 1, 0)
+    return violation
+
+def optimize_layup(layer_data, parameters, target_f, target_values, quantity="TL", environment=None,
+                   weights=None, one_sided=False, max_mass=None, max_thickness=None, f=None,
+                   population=None, generations=100, mutation=0.7, crossover=0.9, tol=1e-3, seed=None,
+                   progress=None):
+    # Differential evolution (rand/1/bin) over the box given by `parameters` (see param_batch.scale_unit).
+    # layer_data is in calculation units; bounds, max_thickness and returned values are in UI units.
+    # Every generation is one batched solver pass over the whole trial population.
+    check_parameters(layer_data, parameters)
+    rng = np.random.default_rng(seed)
+    d = len(parameters)
+    n = population or max(15, 10 * d)
+
+    f = target_grid(target_f, f)
+    target = interpolate_curve(target_f, target_values, f)
+    w = np.ones_like(f) if weights is None else interpolate_curve(target_f, weights, f)
+
+    def evaluate(u):
+        samples = scale_unit(parameters, u)
+        _, TL, alpha, _, _ = run_batch(layer_data, samples, environment, f)
+        model = TL if quantity == "TL" else alpha
+        dev = curve_deviation(model, target, w, one_sided)
+        return dev + CONSTRAINT_PENALTY * constraint_violation(layer_data, samples, max_mass, max_thickness), dev
+
+    # Latin hypercube start
+    pop = (rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T + rng.random((n, d))) / n
+    cost, dev = evaluate(pop)
+    history = [cost.min()]
+    evaluations = n
+
+    for generation in range(generations):
+        # Three distinct partners per member, none equal to the member itself
+        r = rng.random((n, n))
+        r[np.arange(n), np.arange(n)] = np.inf
+        r1, r2, r3 = np.argsort(r, axis=1)[:, :3].T
+
+        mutant = pop[r1] + mutation * (pop[r2] - pop[r3])
+        # Out-of-box coordinates land between the base vector and the violated bound
+        mutant = np.where(mutant < 0, pop[r1] * rng.random((n, d)), mutant)
+        mutant = np.where(mutant > 1, 1 - (1 - pop[r1]) * rng.random((n, d)), mutant)
+
+        cross = rng.random((n, d)) < crossover
+        cross[np.arange(n), rng.integers(0, d, n)] = True
+        trial = np.where(cross, mutant, pop)
+
+        trial_cost, trial_dev = evaluate(trial)
+        evaluations += n
+        better = trial_cost <= cost
+        pop[better], cost[better], dev[better] = trial[better], trial_cost[better], trial_dev[better]
+        history.append(cost.min())
+
+        if progress is not None:
+            progress(generation + 1, generations)
+        if np.std(cost) <= tol * (abs(np.mean(cost)) + tol):
+            break
+
+    best = np.argmin(cost)
+    samples = scale_unit(parameters, pop[best:best + 1])
+    _, TL, alpha, tc, rc = run_batch(layer_data, samples, environment, f)
+    batched = batch_layer_data(layer_data, samples, extra_axes=0)
+    values = [float(to_ui_units(p["name"], samples[(int(p["layer"]), p["name"])])[0]) for p in parameters]
+
+    return {
+        "parameters": parameters,
+        "values": values,
+        "objective": float(cost[best]),
+        "deviation": float(dev[best]),
+        "feasible": bool(constraint_violation(layer_data, samples, max_mass, max_thickness)[0] == 0),
+        "mass": float(np.ravel(surface_mass(batched))[0]),
+        "thickness": float(to_ui_units("thickness", np.ravel(total_thickness(batched))[0])),
+        "history": np.array(history),
+        "evaluations": evaluations,
+        "f": f,
+        "target": target,
+        "TL": TL[0],
+        "alpha": alpha[0],
+        "tc": tc[0],
+        "rc": rc[0]
+    }
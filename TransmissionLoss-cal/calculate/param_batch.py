@@ -0,0 +1,115 @@
+import copy
+
+import numpy as np
+
+from diffuse_field import diffuse_quadrature
+from frequency_grid import frequency_grid
+from layup_plan import compile_layup
+
+# Upper bound on (candidate x frequency) points per compiled batch, keeps result arrays bounded
+BATCH_POINTS = 200000
+
+# Factor from UI / JSON units to calculation units, per property name
+UI_UNITS = {"thickness": 1e-3}
+
+def to_calculation_units(name, values):
+    return np.asarray(values, dtype=float) * UI_UNITS.get(name, 1.0)
+
+def to_ui_units(name, values):
+    return np.asarray(values, dtype=float) / UI_UNITS.get(name, 1.0)
+
+def scale_unit(parameters, u):
+    # parameters: [{"layer": i, "name": property, "min": lo, "max": hi, "log": bool}, ...] in UI units.
+    # Maps unit-cube points u (n, d) to {(layer, name): n values} in calculation units
+    u = np.atleast_2d(u)
+    samples = {}
+    for k, p in enumerate(parameters):
+        lo, hi = float(p["min"]), float(p["max"])
+        if p.get("log", False):
+            values = lo * (hi / lo) ** u[:, k]
+        else:
+            values = lo + (hi - lo) * u[:, k]
+        samples[(int(p["layer"]), p["name"])] = to_calculation_units(p["name"], values)
+    return samples
+
+def check_parameters(layer_data, parameters):
+    for p in parameters:
+        i = int(p["layer"])
+        if not 0 <= i < len(layer_data) or p["name"] not in layer_data[i]:
+            raise ValueError(f"[ERROR] Layer {i + 1} has no property '{p['name']}'")
+        if p.get("log", False) and float(p["min"]) <= 0:
+            raise ValueError(f"[ERROR] Log-scaled parameter '{p['name']}' needs a positive lower bound")
+
+def update_cleaned_layers(cleaned_layers, parameters, values):
+    # Writes parameter values (UI units) back into result_material.json style layers
+    layers = copy.deepcopy(cleaned_layers)
+    for p, value in zip(parameters, values):
+        layer = layers[int(p["layer"])]
+        layer.setdefault("values", {})[p["name"]] = float(value)
+        if p["name"] == "thickness":
+            layer["thickness"] = float(value)
+    return layers
+
+def sample_count(samples):
+    counts = {len(np.atleast_1d(v)) for v in samples.values()}
+    if len(counts) != 1:
+        raise ValueError(f"[ERROR] All sampled parameters need the same number of values, got {sorted(counts)}")
+    return counts.pop()
+
+def batch_layer_data(layer_data, samples, extra_axes=1):
+    # samples: {(layer index, name): N values} in calculation units. Each sampled value becomes an
+    # (N, 1, ...) array, so the candidates lie along a leading batch axis in front of frequency
+    batched = [dict(layer) for layer in layer_data]
+    for (i, name), values in samples.items():
+        batched[i][name] = np.asarray(values).reshape((-1,) + (1,) * extra_axes)
+    return batched
+
+def surface_mass(layer_data):
+    # kg/m^2 of the solid layers (density * thickness), batched values broadcast
+    return sum(layer["density"] * layer["thickness"] for layer in layer_data if "density" in layer)
+
+def total_thickness(layer_data):
+    # Overall build-up [m], air gaps included
+    return sum(layer["thickness"] for layer in layer_data)
+
+def iter_batches(layer_data, samples, environment=None, f=None, batch_size=None, progress=None):
+    # Evaluates every sampled candidate of one layup skeleton, a batch of candidates per compiled plan.
+    # Yields (candidate slice, f, TL, alpha, tc, rc) with TL/alpha/tc/rc of shape (n, F) for oblique
+    # incidence; for a diffuse field TL/alpha are integrated and tc/rc are (n, n_angles, F).
+    env = environment or {}
+    f = frequency_grid(f)
+    n = sample_count(samples)
+    if batch_size is None:
+        batch_size = max(1, BATCH_POINTS // len(f))
+    P0, T, RH = env.get("P0", 101325), env.get("T", 20), env.get("RH", 0.2)
+    diffuse = str(env.get("field", "oblique")).lower() == "diffuse"
+    backing = env.get("backing", "anechoic")
+    if diffuse:
+        theta_deg, weights = diffuse_quadrature(env.get("theta_max", 78))
+        batch_size = max(1, batch_size // len(theta_deg))
+
+    for start in range(0, n, batch_size):
+        sl = slice(start, min(start + batch_size, n))
+        chunk = {key: np.atleast_1d(values)[sl] for key, values in samples.items()}
+        if diffuse:
+            plan = compile_layup(batch_layer_data(layer_data, chunk, extra_axes=2))
+            _, _, _, tc, rc = plan.run(f, theta_deg[:, None], P0, T, RH, backing=backing)
+            tc = np.broadcast_to(tc, (sl.stop - sl.start,) + tc.shape[-2:])
+            rc = np.broadcast_to(rc, tc.shape)
+            with np.errstate(divide="ignore"):
+                TL = -10 * np.log10(np.einsum("a,naf->nf", weights, np.abs(tc) ** 2))
+            alpha = np.einsum("a,naf->nf", weights, 1 - np.abs(rc) ** 2)
+        else:
+            plan = compile_layup(batch_layer_data(layer_data, chunk))
+            _, TL, alpha, tc, rc = plan.run(f, env.get("theta", 0), P0, T, RH, backing=backing)
+            shape = (sl.stop - sl.start, len(f))
+            TL, alpha, tc, rc = (np.broadcast_to(a, shape) for a in (TL, alpha, tc, rc))
+        yield sl, f, TL, alpha, tc, rc
+        if progress is not None:
+            progress(sl.stop, n)
+
+def run_batch(layer_data, samples, environment=None, f=None, batch_size=None, progress=None):
+    # All candidates at once: f, TL, alpha, tc, rc with the candidates along axis 0
+    parts = list(iter_batches(layer_data, samples, environment, f, batch_size, progress))
+    f = parts[0][1]
+    return (f,) + tuple(np.concatenate([p[i] for p in parts]) for i in range(2, 6))
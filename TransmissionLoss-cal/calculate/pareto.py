@@ -0,0 +1,134 @@
+import bisect
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from param_batch import (batch_layer_data, check_parameters, iter_batches, scale_unit, surface_mass,
+                         to_ui_units, total_thickness)
+
+# 1/3-octave bands, 2 points each: enough for a single-number rating, cheap for 1e5 candidates
+DEFAULT_GRID = {"kind": "bands", "fraction": 3, "f_min": 100, "f_max": 5000, "points": 2}
+OBJECTIVE_LABELS = ["TL [dB]", "Surface mass [kg/m2]", "Thickness [mm]"]
+# Objectives are stored as (TL, mass, thickness); TL is maximised, the others minimised
+OBJECTIVE_SIGN = np.array([-1.0, 1.0, 1.0])
+
+def single_number_tl(TL, axis=-1):
+    # Energy average of the transmission coefficient over the grid, as one TL figure [dB]
+    return -10 * np.log10(np.mean(10 ** (-np.asarray(TL) / 10), axis=axis))
+
+def pareto_mask(costs):
+    # Non-dominated rows of costs (n, 3), all objectives minimised; duplicates keep one copy.
+    # Sweep in lexicographic order: a point is dominated exactly when an earlier one has both
+    # its second and third objective <= its own. The earlier points are summarised by their 2-D
+    # (second, third) staircase, so every query is one bisection.
+    order = np.lexsort((costs[:, 2], costs[:, 1], costs[:, 0]))
+    stair2 = []  # ascending
+    stair3 = []  # strictly descending
+    mask = np.zeros(len(costs), dtype=bool)
+    for i, c2, c3 in zip(order.tolist(), costs[order, 1].tolist(), costs[order, 2].tolist()):
+        k = bisect.bisect_right(stair2, c2)
+        if k > 0 and stair3[k - 1] <= c3:
+            continue
+        mask[i] = True
+        lo = bisect.bisect_left(stair2, c2)
+        hi = k
+        while hi < len(stair3) and stair3[hi] >= c3:
+            hi += 1
+        stair2[lo:hi] = [c2]
+        stair3[lo:hi] = [c3]
+    return mask
+
+def latin_hypercube(n, d, rng):
+    return (rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T + rng.random((n, d))) / n
+
+def evaluate_candidates(layer_data, parameters, u, environment=None, f=None):
+    # Objectives (n, 3): single-number TL [dB], surface mass [kg/m2], total thickness [mm]
+    n = len(u)
+    samples = scale_unit(parameters, u)
+    tl = np.concatenate([single_number_tl(TL) for _, _, TL, _, _, _ in
+                         iter_batches(layer_data, samples, environment, DEFAULT_GRID if f is None else f)])
+    batched = batch_layer_data(layer_data, samples, extra_axes=0)
+    mass = np.broadcast_to(surface_mass(batched), (n,))
+    thickness = to_ui_units("thickness", np.broadcast_to(total_thickness(batched), (n,)))
+    return np.column_stack([tl, mass, thickness])
+
+def _evaluate_task(task):
+    return evaluate_candidates(*task)
+
+class ParetoFront:  # Non-dominated set over (TL, mass, thickness), merged batch by batch
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.objectives = np.empty((0, 3))
+        self.values = np.empty((0, len(parameters)))  # parameter values, UI units
+
+    def update(self, objectives, values):
+        finite = np.all(np.isfinite(objectives), axis=1)
+        objectives = np.vstack([self.objectives, objectives[finite]])
+        values = np.vstack([self.values, values[finite]])
+        mask = pareto_mask(objectives * OBJECTIVE_SIGN)
+        order = np.argsort(objectives[mask, 1], kind="stable")
+        self.objectives = objectives[mask][order]
+        self.values = values[mask][order]
+
+    def __len__(self):
+        return len(self.objectives)
+
+def unit_to_values(parameters, u):
+    samples = scale_unit(parameters, u)
+    return np.column_stack([to_ui_units(p["name"], samples[(int(p["layer"]), p["name"])]) for p in parameters])
+
+def explore_design_space(layer_data, parameters, n_candidates=10000, environment=None, f=None,
+                         batch_size=2000, workers=1, seed=None, progress=None):
+    # Latin hypercube over the parameter box, evaluated batch by batch (optionally in worker
+    # processes) while the non-dominated front is kept up to date
+    check_parameters(layer_data, parameters)
+    rng = np.random.default_rng(seed)
+    u = latin_hypercube(n_candidates, len(parameters), rng)
+    chunks = [u[i:i + batch_size] for i in range(0, n_candidates, batch_size)]
+    front = ParetoFront(parameters)
+
+    tasks = [(layer_data, parameters, chunk, environment, f) for chunk in chunks]
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_evaluate_task, tasks)
+    else:
+        executor = None
+        results = map(_evaluate_task, tasks)
+
+    try:
+        done = 0
+        for chunk, objectives in zip(chunks, results):
+            front.update(objectives, unit_to_values(parameters, chunk))
+            done += len(chunk)
+            if progress is not None:
+                progress(done, n_candidates)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return front
+
+def write_front_csv(csv_path, front):
+    header = OBJECTIVE_LABELS + [f"L{int(p['layer']) + 1} {p['name']}" for p in front.parameters]
+    with open(csv_path, "w", newline="") as fcsv:
+        writer = csv.writer(fcsv)
+        writer.writerow(header)
+        writer.writerows(np.hstack([front.objectives, front.values]).tolist())
+
+def read_front_csv(csv_path):
+    # -> column names, objectives (n, 3), parameter values (n, d)
+    with open(csv_path, newline="") as fcsv:
+        header = next(csv.reader(fcsv))
+    data = np.atleast_2d(np.loadtxt(csv_path, delimiter=",", skiprows=1, ndmin=2))
+    return header, data[:, :3], data[:, 3:]
+
+def plot_pareto_front(ax, objectives):
+    # TL against surface mass, coloured by total thickness, into an axes of its own (nothing is cleared)
+    points = ax.scatter(objectives[:, 1], objectives[:, 0], c=objectives[:, 2], cmap="viridis", s=18)
+    ax.figure.colorbar(points, ax=ax, label=OBJECTIVE_LABELS[2])
+    ax.set_xlabel(OBJECTIVE_LABELS[1], fontsize=12)
+    ax.set_ylabel(f"Single-number {OBJECTIVE_LABELS[0]}", fontsize=12)
+    ax.set_title(f"Pareto front ({len(objectives)} layups)")
+    ax.grid(True, which='both', linestyle='--')
+    return points
@@ -0,0 +1,39 @@
+import numpy as np
+
+# Curves with at most this many points per pixel column are drawn as they are
+MIN_POINTS_PER_COLUMN = 4
+
+def lod_indices(x, ys, x_range=None, n_columns=1000, log=False):
+    # Indices of the points to draw for a curve x (ascending) with one or more y arrays (e.g. TL, or the
+    # low / high edges of a band) in the view x_range: per pixel column the first, last, minimum and
+    # maximum sample of every y, plus one neighbour outside the view on each side so lines reach the
+    # frame. The drawn curve has the same per-column extent as the full one, at O(n_columns) points.
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    if n == 0:
+        return np.arange(0)
+    if x_range is None:
+        lo, hi = 0, n
+    else:
+        lo = max(np.searchsorted(x, x_range[0], side="left") - 1, 0)
+        hi = min(np.searchsorted(x, x_range[1], side="right") + 1, n)
+    if hi - lo <= MIN_POINTS_PER_COLUMN * n_columns:
+        return np.arange(lo, hi)
+
+    u = np.log10(x[lo:hi]) if log else x[lo:hi]
+    u0, u1 = u[0], u[-1]
+    if x_range is not None and (not log or x_range[0] > 0):
+        u0, u1 = (np.log10(x_range[0]), np.log10(x_range[1])) if log else (x_range[0], x_range[1])
+    if not u1 > u0:
+        return np.arange(lo, hi)
+    columns = np.clip(((u - u0) / (u1 - u0) * n_columns).astype(int), -1, n_columns)
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    ends = np.r_[starts[1:], len(u)] - 1
+
+    keep = [starts, ends]
+    for y in ys:
+        y = np.asarray(y[lo:hi], dtype=float)
+        # Sorted by (column, y): the first and last entry of each column are its minimum and maximum
+        order = np.lexsort((y, columns))
+        keep.extend([order[starts], order[ends]])
+    return lo + np.unique(np.concatenate(keep))
@@ -0,0 +1,118 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+# The active profile is per thread, so a profiled UI calculation does not pick up other work
+_state = threading.local()
+
+def output_bytes(value):
+    # Bytes held by the arrays a stage returned (tuples / lists of arrays are summed)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(output_bytes(v) for v in value)
+    return 0
+
+class StageProfile:  # Per (stage, detail) call counts, wall time and bytes of one profiled block
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stats = {}  # (stage, detail) -> [calls, seconds, self seconds, output bytes, peak bytes]
+        self.stack = []  # Open stages, innermost last: [memory base, peak so far, seconds in nested stages]
+        self.wall = 0.0
+
+    def add(self, stage, detail, seconds, self_seconds=None, nbytes=0, peak=0):
+        # seconds includes nested stages, self_seconds does not (the same without nesting)
+        entry = self.stats.setdefault((stage, detail), [0, 0.0, 0.0, 0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += seconds if self_seconds is None else self_seconds
+        entry[3] += nbytes
+        entry[4] = max(entry[4], peak)
+
+    def rows(self):
+        # Most expensive first; "share" is relative to the wall time of the whole profiled block.
+        # seconds and peak_bytes include nested stages, self_seconds excludes them
+        rows = []
+        for (stage, detail), (calls, seconds, self_seconds, nbytes, peak) in self.stats.items():
+            rows.append({"stage": stage, "detail": detail, "calls": calls, "seconds": seconds,
+                         "self_seconds": self_seconds, "share": seconds / self.wall if self.wall > 0 else 0.0,
+                         "bytes": nbytes, "peak_bytes": peak if self.trace_memory else None})
+        return sorted(rows, key=lambda r: (-r["seconds"], r["stage"], r["detail"]))
+
+    def to_dict(self):
+        # Exclusive times, a nested stage is not counted twice
+        accounted = sum(entry[2] for entry in self.stats.values())
+        return {"wall_s": self.wall, "other_s": max(self.wall - accounted, 0.0), "stages": self.rows()}
+
+    def report(self):
+        lines = [f"{'stage':<20}{'detail':<26}{'calls':>8}{'total [ms]':>12}{'self [ms]':>11}{'mean [us]':>11}"
+                 f"{'share':>7}{'out [MB]':>10}" + (f"{'peak [MB]':>11}" if self.trace_memory else "")]
+        for r in self.rows():
+            line = (f"{r['stage']:<20}{r['detail']:<26}{r['calls']:>8}{r['seconds'] * 1e3:>12.2f}"
+                    f"{r['self_seconds'] * 1e3:>11.2f}{r['seconds'] / r['calls'] * 1e6:>11.1f}{r['share']:>7.1%}"
+                    f"{r['bytes'] / 1024 ** 2:>10.2f}")
+            if self.trace_memory:
+                line += f"{r['peak_bytes'] / 1024 ** 2:>11.2f}"
+            lines.append(line)
+        summary = self.to_dict()
+        lines.append(f"{'other':<46}{'':>8}{summary['other_s'] * 1e3:>12.2f}")
+        lines.append(f"{'total':<46}{'':>8}{self.wall * 1e3:>12.2f}")
+        return "\n".join(lines)
+
+@contextmanager
+def profile_stages(trace_memory=False):
+    # with profile_stages() as profile: run_simulation_from_ui(...); print(profile.report())
+    # trace_memory adds the tracemalloc peak per stage (much slower, numpy buffers are traced)
+    profile = StageProfile(trace_memory)
+    previous = getattr(_state, "profile", None)
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _state.profile = profile
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.wall += time.perf_counter() - start
+        _state.profile = previous
+        if started:
+            tracemalloc.stop()
+
+def timed(stage, detail, fn, *args, **kwargs):
+    # fn(*args, **kwargs), booked under (stage, detail) when a profile is active in this thread.
+    # Stages may nest (fn calling timed): the enclosing stages keep their tracemalloc peak across the
+    # reset_peak of a nested one, and their self time excludes it
+    profile = getattr(_state, "profile", None)
+    if profile is None:
+        return fn(*args, **kwargs)
+    base = 0
+    if profile.trace_memory:
+        if profile.stack:
+            outer = profile.stack[-1]
+            outer[1] = max(outer[1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    frame = [base, base, 0.0]
+    profile.stack.append(frame)
+    start = time.perf_counter()
+    try:
+        out = fn(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        profile.stack.pop()
+    peak = max(frame[1], tracemalloc.get_traced_memory()[1]) - base if profile.trace_memory else 0
+    if profile.stack:
+        outer = profile.stack[-1]
+        outer[1] = max(outer[1], base + peak)
+        outer[2] += seconds
+    profile.add(stage, detail, seconds, seconds - frame[2], output_bytes(out), peak)
+    return out
+
+def count(stage, detail):
+    # Untimed event, e.g. a layer cache hit
+    profile = getattr(_state, "profile", None)
+    if profile is not None:
+        profile.add(stage, detail, 0.0)
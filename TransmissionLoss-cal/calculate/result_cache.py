@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Bump whenever a model change alters results, so stale entries are never returned
+CACHE_VERSION = 5
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "transmission_loss")
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+RESULT_NAMES = ("f", "TL", "alpha", "tc", "rc")
+
+def _canonical(value):
+    # Numbers as floats so 20 and 20.0 hash the same; nested containers sorted by key
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value, dtype=float)
+        return {"sha256": hashlib.sha256(value.tobytes()).hexdigest(), "shape": list(value.shape)}
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+def result_key(cleaned_layers, environment, grid=None):
+    # cleaned_layers: SoundInsulationUI.clean_layers_for_json output (the "layers" of result_material.json)
+    # environment: theta, P0, T, RH and optionally field / theta_max; only what affects the result is hashed
+    env = {"P0": environment.get("P0", 101325), "T": environment.get("T", 20), "RH": environment.get("RH", 0.2)}
+    field = str(environment.get("field", "oblique")).lower()
+    if field == "diffuse":
+        env["field"] = field
+        env["theta_max"] = environment.get("theta_max", 78)
+    else:
+        env["theta"] = environment.get("theta", 0)
+    # Only non-default backings are hashed, so existing anechoic entries keep their keys
+    if environment.get("backing", "anechoic") != "anechoic":
+        env["backing"] = environment["backing"]
+
+    layers = [{"type": layer["type"], "thickness": layer["thickness"],
+               "values": {k: v for k, v in layer.get("values", {}).items() if k != "material"}}
+              for layer in cleaned_layers]
+
+    payload = {"version": CACHE_VERSION, "layers": layers, "environment": env, "grid": grid}
+    text = json.dumps(_canonical(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+class ResultCache:  # Simulation results stored as <key>.npz, least recently used evicted past max_bytes
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                result = tuple(data[name] for name in RESULT_NAMES)
+            os.utime(path)  # mark as recently used
+            return result
+        except Exception as e:
+            print(f"[WARNING] Dropping unreadable cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key, result):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self.path(key) + f".{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as fnpz:
+                np.savez_compressed(fnpz, **dict(zip(RESULT_NAMES, result)))
+            os.replace(tmp_path, self.path(key))
+            self.evict()
+        except OSError as e:
+            print(f"[WARNING] Failed to write result cache: {e}")
+
+    def entries(self):
+        # (mtime, size, path) of every cached result, oldest first
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def cached_run(cache, cleaned_layers, environment, grid, compute):
+    # compute() runs the simulation on a miss; cache None disables caching
+    if cache is None:
+        return compute(), False
+    key = result_key(cleaned_layers, environment, grid)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+    result = compute()
+    cache.put(key, result)
+    return result, False
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+STORE_VERSION = 1
+STORE_EXT = ".tlr"
+# Metadata kept in the index, same keys as the UI graph entries
+META_KEYS = ("legend", "material_info", "file_path", "date")
+# Arrays start on this boundary inside the data file
+ALIGNMENT = 64
+
+class ResultStore:  # Results in one append-only binary file, read back through np.memmap
+    # <name>.tlr is a small JSON index (metadata, shared frequency axes, array offsets);
+    # <name>.tlr.bin holds the raw little-endian arrays. Results with identical frequency
+    # vectors share one axis; every other array has the axis length as its last dimension.
+    def __init__(self, path):
+        self.path = path if path.endswith(STORE_EXT) else path + STORE_EXT
+        self.data_path = self.path + ".bin"
+        self._data = None
+        if os.path.exists(self.path):
+            with open(self.path, "r") as fjson:
+                self.index = json.load(fjson)
+            if self.index.get("version") != STORE_VERSION:
+                raise ValueError(f"[ERROR] Unsupported result store version: {self.index.get('version')}")
+        else:
+            self.index = {"version": STORE_VERSION, "axes": [], "results": []}
+
+    def __len__(self):
+        return len(self.index["results"])
+
+    def entries(self):
+        # Metadata only, nothing is read from the data file
+        return [dict(r["meta"]) for r in self.index["results"]]
+
+    def _write_array(self, fbin, values):
+        values = np.asarray(values)
+        dtype = np.dtype("<c16") if np.iscomplexobj(values) else np.dtype("<f8")
+        pad = -fbin.tell() % ALIGNMENT
+        fbin.write(b"\0" * pad)
+        offset = fbin.tell()
+        fbin.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        return {"offset": offset, "dtype": dtype.str, "shape": list(values.shape)}
+
+    def _axis(self, fbin, f):
+        f = np.ascontiguousarray(f, dtype="<f8")
+        digest = hashlib.blake2b(f.tobytes(), digest_size=16).hexdigest()
+        for k, axis in enumerate(self.index["axes"]):
+            if axis["hash"] == digest and axis["shape"] == [len(f)]:
+                return k
+        self.index["axes"].append(dict(self._write_array(fbin, f), hash=digest))
+        return len(self.index["axes"]) - 1
+
+    def extend(self, graphs):
+        # graphs: dicts with "f", metadata (META_KEYS) and any arrays whose last axis matches f
+        # (TL, alpha, tc, rc, TL_band, ...); the index is rewritten once at the end
+        with open(self.data_path, "ab") as fbin:
+            for g in graphs:
+                f = np.asarray(g["f"], dtype=float)
+                axis = self._axis(fbin, f)
+                arrays = {}
+                for name, values in g.items():
+                    if name == "f" or name in META_KEYS or values is None:
+                        continue
+                    values = np.asarray(values)
+                    if values.dtype.kind not in "fciu" or values.shape[-1:] != f.shape:
+                        continue
+                    arrays[name] = self._write_array(fbin, values)
+                meta = {key: str(g.get(key, "-")) for key in META_KEYS}
+                self.index["results"].append({"meta": meta, "axis": axis, "arrays": arrays})
+        self._write_index()
+        return len(self) - 1
+
+    def append(self, graph):
+        return self.extend([graph])
+
+    def _write_index(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fjson:
+            json.dump(self.index, fjson)
+        os.replace(tmp, self.path)
+
+    def _memmap(self, spec):
+        # Views into one read-only map of the data file, remapped after appends
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        end = spec["offset"] + dtype.itemsize * int(np.prod(shape))
+        if end == spec["offset"]:
+            return np.empty(shape, dtype=dtype)
+        if self._data is None or len(self._data) < end:
+            self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+        return self._data[spec["offset"]:end].view(dtype).reshape(shape)
+
+    def load(self, i):
+        # Metadata plus read-only memmaps; pages are read only when the arrays are used
+        entry = self.index["results"][i]
+        graph = dict(entry["meta"])
+        graph["f"] = self._memmap(self.index["axes"][entry["axis"]])
+        for name, spec in entry["arrays"].items():
+            graph[name] = self._memmap(spec)
+        return graph
+
+    def __getitem__(self, i):
+        return self.load(i)
+
+    def __iter__(self):
+        return (self.load(i) for i in range(len(self)))
+
+def read_store(path):
+    return list(ResultStore(path))
+
+def write_store(path, graphs):
+    # New store (an existing one at path is replaced)
+    store_path = path if path.endswith(STORE_EXT) else path + STORE_EXT
+    for p in (store_path, store_path + ".bin"):
+        if os.path.exists(p):
+            os.remove(p)
+    store = ResultStore(store_path)
+    store.extend(graphs)
+    return store
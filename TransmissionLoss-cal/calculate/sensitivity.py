@@ -0,0 +1,81 @@
+import csv
+
+import numpy as np
+
+from frequency_grid import band_levels
+from param_batch import check_parameters, iter_batches, scale_unit
+from pareto import latin_hypercube
+
+# 1/3-octave bands, 2 points each; the indices are reported per band
+DEFAULT_GRID = {"kind": "bands", "fraction": 3, "f_min": 100, "f_max": 5000, "points": 2}
+
+def band_outputs(layer_data, parameters, u, quantity="TL", environment=None, f=None, progress=None):
+    # Band TL [dB] or band alpha for the unit-cube points u (n, d) -> band centres, (n, n_bands)
+    out = []
+    for _, f_grid, TL, alpha, _, _ in iter_batches(layer_data, scale_unit(parameters, u), environment,
+                                                   DEFAULT_GRID if f is None else f, progress=progress):
+        centres, TL_band, alpha_band = band_levels(f_grid, TL, alpha)
+        out.append(TL_band if quantity == "TL" else alpha_band)
+    return centres, np.concatenate(out)
+
+def sobol_indices(layer_data, parameters, n_samples=1024, quantity="TL", environment=None, f=None,
+                  n_bootstrap=100, seed=None, progress=None):
+    # Saltelli sampling over the box given by `parameters` (see param_batch.scale_unit), N * (d + 2)
+    # solver runs. First-order indices use the Saltelli (2010) estimator, total indices Jansen's;
+    # *_conf are 95 % bootstrap half-widths. Only the A / B outputs are kept, every A_B^(i) matrix
+    # is evaluated, reduced to its indices and dropped.
+    check_parameters(layer_data, parameters)
+    rng = np.random.default_rng(seed)
+    d = len(parameters)
+    u = latin_hypercube(n_samples, 2 * d, rng)
+    A, B = u[:, :d], u[:, d:]
+    total = n_samples * (d + 2)
+
+    def evaluate(u, offset):
+        report = None if progress is None else (lambda done, n: progress(offset + done, total))
+        return band_outputs(layer_data, parameters, u, quantity, environment, f, report)
+
+    centres, fA = evaluate(A, 0)
+    _, fB = evaluate(B, n_samples)
+    # Centred outputs: the product in the first-order estimator is otherwise dominated by the mean level
+    mean = np.mean(np.concatenate([fA, fB]), axis=0)
+    fA, fB = fA - mean, fB - mean
+    resample = rng.integers(0, n_samples, (n_bootstrap, n_samples))
+
+    def indices(fA, fB, fAB):
+        variance = np.var(np.concatenate([fA, fB], axis=-2), axis=-2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (np.mean(fB * (fAB - fA), axis=-2) / variance,
+                    0.5 * np.mean((fA - fAB) ** 2, axis=-2) / variance)
+
+    S1, ST, S1_conf, ST_conf = (np.empty((d, len(centres))) for _ in range(4))
+    for i in range(d):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        fAB = evaluate(AB, n_samples * (i + 2))[1] - mean
+        S1[i], ST[i] = indices(fA, fB, fAB)
+        # One resample at a time keeps memory at O(N * bands)
+        boot = np.array([indices(fA[r], fB[r], fAB[r]) for r in resample]).reshape(-1, 2, len(centres))
+        S1_conf[i], ST_conf[i] = 1.96 * np.std(boot, axis=0) if n_bootstrap else np.full((2, len(centres)), np.nan)
+
+    return {
+        "parameters": parameters,
+        "quantity": quantity,
+        "centres": centres,
+        "S1": S1,
+        "ST": ST,
+        "S1_conf": S1_conf,
+        "ST_conf": ST_conf,
+        "variance": np.var(np.concatenate([fA, fB]), axis=0),
+        "evaluations": total
+    }
+
+def write_sobol_csv(csv_path, result):
+    # One row per (index, parameter), one column per band centre
+    with open(csv_path, "w", newline="") as fcsv:
+        writer = csv.writer(fcsv)
+        writer.writerow(["index", "parameter"] + [f"{c:.0f} Hz" for c in result["centres"]])
+        for name in ("S1", "S1_conf", "ST", "ST_conf"):
+            for p, row in zip(result["parameters"], result[name]):
+                writer.writerow([name, f"L{int(p['layer']) + 1} {p['name']}"] + row.tolist())
+        writer.writerow(["variance", result["quantity"]] + result["variance"].tolist())
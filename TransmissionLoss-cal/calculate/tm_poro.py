@@ -1,10 +1,19 @@
 import numpy as np
 
-def tm_poro(w, d, phi, E, Kf, nu, theta, c0, rho11, rho12, rho22):
-    kt = w / c0 * np.sin(theta)  # transverse wave number
-
+def biot_moduli(E, nu):
+    # Frequency-independent frame moduli (bulk, shear)
     Kb = E / (3 * (1 - 2 * nu))
     N = E / (2 * (1 + nu))
+    return Kb, N
+
+def tm_poro(w, d, phi, E, Kf, nu, theta, c0, rho11, rho12, rho22, layout="nnF"):
+    Kb, N = biot_moduli(E, nu)
+    return tm_poro_biot(w, d, phi, Kb, N, Kf, theta, c0, rho11, rho12, rho22, layout)
+
+def tm_poro_biot(w, d, phi, Kb, N, Kf, theta, c0, rho11, rho12, rho22, layout="nnF"):
+    kt = w / c0 * np.sin(theta)  # transverse wave number
+
+    # P, Q, R depend on frequency through the fluid bulk modulus Kf
     P = 4 / 3 * N + Kb + Kf * (1 - phi) ** 2
     Q = Kf * phi * (1 - phi)
     R = Kf * phi ** 2
@@ -18,8 +27,6 @@ def tm_poro(w, d, phi, E, Kf, nu, theta, c0, rho11, rho12, rho22):
                  (2 * (P * R - Q ** 2)))
     k3 = np.sqrt(w ** 2 * (rho11 * rho22 - rho12 ** 2) / (N * rho22))
 
-    K = np.array([k1, k2, k3])  # shape (3, len(w))
-
     k13 = np.sqrt(k1 ** 2 - kt ** 2)
     k23 = np.sqrt(k2 ** 2 - kt ** 2)
     k33 = np.sqrt(k3 ** 2 - kt ** 2)
@@ -33,23 +40,31 @@ def tm_poro(w, d, phi, E, Kf, nu, theta, c0, rho11, rho12, rho22):
     E1 = (R * mu1 + Q) * k1 ** 2
     E2 = (R * mu2 + Q) * k2 ** 2
 
-    Taux = np.zeros((6, 6, len(w)), dtype=np.complex128)
-    Lambda = np.zeros((6, 6, len(w)), dtype=np.complex128)
-
-    for i in range(len(w)):
-        Taux[:, :, i] = np.array([
-            [w[i]*kt[i],  w[i]*kt[i],  w[i]*kt[i],  w[i]*kt[i], -w[i]*k33[i],  w[i]*k33[i]],
-            [w[i]*k13[i], -w[i]*k13[i], w[i]*k23[i], -w[i]*k23[i], w[i]*kt[i], w[i]*kt[i]],
-            [w[i]*k13[i]*mu1[i], -w[i]*k13[i]*mu1[i], w[i]*k23[i]*mu2[i], -w[i]*k23[i]*mu2[i], w[i]*kt[i]*mu3, w[i]*kt[i]*mu3],
-            [-D1[i], -D1[i], -D2[i], -D2[i], -2*N*k33[i]*kt[i], 2*N*k33[i]*kt[i]],
-            [-2*N*kt[i]*k13[i], 2*N*kt[i]*k13[i], -2*N*kt[i]*k23[i], 2*N*kt[i]*k23[i], N*(k33[i]**2 - kt[i]**2), N*(k33[i]**2 - kt[i]**2)],
-            [-E1[i], -E1[i], -E2[i], -E2[i], 0, 0]
-        ])
-
-        Alpha = np.array([
-            -1j * k13[i], 1j * k13[i], -1j * k23[i],
-            1j * k23[i], -1j * k33[i], 1j * k33[i]
-        ])
-        Lambda[:, :, i] = np.diag(np.exp(Alpha * -d))
-
-    return Taux, Lambda
\ No newline at end of file
+    # Inputs may broadcast against each other (e.g. frequency x angle grids)
+    rows = [
+        [w*kt,  w*kt,  w*kt,  w*kt, -w*k33,  w*k33],
+        [w*k13, -w*k13, w*k23, -w*k23, w*kt, w*kt],
+        [w*k13*mu1, -w*k13*mu1, w*k23*mu2, -w*k23*mu2, w*kt*mu3, w*kt*mu3],
+        [-D1, -D1, -D2, -D2, -2*N*k33*kt, 2*N*k33*kt],
+        [-2*N*kt*k13, 2*N*kt*k13, -2*N*kt*k23, 2*N*kt*k23, N*(k33**2 - kt**2), N*(k33**2 - kt**2)],
+        [-E1, -E1, -E2, -E2, 0, 0]
+    ]
+    Alpha = [
+        -1j * k13, 1j * k13, -1j * k23,
+        1j * k23, -1j * k33, 1j * k33
+    ]
+    shape = np.broadcast_shapes(*(np.shape(v) for row in rows for v in row), np.shape(d))
+
+    Taux = np.zeros(shape + (6, 6), dtype=np.complex128)
+    Lambda = np.zeros(shape + (6, 6), dtype=np.complex128)
+    for i, row in enumerate(rows):
+        for j, value in enumerate(row):
+            Taux[..., i, j] = value
+        Lambda[..., i, i] = np.exp(Alpha[i] * -d)
+
+    if layout == "nnF":
+        return np.moveaxis(Taux, (-2, -1), (0, 1)), np.moveaxis(Lambda, (-2, -1), (0, 1))
+    elif layout == "Fnn":
+        return Taux, Lambda
+    else:
+        raise ValueError(f"[ERROR] Unsupported layout: {layout}")
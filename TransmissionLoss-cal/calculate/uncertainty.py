@@ -0,0 +1,75 @@
+import numpy as np
+
+from param_batch import check_parameters, iter_batches, run_batch
+
+# Spread is relative to the nominal value: coefficient of variation for normal / lognormal,
+# half-width for uniform / triangular
+DISTRIBUTIONS = ("normal", "lognormal", "uniform", "triangular")
+DEFAULT_GRID = {"kind": "log", "f_min": 100, "f_max": 10000, "n": 120}
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+# Physical limits that sampled values are clipped to
+PROPERTY_LIMITS = {"porosity": (1e-3, 1.0), "poissons_ratio": (-0.99, 0.49), "loss_factor": (0.0, np.inf)}
+
+def sample_distribution(dist, nominal, spread, n, rng):
+    if dist == "normal":
+        values = nominal * (1 + spread * rng.standard_normal(n))
+    elif dist == "lognormal":
+        # Median at the nominal value, coefficient of variation = spread
+        sigma = np.sqrt(np.log(1 + spread ** 2))
+        values = nominal * np.exp(sigma * rng.standard_normal(n))
+    elif dist == "uniform":
+        values = nominal * (1 + spread * rng.uniform(-1, 1, n))
+    elif dist == "triangular":
+        values = nominal * (1 + spread * rng.triangular(-1, 0, 1, n))
+    else:
+        raise ValueError(f"[ERROR] Unsupported distribution: {dist}")
+    return values
+
+def sample_layup(layer_data, uncertainties, n, seed=None):
+    # uncertainties: [{"layer": i, "name": property, "dist": ..., "spread": relative}, ...]
+    # -> {(layer, name): n values} in calculation units, nominal values taken from layer_data
+    check_parameters(layer_data, uncertainties)
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for u in uncertainties:
+        i, name = int(u["layer"]), u["name"]
+        nominal = float(layer_data[i][name])
+        values = sample_distribution(u.get("dist", "normal"), nominal, float(u["spread"]), n, rng)
+        lo, hi = PROPERTY_LIMITS.get(name, (np.finfo(float).tiny, np.inf))
+        samples[(i, name)] = np.clip(values, lo, hi)
+    return samples
+
+def run_monte_carlo(layer_data, uncertainties, n_samples=1000, environment=None, f=None,
+                    percentiles=DEFAULT_PERCENTILES, seed=None, progress=None):
+    # All samples are pushed through the solver along the batch axis; returns per-frequency
+    # percentiles of TL and alpha plus the nominal curves
+    env = environment or {}
+    f = DEFAULT_GRID if f is None else f
+    samples = sample_layup(layer_data, uncertainties, n_samples, seed)
+
+    TL = []
+    alpha = []
+    for _, f_grid, TL_batch, alpha_batch, _, _ in iter_batches(layer_data, samples, env, f, progress=progress):
+        TL.append(TL_batch)
+        alpha.append(alpha_batch)
+    TL = np.concatenate(TL)
+    alpha = np.concatenate(alpha)
+
+    _, TL_nominal, alpha_nominal, _, _ = run_batch(layer_data, {key: [layer_data[key[0]][key[1]]] for key in samples}, env, f)
+
+    return {
+        "f": f_grid,
+        "percentiles": np.asarray(percentiles),
+        "TL": np.nanpercentile(TL, percentiles, axis=0),
+        "alpha": np.nanpercentile(alpha, percentiles, axis=0),
+        "TL_nominal": TL_nominal[0],
+        "alpha_nominal": alpha_nominal[0],
+        "n_samples": n_samples
+    }
+
+def layer_uncertainties(cleaned_layers):
+    # Distributions saved with a layup: layer["uncertainty"] = {property: {"dist": ..., "spread": ...}}
+    return [{"layer": i, "name": name, "dist": u.get("dist", "normal"), "spread": float(u["spread"])}
+            for i, layer in enumerate(cleaned_layers)
+            for name, u in layer.get("uncertainty", {}).items()]
@@ -0,0 +1,73 @@
+import threading
+import traceback
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from calculation import run_simulation_from_ui
+from diffuse_field import run_simulation_diffuse
+from layup_plan import CalculationCancelled
+from profiling import profile_stages
+from result_cache import cached_run
+from uncertainty import run_monte_carlo
+
+class CalculationWorker(QThread):  # Runs one calculation job off the GUI thread
+    progress = pyqtSignal(int, int)          # done, total frequencies (samples for Monte Carlo)
+    result_ready = pyqtSignal(object, object)  # job, (f, TL, alpha, tc, rc) or Monte Carlo result dict
+    failed = pyqtSignal(object, str)           # job, message
+    cancelled = pyqtSignal(object)             # job
+
+    def __init__(self, job, result_cache=None, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.result_cache = result_cache
+        self.cancel_event = threading.Event()
+        self.timings = None  # StageProfile of the last run, None for result cache hits
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report_progress(self, done, total):
+        # Called from inside the solver after every frequency chunk
+        if self.cancel_event.is_set():
+            raise CalculationCancelled()
+        self.progress.emit(done, total)
+
+    def simulate(self):
+        job = self.job
+        if "uncertainties" in job:
+            return run_monte_carlo(job["layer_data"], job["uncertainties"], job["n_samples"], self.environment(),
+                                   progress=self.report_progress)
+        if job["field"] == "Diffuse":
+            return run_simulation_diffuse(job["layer_data"], theta_max=job["theta_max"], P0=job["P0"],
+                                          T=job["T"], RH=job["RH"], progress=self.report_progress)
+        return run_simulation_from_ui(job["layer_data"], theta_deg=job["theta"], P0=job["P0"],
+                                      T=job["T"], RH=job["RH"], progress=self.report_progress)
+
+    def environment(self):
+        job = self.job
+        return {"theta": job["theta"], "P0": job["P0"], "T": job["T"], "RH": job["RH"],
+                "field": job["field"].lower(), "theta_max": job["theta_max"]}
+
+    def run(self):
+        job = self.job
+        try:
+            # Monte Carlo results are not kept in the result cache
+            cache = None if "uncertainties" in job else self.result_cache
+            with profile_stages() as profile:
+                result, hit = cached_run(cache, job["cleaned_layers"], self.environment(), None, self.simulate)
+            self.timings = None if hit else profile
+            if hit:
+                print("[INFO] Identical layup found in result cache.")
+                self.progress.emit(1, 1)
+        except CalculationCancelled:
+            self.cancelled.emit(job)
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.failed.emit(job, str(e))
+            return
+
+        if self.cancel_event.is_set():
+            self.cancelled.emit(job)
+        else:
+            self.result_ready.emit(job, result)
@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import QApplication
 import sys
 from ui_main import SoundInsulationUI
+import jit_backend
 import matplotlib
 import traceback
 
@@ -11,6 +12,9 @@ if __name__ == "__main__":
         app = QApplication(sys.argv)
         window = SoundInsulationUI()
         window.show()
+        # Compile / load the optional numba kernels while the user sets up the first layup
+        jit_backend.set_background_compile(True)
+        jit_backend.warm_up(background=True)
         sys.exit(app.exec())
     except Exception as e:
         print(f"[FATAL ERROR] {e}", flush=True)
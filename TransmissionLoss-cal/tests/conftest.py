@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The calculate modules import each other by bare name, as in calculate/__main__.py
+calculate_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "calculate")
+if calculate_path not in sys.path:
+    sys.path.append(os.path.abspath(calculate_path))
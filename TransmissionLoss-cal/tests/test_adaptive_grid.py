@@ -0,0 +1,23 @@
+import numpy as np
+
+from adaptive_grid import coincidence_frequencies, run_simulation_adaptive
+from benchmark import PANEL, POROUS
+from layup_plan import air_state, compile_layup
+
+# Lightly damped 3 mm panel: its coincidence dip at 45 deg (~8 kHz) is the sharpest feature of the
+# curve, the porous layer bends TL and alpha over the whole band
+LAYUP = [dict(POROUS, thickness=0.03), dict(PANEL, thickness=0.003, loss_factor=0.001)]
+THETA = 45.0
+
+def test_budget_goes_to_the_worst_intervals():
+    f_initial = run_simulation_adaptive(LAYUP, THETA, n_initial=60, max_points=0)[0]
+    f = run_simulation_adaptive(LAYUP, THETA, n_initial=60, max_points=len(f_initial) + 6, max_iter=1)[0]
+    added = np.setdiff1d(f, f_initial)
+    assert len(added) == 6
+
+    c0 = air_state(101325, 20, 0.2)[1]
+    f_dip = max(coincidence_frequencies(compile_layup(LAYUP), THETA, c0))
+    assert 5000 < f_dip < 10000
+    # Most of a small budget refines around the coincidence dip, not the lowest flagged intervals
+    assert np.sum(np.abs(added / f_dip - 1) < 0.05) >= 3
+    assert np.all(added > 300)
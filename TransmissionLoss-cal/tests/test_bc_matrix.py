@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from calculation import run_simulation_batched
+
+GRID = {"kind": "log", "f_min": 100, "f_max": 10000, "n": 60}
+ALUMINIUM = {"youngs_modulus": 7e10, "poissons_ratio": 0.33, "density": 2700.0}
+PLASTIC = dict(ALUMINIUM, type="Linear Elastic", thickness=0.002)
+PANEL = dict(ALUMINIUM, type="Viscoelastic", thickness=0.001, loss_factor=0.01)
+
+def tc(layer_data, theta, solver):
+    return run_simulation_batched([dict(l) for l in layer_data], theta, f=GRID, solver=solver)[3]
+
+def relative_error(a, b):
+    return np.max(np.abs(a - b)) / np.max(np.abs(b))
+
+# Between identical fluids the transmission coefficient does not depend on which side is lit, so a
+# wrong sign in the plastic|stiff panel interface shows up as plastic|panel != panel|plastic
+@pytest.mark.parametrize("solver", ["condense", "global"])
+@pytest.mark.parametrize("theta", [0.0, 30.0, 60.0])
+def test_plastic_panel_reciprocity(theta, solver):
+    assert relative_error(tc([PLASTIC, PANEL], theta, solver), tc([PANEL, PLASTIC], theta, solver)) < 1e-6
+
+# A vanishingly thin plastic layer bonded to the panel leaves the panel alone
+@pytest.mark.parametrize("theta", [0.0, 30.0, 60.0])
+def test_thin_plastic_on_panel(theta):
+    thin = dict(PLASTIC, thickness=1e-7)
+    assert relative_error(tc([thin, PANEL], theta, "global"), tc([PANEL], theta, "global")) < 1e-3
+    assert relative_error(tc([PANEL, thin], theta, "global"), tc([PANEL], theta, "global")) < 1e-3
@@ -0,0 +1,52 @@
+import json
+import os
+
+import numpy as np
+
+from cli import main, read_target
+from graph_csv import read_graph_csv, write_graph_csv
+
+EXAMPLE_MATERIAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example_results",
+                                "result_material.json")
+TARGET_F = [250.0, 500.0, 1000.0, 2000.0, 4000.0]
+
+def write_spec(tmp_path, name, spec):
+    path = tmp_path / name
+    path.write_text(json.dumps(dict(spec, material=os.path.abspath(EXAMPLE_MATERIAL))))
+    return str(path)
+
+def test_optimize_output_round_trip(tmp_path):
+    target = [20.0, 25.0, 30.0, 35.0, 40.0]
+    spec = write_spec(tmp_path, "optimize.json", {
+        "target": {"f": TARGET_F, "values": target}, "quantity": "TL",
+        "parameters": [{"layer": 0, "name": "thickness", "min": 10, "max": 50}],
+        "population": 8, "generations": 2, "seed": 0, "grid": {"kind": "list", "values": TARGET_F}})
+    main(["optimize", spec])
+
+    csv_path = str(tmp_path / "optimize_best.csv")
+    optimized, loaded = read_graph_csv(csv_path)
+    assert len(optimized["f"]) == len(TARGET_F)
+    np.testing.assert_allclose(loaded["f"], TARGET_F)
+    np.testing.assert_allclose(loaded["TL"], target)
+    # The target only has the fitted quantity
+    assert np.isnan(loaded["alpha"]).all()
+    f, values = read_target({"target": csv_path, "target_graph": 1, "quantity": "TL"})
+    np.testing.assert_allclose(f, TARGET_F)
+    np.testing.assert_allclose(values, target)
+
+def test_fit_output_round_trip(tmp_path):
+    # Measured absorption only, as exported by an impedance tube: blank TL cells
+    measured = [0.1, 0.3, 0.6, 0.8, 0.9]
+    target_csv = str(tmp_path / "measured.csv")
+    write_graph_csv(target_csv, [{"legend": "tube", "f": np.array(TARGET_F), "TL": np.full(5, np.nan),
+                                  "alpha": np.array(measured)}])
+    spec = write_spec(tmp_path, "fit.json", {
+        "target": target_csv, "quantity": "alpha", "environment": {"backing": "rigid"},
+        "n_starts": 4, "max_iter": 2, "seed": 0, "grid": {"kind": "list", "values": TARGET_F}})
+    main(["fit", spec])
+
+    fitted, loaded = read_graph_csv(str(tmp_path / "fit_fit.csv"))
+    assert len(fitted["f"]) == len(TARGET_F)
+    np.testing.assert_allclose(loaded["f"], TARGET_F)
+    np.testing.assert_allclose(loaded["alpha"], measured)
+    assert np.isnan(loaded["TL"]).all()
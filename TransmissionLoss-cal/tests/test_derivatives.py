@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from benchmark import POROUS
+from calculation import run_simulation_batched
+from derivatives import run_simulation_derivatives
+
+GRID = {"kind": "log", "f_min": 100, "f_max": 5000, "n": 30}
+# Two porous layers with differing porosity: the poro|poro interface depends on both
+POROUS_2 = dict(POROUS, porosity=0.7, airflow_resistivity=40000.0, density=30.0)
+
+def central_difference(layer_data, layer, name, theta, rel=1e-6):
+    value = layer_data[layer][name]
+    h = rel * abs(value)
+    upper = [dict(l) for l in layer_data]
+    lower = [dict(l) for l in layer_data]
+    upper[layer][name] = value + h
+    lower[layer][name] = value - h
+    _, TL_up, alpha_up, _, _ = run_simulation_batched(upper, theta, f=GRID, solver="condense")
+    _, TL_lo, alpha_lo, _, _ = run_simulation_batched(lower, theta, f=GRID, solver="condense")
+    return (TL_up - TL_lo) / (2 * h), (alpha_up - alpha_lo) / (2 * h)
+
+# Dropping the imaginary part of a complex porosity anywhere in the interface matrices warns
+@pytest.mark.filterwarnings("error::numpy.exceptions.ComplexWarning")
+@pytest.mark.parametrize("theta", [0.0, 30.0])
+@pytest.mark.parametrize("layer", [0, 1])
+def test_porosity_derivative_poro_poro(theta, layer):
+    layer_data = [dict(POROUS), dict(POROUS_2)]
+    result = run_simulation_derivatives(layer_data, [{"layer": layer, "name": "porosity"}], {"theta": theta}, GRID)
+    dTL, dalpha = central_difference(layer_data, layer, "porosity", theta)
+    np.testing.assert_allclose(result["dTL"][0], dTL, rtol=0, atol=1e-5 * np.max(np.abs(dTL)))
+    np.testing.assert_allclose(result["dalpha"][0], dalpha, rtol=0, atol=1e-5 * np.max(np.abs(dalpha)))
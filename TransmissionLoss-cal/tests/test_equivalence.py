@@ -0,0 +1,26 @@
+import numpy as np
+
+from equivalence import EXACT, TOLERANCES, TL_RANGE, canonical_layups, check_equivalence, deviations, random_layups
+
+GRID = {"kind": "log", "f_min": 100, "f_max": 10000, "n": 40}
+
+def test_backends_within_their_tolerances():
+    layups = canonical_layups()
+    layups.update(random_layups(6, seed=1))
+    result = check_equivalence(layups, f=GRID)
+    failed = [(c["backend"], c["layup"], c["theta"], c["backing"]) for c in result["cases"] if not c["passed"]]
+    assert not failed
+    # The NumPy condensation backends are held to round-off of the reference
+    for backend in ("batched", "cached", "param_batch"):
+        assert result["tolerances"][backend] == EXACT
+        assert TOLERANCES[backend]["tc"] <= 1e-9
+
+def test_tl_ignores_notches_below_range():
+    f = np.arange(3.0)
+    tc_ref = np.array([1.0, 1e-7, 0.5])
+    tc = tc_ref + np.array([0, 1e-9, 0])
+    result = (f, -20 * np.log10(np.abs(tc)), np.zeros(3), tc, tc)
+    reference = (f, -20 * np.log10(np.abs(tc_ref)), np.zeros(3), tc_ref, tc_ref)
+    assert -20 * np.log10(1e-7) > TL_RANGE
+    assert deviations(result, reference)["TL"] == 0.0
+    assert deviations(result, reference)["tc"] <= 1e-9
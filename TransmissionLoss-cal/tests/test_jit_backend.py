@@ -0,0 +1,18 @@
+import jit_backend
+from benchmark import PANEL, POROUS
+from calculation import run_simulation_batched
+
+def test_auto_does_not_compile_in_the_background_by_default(monkeypatch):
+    started = []
+    monkeypatch.setattr(jit_backend, "_ready", False)
+    monkeypatch.setattr(jit_backend, "cached", lambda: False)
+    monkeypatch.setattr(jit_backend, "usable", lambda plan: True)
+    monkeypatch.setattr(jit_backend, "warm_up", lambda background=False: started.append(background))
+    layup = [dict(POROUS), dict(PANEL)]
+    run_simulation_batched(layup, 0.0, f={"kind": "log", "f_min": 100, "f_max": 1000, "n": 10})
+    assert started == []
+
+    # The UI opts in (main.py)
+    monkeypatch.setattr(jit_backend, "_background", True)
+    run_simulation_batched(layup, 0.0, f={"kind": "log", "f_min": 100, "f_max": 1000, "n": 10})
+    assert started == [True]
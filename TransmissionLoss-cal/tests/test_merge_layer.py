@@ -0,0 +1,22 @@
+import numpy as np
+
+from benchmark import benchmark_layups
+from layup_plan import air_state, compile_layup
+from merge_layer import merge_layer_batch
+
+def test_merge_layer_zero_row():
+    # An all-zero interface row must not turn the condensed equations into NaN
+    plan = compile_layup(benchmark_layups()["example"])
+    w = 2 * np.pi * np.array([100.0, 1000.0, 5000.0])
+    Phi, Lambda = plan.layer_matrices(0, w, 0.0, air_state(101325, 20, 0.2))
+    (B1_pos, B1_neg), (B2_pos, B2_neg) = plan.interfaces[0], plan.interfaces[1]
+    B2_pos_zero = np.vstack([B2_pos, np.zeros((1, B2_pos.shape[1]))])
+    B2_neg_zero = np.vstack([B2_neg, np.zeros((1, B2_neg.shape[1]))])
+
+    condensed = np.concatenate(merge_layer_batch(B1_pos, B1_neg, B2_pos, B2_neg, Phi, Lambda), axis=-1)
+    with_zero = np.concatenate(merge_layer_batch(B1_pos, B1_neg, B2_pos_zero, B2_neg_zero, Phi, Lambda), axis=-1)
+    assert np.isfinite(with_zero).all()
+    # Same condensed equations: every row of the original lies in the span of the new ones
+    for k in range(len(w)):
+        coefficients = np.linalg.lstsq(with_zero[k].T, condensed[k].T, rcond=None)[0]
+        np.testing.assert_allclose(with_zero[k].T @ coefficients, condensed[k].T, atol=1e-12)
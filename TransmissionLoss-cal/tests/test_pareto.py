@@ -0,0 +1,16 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+from pareto import OBJECTIVE_LABELS, plot_pareto_front
+
+OBJECTIVES = np.array([[30.0, 5.0, 20.0], [35.0, 8.0, 25.0], [40.0, 12.0, 40.0]])
+
+def test_front_keeps_existing_artists_and_adds_a_colorbar():
+    figure = Figure()
+    ax = figure.add_subplot(111)
+    ax.plot([100, 1000], [20, 40], label="measured")
+    points = plot_pareto_front(ax, OBJECTIVES)
+    assert [line.get_label() for line in ax.lines] == ["measured"]
+    assert len(figure.axes) == 2
+    assert figure.axes[1].get_ylabel() == OBJECTIVE_LABELS[2]
+    assert np.allclose(points.get_array(), OBJECTIVES[:, 2])
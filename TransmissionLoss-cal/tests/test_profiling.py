@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+
+from profiling import profile_stages, timed
+
+MB = 1024 ** 2
+
+def allocate(n_bytes):
+    # Holds n_bytes until it returns, then frees them
+    buffer = np.ones(n_bytes // 8)
+    return float(buffer[0])
+
+def inner():
+    time.sleep(0.02)
+    return allocate(4 * MB)
+
+def outer():
+    # 16 MB in the outer stage before the nested one, released before it runs
+    allocate(16 * MB)
+    timed("inner", "", inner)
+    time.sleep(0.02)
+    return timed("inner", "", allocate, MB)
+
+def stats(profile):
+    return {r["stage"]: r for r in profile.rows()}
+
+def test_nested_stage_peaks():
+    with profile_stages(trace_memory=True) as profile:
+        timed("outer", "", outer)
+    rows = stats(profile)
+    # The nested stages reset the tracemalloc peak; the outer one still reports its own 16 MB
+    assert 16 * MB <= rows["outer"]["peak_bytes"] < 17 * MB
+    assert 4 * MB <= rows["inner"]["peak_bytes"] < 5 * MB
+
+def test_nested_stage_times():
+    with profile_stages() as profile:
+        timed("outer", "", outer)
+    rows = stats(profile)
+    assert rows["inner"]["calls"] == 2
+    assert rows["outer"]["seconds"] >= rows["inner"]["seconds"] + rows["outer"]["self_seconds"] - 1e-9
+    assert rows["outer"]["self_seconds"] >= 0.02
+    assert rows["inner"]["self_seconds"] == rows["inner"]["seconds"]
+    # Every second is booked once: exclusive times plus "other" add up to the wall time
+    summary = profile.to_dict()
+    assert abs(sum(r["self_seconds"] for r in rows.values()) + summary["other_s"] - profile.wall) < 1e-9
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from calculation import run_simulation_batched, run_simulation_reference
+from layup_plan import air_state
+
+F = np.geomspace(100, 10000, 200)
+
+def plate_tc(f, theta_deg, d, rho, E, nu, rho0, c0):
+    # Elastic layer between two half-spaces of the same fluid, in closed form (Brekhovskikh,
+    # Waves in Layered Media, ch. 4). Even in cos(theta_L), cos(theta_T), so the branch above the
+    # critical angles does not matter
+    lam = E * nu / (1 + nu) / (1 - 2 * nu)
+    mu = E / (1 + nu) / 2
+    cL, cT = np.sqrt((lam + 2 * mu) / rho), np.sqrt(mu / rho)
+    w = 2 * np.pi * f
+    theta = np.radians(theta_deg)
+    sin_L, sin_T = cL / c0 * np.sin(theta), cT / c0 * np.sin(theta)
+    cos_L, cos_T = np.sqrt(1 - sin_L**2 + 0j), np.sqrt(1 - sin_T**2 + 0j)
+    P, Q = w / cL * d * cos_L, w / cT * d * cos_T
+    z_L = rho * cL / cos_L / (rho0 * c0 / np.cos(theta))
+    z_T = rho * cT / cos_T / (rho0 * c0 / np.cos(theta))
+    cos2T, sin2T = 1 - 2 * sin_T**2, 2 * sin_T * cos_T
+    M = z_L * cos2T**2 / np.tan(P) + z_T * sin2T**2 / np.tan(Q)
+    N = z_L * cos2T**2 / np.sin(P) + z_T * sin2T**2 / np.sin(Q)
+    return 2j * N / (M**2 - N**2 + 2j * M - 1)
+
+# Above the critical angle (theta > ~12 deg for the plastic, ~3 deg for aluminium) the longitudinal
+# and shear waves in the layer are evanescent
+@pytest.mark.parametrize("theta", [0.0, 30.0, 45.0, 60.0])
+@pytest.mark.parametrize("layer", [
+    {"thickness": 0.002, "youngs_modulus": 2e9, "poissons_ratio": 0.35, "density": 1200.0},
+    {"thickness": 0.02, "youngs_modulus": 2e9, "poissons_ratio": 0.35, "density": 1200.0},
+    {"thickness": 0.001, "youngs_modulus": 7e10, "poissons_ratio": 0.33, "density": 2700.0}])
+def test_linear_elastic_oblique_incidence(layer, theta):
+    rho0, c0 = (complex(a).real for a in air_state(101325, 20, 0.2)[:2])
+    tc = plate_tc(F, theta, layer["thickness"], layer["density"], layer["youngs_modulus"],
+                  layer["poissons_ratio"], rho0, c0)
+    expected = -20 * np.log10(np.abs(tc))
+    layer_data = [dict(layer, type="Linear Elastic")]
+    grid = {"kind": "list", "values": F}
+    np.testing.assert_allclose(run_simulation_reference(layer_data, theta, f=grid)[1], expected, rtol=0, atol=1e-4)
+    for solver in ("condense", "global"):
+        TL = run_simulation_batched(layer_data, theta, f=grid, solver=solver)[1]
+        np.testing.assert_allclose(TL, expected, rtol=0, atol=1e-4)
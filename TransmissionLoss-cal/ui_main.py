@@ -4,11 +4,11 @@ import numpy as np
 import json
 import copy
 import pandas as pd
-import csv
+from collections import deque
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QGridLayout, QVBoxLayout, QHBoxLayout, QGroupBox,
     QLabel, QLineEdit, QPushButton, QComboBox, QSizePolicy, QFileDialog, QDialog,
-    QScrollArea, QTableWidget, QTableWidgetItem, QTabWidget, QMessageBox)
+    QScrollArea, QTableWidget, QTableWidgetItem, QTabWidget, QMessageBox, QProgressBar)
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QIcon
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
@@ -20,7 +20,14 @@ from material_definitions import MATERIAL_DEFINITIONS
 calculate_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "calculate"))
 if calculate_path not in sys.path:
     sys.path.append(calculate_path)
-from calculation import run_simulation_from_ui
+from calculation_worker import CalculationWorker
+from result_cache import ResultCache
+from pareto import plot_pareto_front, read_front_csv
+from uncertainty import DISTRIBUTIONS
+from result_store import STORE_EXT, ResultStore, write_store
+from graph_csv import read_graph_csv, write_graph_csv
+from material_json import calculation_layers
+from plot_lod import lod_indices
 
 
 class AxisRangeDialog(QDialog):
@@ -71,6 +78,55 @@ class AxisRangeDialog(QDialog):
         self.setLayout(layout)
 
 
+class TimingsDialog(QDialog):
+    def __init__(self, profile, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Timings - {title}")
+        self.resize(800, 400)
+
+        layout = QVBoxLayout()
+        rows = profile.rows()
+        summary = profile.to_dict()
+        layout.addWidget(QLabel(f"Total {profile.wall * 1e3:.1f} ms, not attributed to a stage {summary['other_s'] * 1e3:.1f} ms"))
+
+        self.table = QTableWidget(len(rows), 7)
+        self.table.setHorizontalHeaderLabels(["Stage", "Detail", "Calls", "Total [ms]", "Self [ms]", "Share",
+                                              "Output [MB]"])
+        for row, r in enumerate(rows):
+            values = [r["stage"], r["detail"], str(r["calls"]), f"{r['seconds'] * 1e3:.2f}",
+                      f"{r['self_seconds'] * 1e3:.2f}", f"{r['share']:.1%}", f"{r['bytes'] / 1024 ** 2:.2f}"]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnsToContents()
+        layout.addWidget(self.table)
+
+        ok_btn = QPushButton("OK")
+        ok_btn.clicked.connect(self.accept)
+        layout.addWidget(ok_btn)
+        self.setLayout(layout)
+
+
+class ParetoFrontDialog(QDialog):
+    # Own figure, so the TL / alpha result plot and its legend stay as they are
+    def __init__(self, objectives, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Pareto Front - {title}")
+        self.resize(800, 600)
+
+        layout = QVBoxLayout()
+        self.figure = Figure(figsize=(6, 5))
+        self.canvas = FigureCanvas(self.figure)
+        plot_pareto_front(self.figure.add_subplot(111), objectives)
+        self.figure.tight_layout()
+        layout.addWidget(self.canvas)
+
+        ok_btn = QPushButton("OK")
+        ok_btn.clicked.connect(self.accept)
+        layout.addWidget(ok_btn)
+        self.setLayout(layout)
+
 class ManageLegendDialog(QDialog):
     def __init__(self, graph_info_list, parent=None):
         super().__init__(parent)
@@ -127,11 +183,9 @@ class ManageLegendDialog(QDialog):
             del self.graph_info_list[row]
 
         if hasattr(self.parent(), 'figure'):
+            # Lines (and bands) of the deleted entries go with them
             ax = self.parent().figure.axes[0]
-            lines = ax.get_lines()
-            for idx in sorted(rows, reverse=True):
-                if idx < len(lines):
-                    lines[idx].remove()
+            self.parent().sync_graph_artists(ax)
 
             updated_legends = [self.table.item(row, 0).text() for row in range(self.table.rowCount())]
             for line, label in zip(ax.get_lines(), updated_legends):
@@ -194,6 +248,67 @@ class InterfaceSettingsDialog(QDialog):
         return modes
 
 
+class UncertaintyDialog(QDialog):
+    def __init__(self, layers, n_samples=1000, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Monte Carlo Uncertainty")
+        self.resize(600, 400)
+
+        # One row per numeric property of every layer; spread is relative to the nominal value
+        self.rows = []
+        for i, layer in enumerate(layers):
+            for prop in MATERIAL_DEFINITIONS[layer["type"]]["properties"]:
+                if prop["name"] != "material":
+                    self.rows.append((i, prop["name"], f"{layer['type']} {i + 1}", prop["label"]))
+
+        layout = QVBoxLayout()
+        self.table = QTableWidget(len(self.rows), 4)
+        self.table.setHorizontalHeaderLabels(["Layer", "Property", "Distribution", "Spread [%]"])
+
+        for row, (i, name, layer_name, label) in enumerate(self.rows):
+            saved = layers[i].get("uncertainty", {}).get(name, {})
+            self.table.setItem(row, 0, QTableWidgetItem(layer_name))
+            self.table.setItem(row, 1, QTableWidgetItem(label))
+
+            dist_dropdown = QComboBox()
+            dist_dropdown.addItems(["none"] + list(DISTRIBUTIONS))
+            dist_dropdown.setCurrentText(saved.get("dist", "none"))
+            self.table.setCellWidget(row, 2, dist_dropdown)
+            self.table.setItem(row, 3, QTableWidgetItem(f"{100 * saved.get('spread', 0.1):g}"))
+
+        layout.addWidget(self.table)
+
+        samples_layout = QHBoxLayout()
+        samples_layout.addWidget(QLabel("Samples:"))
+        self.samples_input = QLineEdit(str(n_samples))
+        samples_layout.addWidget(self.samples_input)
+        layout.addLayout(samples_layout)
+
+        btn_layout = QHBoxLayout()
+        ok_btn = QPushButton("Run")
+        cancel_btn = QPushButton("Cancel")
+        ok_btn.clicked.connect(self.accept)
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(ok_btn)
+        btn_layout.addWidget(cancel_btn)
+
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def get_uncertainties(self):
+        # -> [{"layer", "name", "dist", "spread"}] for the rows with a distribution
+        uncertainties = []
+        for row, (i, name, _, _) in enumerate(self.rows):
+            dist = self.table.cellWidget(row, 2).currentText()
+            if dist != "none":
+                spread = float(self.table.item(row, 3).text()) / 100
+                uncertainties.append({"layer": i, "name": name, "dist": dist, "spread": spread})
+        return uncertainties
+
+    def get_sample_count(self):
+        return int(self.samples_input.text())
+
+
 class SoundInsulationUI(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -205,6 +320,11 @@ class SoundInsulationUI(QMainWindow):
         self.active_layer_index = None
         self.interface_modes = []
 
+        # Calculations run one at a time on a CalculationWorker; further clicks wait in the queue
+        self.calc_worker = None
+        self.calc_queue = deque()
+        self.result_cache = ResultCache()
+
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
 
@@ -253,6 +373,17 @@ class SoundInsulationUI(QMainWindow):
         self.calculate_button.clicked.connect(self.calculate_and_plot)
         left_layout.addWidget(self.calculate_button)
 
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_calculation)
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.cancel_button)
+        left_layout.addLayout(progress_layout)
+
     def init_layer_configuration(self, parent_layout):
         layer_config_layout = QHBoxLayout()
 
@@ -319,6 +450,15 @@ class SoundInsulationUI(QMainWindow):
         self.theta_input.setPlaceholderText("Incident Angle [deg]")
         self.theta_input.setText("0")
 
+        # Diffuse field integrates tau(theta) from 0 to theta max (Paris formula)
+        self.field_dropdown = QComboBox()
+        self.field_dropdown.addItems(["Oblique", "Diffuse"])
+        self.theta_max_input = QLineEdit()
+        self.theta_max_input.setPlaceholderText("Max Angle [deg]")
+        self.theta_max_input.setText("78")
+        self.theta_max_input.setEnabled(False)
+        self.field_dropdown.currentTextChanged.connect(self.on_field_changed)
+
         environment_layout.addWidget(QLabel("P0   [Pa]:"), 0, 0)
         environment_layout.addWidget(self.p0_input, 0, 1)
         environment_layout.addWidget(QLabel("T    [°C]:"), 0, 2)
@@ -327,10 +467,18 @@ class SoundInsulationUI(QMainWindow):
         environment_layout.addWidget(self.rh_input, 0, 5)
         environment_layout.addWidget(QLabel("Theta [°]:"), 1, 0)
         environment_layout.addWidget(self.theta_input, 1, 1)
+        environment_layout.addWidget(self.field_dropdown, 1, 2, 1, 2)
+        environment_layout.addWidget(QLabel("θmax [°]:"), 1, 4)
+        environment_layout.addWidget(self.theta_max_input, 1, 5)
 
         environment_panel.setLayout(environment_layout)
         parent_layout.addWidget(environment_panel)
 
+    def on_field_changed(self, field):
+        diffuse = field == "Diffuse"
+        self.theta_input.setEnabled(not diffuse)
+        self.theta_max_input.setEnabled(diffuse)
+
     # -----------
     # right panel
     # -----------
@@ -377,6 +525,36 @@ class SoundInsulationUI(QMainWindow):
         interface_tab.setLayout(interface_layout)
         self.graph_tab_widget.addTab(interface_tab, "Interface Manage")
 
+        # Design Space Tab (Pareto fronts exported by "python -m calculate explore")
+        design_tab = QWidget()
+        design_layout = QHBoxLayout()
+        self.load_pareto_button = QPushButton("Load Pareto Front")
+        self.load_pareto_button.setFixedSize(200, 30)
+        self.load_pareto_button.clicked.connect(self.load_pareto_front)
+        design_layout.addWidget(self.load_pareto_button)
+        design_tab.setLayout(design_layout)
+        self.graph_tab_widget.addTab(design_tab, "Design Space")
+
+        # Uncertainty Tab (Monte Carlo percentile bands)
+        uncertainty_tab = QWidget()
+        uncertainty_layout = QHBoxLayout()
+        self.monte_carlo_button = QPushButton("Monte Carlo...")
+        self.monte_carlo_button.setFixedSize(200, 30)
+        self.monte_carlo_button.clicked.connect(self.open_uncertainty_dialog)
+        uncertainty_layout.addWidget(self.monte_carlo_button)
+        uncertainty_tab.setLayout(uncertainty_layout)
+        self.graph_tab_widget.addTab(uncertainty_tab, "Uncertainty")
+
+        # Timings Tab (per-stage solver timings of the last calculation)
+        timings_tab = QWidget()
+        timings_layout = QHBoxLayout()
+        self.show_timings_button = QPushButton("Show Timings")
+        self.show_timings_button.setFixedSize(200, 30)
+        self.show_timings_button.clicked.connect(self.show_timings)
+        timings_layout.addWidget(self.show_timings_button)
+        timings_tab.setLayout(timings_layout)
+        self.graph_tab_widget.addTab(timings_tab, "Timings")
+
         # Canvas and Buttons Below
         canvas_container = QWidget()
         canvas_layout = QVBoxLayout(canvas_container)
@@ -404,8 +582,10 @@ class SoundInsulationUI(QMainWindow):
         button_layout = QGridLayout()
         self.save_button = QPushButton("Save")
         self.save_button.clicked.connect(self.save_results)
+        self.export_csv_button = QPushButton("Export CSV")
+        self.export_csv_button.clicked.connect(self.export_csv)
         self.load_graph_button = QPushButton("Load Graph")
-        self.load_graph_button.clicked.connect(self.load_graph_csv)
+        self.load_graph_button.clicked.connect(self.load_graph)
         self.load_material_button = QPushButton("Load Material")
         self.load_material_button.clicked.connect(self.load_material_json)
         self.manage_legend_button = QPushButton("Edit Graph")
@@ -413,6 +593,7 @@ class SoundInsulationUI(QMainWindow):
 
         button_layout.addWidget(self.manage_legend_button)
         button_layout.addWidget(self.save_button, 0, 1)
+        button_layout.addWidget(self.export_csv_button, 0, 2)
         button_layout.addWidget(self.load_material_button, 1, 0)
         button_layout.addWidget(self.load_graph_button, 1, 1)
 
@@ -431,14 +612,14 @@ class SoundInsulationUI(QMainWindow):
         y_half_range = (y_max - y_min) * scale / 2
         ax.set_xlim([x_center - x_half_range, x_center + x_half_range])
         ax.set_ylim([y_center - y_half_range, y_center + y_half_range])
+        self.refresh_graph_lod(ax)
         self.canvas_plot.draw()
 
     def reset_axis_range(self):
         if not self.figure.axes:
             return
         ax = self.figure.axes[0]
-        ax.relim()
-        ax.autoscale()
+        self.refresh_graph_lod(ax, autoscale=True)
         self.canvas_plot.draw()
 
     def open_axis_range_dialog(self):
@@ -453,6 +634,7 @@ class SoundInsulationUI(QMainWindow):
                 ax = self.figure.axes[0]
                 ax.set_xlim([x_min, x_max])
                 ax.set_ylim([y_min, y_max])
+                self.refresh_graph_lod(ax)
                 self.canvas_plot.draw()
             except ValueError:
                 print("Invalid input for axis range.")
@@ -520,12 +702,70 @@ class SoundInsulationUI(QMainWindow):
         self.canvas.repaint()
         self.clear_property_panel()
 
+    def graph_quantity(self):
+        return "TL" if self.graph_type_dropdown.currentText() == "Transmission Loss" else "alpha"
+
+    def sync_graph_artists(self, ax):
+        # One persistent Line2D (plus its band, if any) per graph_info_list entry
+        if getattr(self, 'graph_artists', None) is None:
+            # First graph, or the axes were taken over (e.g. by a Pareto front plot)
+            ax.clear()
+            ax.set_xscale('log')
+            ax.grid(True, which='both', linestyle='--')
+            ax.set_xlabel('Frequency [Hz]', fontsize=12)
+            self.graph_artists = {}
+
+        graph_info_list = getattr(self, 'graph_info_list', [])
+        live = {id(info) for info in graph_info_list}
+        for key in [key for key in self.graph_artists if key not in live]:
+            artist = self.graph_artists.pop(key)
+            artist["line"].remove()
+            if artist["band"] is not None:
+                artist["band"].remove()
+        for info in graph_info_list:
+            if id(info) not in self.graph_artists:
+                line, = ax.plot([], [], linewidth=2)
+                self.graph_artists[id(info)] = {"info": info, "line": line, "band": None}
+            self.graph_artists[id(info)]["line"].set_label(info.get('legend'))
+
+    def refresh_graph_lod(self, ax, autoscale=False):
+        # Min/max per pixel column of the current view (the full curves when autoscaling), so the
+        # draw cost follows the axes width instead of the number of frequencies
+        quantity = self.graph_quantity()
+        n_columns = max(int(ax.get_window_extent().width), 1)
+        x_range = None if autoscale else ax.get_xlim()
+        log = ax.get_xscale() == 'log'
+        bands = []
+        for artist in (getattr(self, 'graph_artists', None) or {}).values():
+            info = artist["info"]
+            if artist["band"] is not None:
+                artist["band"].remove()
+                artist["band"] = None
+            f_data, y_data = info.get('f'), info.get(quantity)
+            if f_data is None or y_data is None:
+                artist["line"].set_data([], [])
+                continue
+            f_data = np.asarray(f_data)
+            # Monte Carlo results carry a (low, high) percentile band around the median
+            band = info.get(f'{quantity}_band')
+            ys = [y_data] if band is None else [y_data, band[0], band[1]]
+            idx = lod_indices(f_data, ys, x_range, n_columns, log)
+            artist["line"].set_data(f_data[idx], np.asarray(y_data)[idx])
+            if band is not None:
+                bands.append((artist, f_data[idx], np.asarray(band[0])[idx], np.asarray(band[1])[idx]))
+
+        if autoscale:
+            ax.relim()
+        for artist, f_band, low, high in bands:
+            artist["band"] = ax.fill_between(f_band, low, high, color=artist["line"].get_color(), alpha=0.25,
+                                             linewidth=0)
+        if autoscale:
+            ax.autoscale()
+
     def update_graph_by_dropdown(self):
         if not hasattr(self, 'last_result_data'):
             return
 
-        f, TL, alpha = self.last_result_data
-        y_data = TL if self.graph_type_dropdown.currentText() == "Transmission Loss" else alpha
         y_label = "Transmission Loss [dB]" if self.graph_type_dropdown.currentText() == "Transmission Loss" else "Absorption Coefficient"
 
         if not self.figure.axes:
@@ -533,21 +773,13 @@ class SoundInsulationUI(QMainWindow):
         else:
             ax = self.figure.axes[0]
 
-        # 기존 그래프들을 유지하면서 새 plot만 갱신
-        ax.clear()
-        for info in getattr(self, 'graph_info_list', []):
-            f_data = info.get('f')
-            y_data_full = info.get('TL') if self.graph_type_dropdown.currentText() == "Transmission Loss" else info.get('alpha')
-            label = info.get('legend')
-            if f_data is not None and y_data_full is not None:
-                ax.plot(f_data, y_data_full, linewidth=2, label=label)
-
-        ax.set_xscale('log')
-        ax.grid(True, which='both', linestyle='--')
-        ax.set_xlabel('Frequency [Hz]', fontsize=12)
+        # 기존 그래프들을 유지하면서 y 데이터만 교체 (새 결과만 line 추가)
+        self.sync_graph_artists(ax)
+        self.refresh_graph_lod(ax, autoscale=True)
         ax.set_ylabel(y_label, fontsize=12)
-        ax.legend()
-        self.canvas_plot.draw()
+        if ax.get_lines():
+            ax.legend()
+        self.canvas_plot.draw_idle()
 
     def calculate_and_plot(self):
         layer_data = self.prepare_calculation_data()
@@ -556,6 +788,8 @@ class SoundInsulationUI(QMainWindow):
             P0 = float(self.p0_input.text())
             T = float(self.temp_input.text())
             RH = float(self.rh_input.text())
+            field = self.field_dropdown.currentText()
+            theta_max = float(self.theta_max_input.text())
 
             save_json = False
             cleaned_layers = self.clean_layers_for_json(self.layers)
@@ -576,7 +810,9 @@ class SoundInsulationUI(QMainWindow):
                         "theta": theta,
                         "P0": P0,
                         "T": T,
-                        "RH": RH
+                        "RH": RH,
+                        "field": field.lower(),
+                        "theta_max": theta_max
                     }
                 }
                 with open(json_path, "w") as f:
@@ -588,42 +824,209 @@ class SoundInsulationUI(QMainWindow):
             else:
                 json_path = getattr(self, "last_loaded_material_json_path", "-")
 
-            f, TL, alpha, _, _ = run_simulation_from_ui(layer_data, theta_deg=theta, P0=P0, T=T, RH=RH)
-            if f is None or TL is None:
-                print("[ERROR] Simulation failed. No graph will be plotted.")
-                return
-
-            if not hasattr(self, 'calculate_counter'):
-                self.calculate_counter = 1
-            else:
-                self.calculate_counter += 1
-
-            legend_name = f'Calculate{self.calculate_counter}'
-            if not hasattr(self, 'graph_info_list'):
-                self.graph_info_list = []
-
-            self.graph_info_list.append({
-                "legend": legend_name,
-                "material_info": os.path.basename(json_path),
-                "file_path": json_path,
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "f": f,
-                "TL": TL,
-                "alpha": alpha
-            })
-
-            self.last_result_data = (f, TL, alpha)
-            self.last_result_legend = legend_name
-            self.update_graph_by_dropdown()
-
             if save_json:
                 print(f"[INFO] Material data saved to {json_path}")
             else:
                 print("[INFO] Layer structure unchanged. Skipped material JSON save.")
 
+            self.calc_queue.append({
+                "layer_data": layer_data,
+                "cleaned_layers": copy.deepcopy(cleaned_layers),
+                "theta": theta,
+                "P0": P0,
+                "T": T,
+                "RH": RH,
+                "field": field,
+                "theta_max": theta_max,
+                "json_path": json_path
+            })
+            if self.calc_worker is not None:
+                print(f"[INFO] Calculation queued ({len(self.calc_queue)} waiting).")
+            self.start_next_calculation()
+
         except Exception as e:
             print(f"[ERROR] Failed during calculation or plotting: {e}")
 
+    def start_next_calculation(self):
+        if self.calc_worker is not None or not self.calc_queue:
+            return
+
+        job = self.calc_queue.popleft()
+        worker = CalculationWorker(job, self.result_cache, self)
+        worker.progress.connect(self.on_calculation_progress)
+        worker.result_ready.connect(self.on_calculation_finished)
+        worker.failed.connect(self.on_calculation_failed)
+        worker.cancelled.connect(self.on_calculation_cancelled)
+        worker.finished.connect(self.on_worker_finished)
+        self.calc_worker = worker
+
+        self.progress_bar.setValue(0)
+        self.cancel_button.setEnabled(True)
+        worker.start()
+
+    def cancel_calculation(self):
+        # Stops the running calculation and drops everything still waiting
+        if self.calc_queue:
+            print(f"[INFO] Dropped {len(self.calc_queue)} queued calculation(s).")
+            self.calc_queue.clear()
+        if self.calc_worker is not None:
+            self.calc_worker.cancel()
+            self.cancel_button.setEnabled(False)
+
+    def on_calculation_progress(self, done, total):
+        self.progress_bar.setValue(int(100 * done / max(total, 1)))
+
+    def on_calculation_finished(self, job, result):
+        if "uncertainties" in job:
+            self.on_monte_carlo_finished(job, result)
+            return
+
+        f, TL, alpha, tc, rc = result
+        if f is None or TL is None:
+            print("[ERROR] Simulation failed. No graph will be plotted.")
+            return
+
+        if not hasattr(self, 'calculate_counter'):
+            self.calculate_counter = 1
+        else:
+            self.calculate_counter += 1
+
+        legend_name = f'Calculate{self.calculate_counter}'
+        if not hasattr(self, 'graph_info_list'):
+            self.graph_info_list = []
+
+        json_path = job["json_path"]
+        self.graph_info_list.append({
+            "legend": legend_name,
+            "material_info": os.path.basename(json_path),
+            "file_path": json_path,
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "f": f,
+            "TL": TL,
+            "alpha": alpha,
+            "tc": tc,
+            "rc": rc
+        })
+
+        self.last_result_data = (f, TL, alpha)
+        self.last_result_legend = legend_name
+        self.update_graph_by_dropdown()
+
+    def open_uncertainty_dialog(self):
+        if not self.layers:
+            print("[INFO] No layers to vary.")
+            return
+        if self.active_layer_index is not None:
+            self.clear_property_panel()
+
+        dialog = UncertaintyDialog(self.layers, getattr(self, "monte_carlo_samples", 1000), self)
+        if not dialog.exec():
+            return
+
+        try:
+            uncertainties = dialog.get_uncertainties()
+            n_samples = dialog.get_sample_count()
+        except ValueError as e:
+            print(f"[ERROR] Invalid uncertainty settings: {e}")
+            return
+        if not uncertainties:
+            print("[INFO] No property has a distribution. Monte Carlo skipped.")
+            return
+
+        # Kept with the layers so they are saved in the material JSON
+        for layer in self.layers:
+            layer.pop("uncertainty", None)
+        for u in uncertainties:
+            self.layers[u["layer"]].setdefault("uncertainty", {})[u["name"]] = {"dist": u["dist"], "spread": u["spread"]}
+        self.monte_carlo_samples = n_samples
+
+        layer_data = self.prepare_calculation_data()
+        try:
+            self.calc_queue.append({
+                "layer_data": layer_data,
+                "cleaned_layers": self.clean_layers_for_json(self.layers),
+                "uncertainties": uncertainties,
+                "n_samples": n_samples,
+                "theta": float(self.theta_input.text()),
+                "P0": float(self.p0_input.text()),
+                "T": float(self.temp_input.text()),
+                "RH": float(self.rh_input.text()),
+                "field": self.field_dropdown.currentText(),
+                "theta_max": float(self.theta_max_input.text()),
+                "json_path": getattr(self, "last_loaded_material_json_path", "-")
+            })
+        except ValueError as e:
+            print(f"[ERROR] Invalid environment settings: {e}")
+            return
+        if self.calc_worker is not None:
+            print(f"[INFO] Monte Carlo queued ({len(self.calc_queue)} waiting).")
+        self.start_next_calculation()
+
+    def on_monte_carlo_finished(self, job, result):
+        if not hasattr(self, 'monte_carlo_counter'):
+            self.monte_carlo_counter = 1
+        else:
+            self.monte_carlo_counter += 1
+
+        legend_name = f'MonteCarlo{self.monte_carlo_counter}'
+        if not hasattr(self, 'graph_info_list'):
+            self.graph_info_list = []
+
+        # Median curve with the outer percentiles as a shaded band
+        f = result["f"]
+        TL, alpha = result["TL"], result["alpha"]
+        mid = len(result["percentiles"]) // 2
+        json_path = job["json_path"]
+        self.graph_info_list.append({
+            "legend": legend_name,
+            "material_info": f"{os.path.basename(json_path)} (P{result['percentiles'][0]:g}-P{result['percentiles'][-1]:g}, {result['n_samples']} samples)",
+            "file_path": json_path,
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "f": f,
+            "TL": TL[mid],
+            "alpha": alpha[mid],
+            "TL_band": (TL[0], TL[-1]),
+            "alpha_band": (alpha[0], alpha[-1])
+        })
+
+        self.last_result_data = (f, TL[mid], alpha[mid])
+        self.last_result_legend = legend_name
+        self.update_graph_by_dropdown()
+
+    def on_calculation_failed(self, job, message):
+        print(f"[ERROR] Failed during calculation or plotting: {message}")
+
+    def on_calculation_cancelled(self, job):
+        print("[INFO] Calculation canceled by user.")
+
+    def on_worker_finished(self):
+        worker = self.calc_worker
+        self.calc_worker = None
+        if worker is not None:
+            if worker.timings is not None:
+                self.last_timings = (os.path.basename(worker.job["json_path"]), worker.timings)
+            worker.deleteLater()
+
+        self.cancel_button.setEnabled(False)
+        if not self.calc_queue:
+            self.progress_bar.setValue(0)
+        self.start_next_calculation()
+
+    def show_timings(self):
+        if getattr(self, 'last_timings', None) is None:
+            QMessageBox.information(self, "Timings", "No timings yet: run a calculation first "
+                                                     "(results taken from the cache are not timed).")
+            return
+        title, profile = self.last_timings
+        TimingsDialog(profile, title, self).exec()
+
+    def closeEvent(self, event):
+        self.calc_queue.clear()
+        if self.calc_worker is not None:
+            self.calc_worker.cancel()
+            self.calc_worker.wait()
+        super().closeEvent(event)
+
     def clean_layers_for_json(self, layers):
         cleaned_layers = []
         for layer in layers:
@@ -632,6 +1035,8 @@ class SoundInsulationUI(QMainWindow):
                 "thickness": layer["thickness"],
                 "values": layer.get("values", {})
             }
+            if layer.get("uncertainty"):
+                cleaned_layer["uncertainty"] = copy.deepcopy(layer["uncertainty"])
             cleaned_layers.append(cleaned_layer)
         return cleaned_layers
 
@@ -645,6 +1050,8 @@ class SoundInsulationUI(QMainWindow):
         for l1, l2 in zip(current_cleaned_layers, self.last_saved_layers):
             if l1["type"] != l2["type"] or abs(l1["thickness"] - l2["thickness"]) > 1e-6:
                 return True
+            if l1.get("uncertainty") != l2.get("uncertainty"):
+                return True
             for key in l1["values"]:
                 if key not in l2["values"]:
                     return True
@@ -679,24 +1086,7 @@ class SoundInsulationUI(QMainWindow):
     def prepare_calculation_data(self):
         if self.active_layer_index is not None:
             self.clear_property_panel()
-
-        calculation_layers = []
-        for i, layer in enumerate(self.layers):
-            entry = {
-                "type": layer["type"],
-                "thickness": layer["thickness"] / 1000.0
-            }
-
-            for key, value in layer.get("values", {}).items():
-                if key not in ["thickness", "material"]:
-                    try:
-                        entry[key] = float(value)
-                    except (ValueError, TypeError):
-                        print(f"[WARNING] Layer {i + 1}: Invalid value for {key}: {value}")
-                        continue
-
-            calculation_layers.append(entry)
-        return calculation_layers
+        return calculation_layers(self.layers)
 
     def on_layer_selected(self, index):
         if self.active_layer_index == index:
@@ -740,7 +1130,7 @@ class SoundInsulationUI(QMainWindow):
         timestamp = now.strftime("%Y%m%d_%H%M%S")
         base_name = f"result_{timestamp}"
         image_path = os.path.join(folder, f"{base_name}.png")
-        csv_path = os.path.join(folder, f"{base_name}.csv")
+        store_path = os.path.join(folder, f"{base_name}{STORE_EXT}")
 
         try:
             self.figure.savefig(image_path)
@@ -753,43 +1143,27 @@ class SoundInsulationUI(QMainWindow):
                 print("[INFO] No graph to save.")
                 return
 
-            graphs = self.graph_info_list
-            max_len = max(len(g["f"]) for g in graphs)
-
-            # 메타데이터 작성
-            meta_rows = []
-            meta_keys = ["material_info", "file_path", "date", "legend"]
-            meta_labels = ["material info.", "path", "date", "graph name"]
-            for label, key in zip(meta_labels, meta_keys):
-                row = [label]
-                for g in graphs:
-                    row.extend([g.get(key, "-"), "", ""])
-                meta_rows.append(row)
-
-            meta_rows.append([])  # 빈 줄
-
-            # 헤더 작성
-            header_row = []
-            for _ in graphs:
-                header_row.extend(["Frequency [Hz]", "Transmission Loss [dB]", "Absorption Coefficient"])
-
-            # 데이터 작성
-            data_rows = []
-            for i in range(max_len):
-                row = []
-                for g in graphs:
-                    if i < len(g["f"]):
-                        row.extend([g["f"][i], g["TL"][i], g["alpha"][i]])
-                    else:
-                        row.extend(["", "", ""])
-                data_rows.append(row)
+            # f, TL, alpha, tc, rc (and Monte Carlo bands) as raw binary, see calculate/result_store.py
+            write_store(store_path, self.graph_info_list)
+            print(f"[INFO] Plot data saved to {store_path}")
+
+        except Exception as e:
+            print(f"[ERROR] Failed to save result store: {e}")
 
-            # 파일 저장
-            all_rows = meta_rows + [header_row] + data_rows
-            with open(csv_path, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerows(all_rows)
+    def export_csv(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder to Export CSV")
+        if not folder:
+            return
+
+        base_name = f"result_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        csv_path = os.path.join(folder, f"{base_name}.csv")
+
+        try:
+            if not hasattr(self, 'graph_info_list') or not self.graph_info_list:
+                print("[INFO] No graph to save.")
+                return
 
+            write_graph_csv(csv_path, self.graph_info_list)
             print(f"[INFO] Plot data saved to {csv_path}")
 
         except Exception as e:
@@ -811,6 +1185,8 @@ class SoundInsulationUI(QMainWindow):
             self.p0_input.setText(str(env.get("P0", 101325)))
             self.temp_input.setText(str(env.get("T", 20)))
             self.rh_input.setText(str(env.get("RH", 0.2)))
+            self.field_dropdown.setCurrentText("Diffuse" if env.get("field") == "diffuse" else "Oblique")
+            self.theta_max_input.setText(str(env.get("theta_max", 78)))
 
             self.layers.clear()
             for entry in loaded_layers:
@@ -824,6 +1200,8 @@ class SoundInsulationUI(QMainWindow):
                     "metadata": [],
                     "values": values
                 })
+                if entry.get("uncertainty"):
+                    self.layers[-1]["uncertainty"] = entry["uncertainty"]
 
             self.active_layer_index = None
             self.canvas.repaint()
@@ -837,83 +1215,71 @@ class SoundInsulationUI(QMainWindow):
         except Exception as e:
             print(f"[ERROR] Failed to load material JSON: {e}")
 
-    def load_graph_csv(self):
-        csv_path, _ = QFileDialog.getOpenFileName(self, "Select CSV File", "", "CSV Files (*.csv)")
-        if not csv_path:
-            print("[INFO] Load canceled (CSV).")
+    def load_graph(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Select Result File", "",
+                                              f"Result Store (*{STORE_EXT});;CSV Files (*.csv)")
+        if not path:
+            print("[INFO] Load canceled (graph).")
             return
 
+        if path.endswith(STORE_EXT):
+            self.load_result_store(path)
+        else:
+            self.load_graph_csv(path)
+
+    def load_result_store(self, store_path):
         try:
-            with open(csv_path, newline='') as f:
-                reader = list(csv.reader(f))
-                lines = list(reader)
-
-            # 메타데이터 파싱 (상단 5줄 + 빈 줄)
-            meta_lines = lines[:5]
-            header_line = lines[6] if len(lines) > 6 else []
-            data_lines = lines[7:]
-            num_graphs = len(header_line) // 3
-
-            if not hasattr(self, 'graph_counter'):
-                self.graph_counter = 1
-            else:
-                self.graph_counter += 1
+            # Entries hold read-only memmaps, data pages are only read when a curve is drawn
+            graphs = list(ResultStore(store_path))
+            if not graphs:
+                print(f"[INFO] No graphs in {os.path.basename(store_path)}")
+                return
 
             if not hasattr(self, 'graph_info_list'):
                 self.graph_info_list = []
+            self.graph_info_list.extend(graphs)
 
-            ax = self.figure.axes[0] if self.figure.axes else self.figure.add_subplot(111)
-            ax.clear()
+            last = graphs[-1]
+            self.last_result_data = (last["f"], last.get("TL"), last.get("alpha"))
+            self.last_result_legend = last["legend"]
+            self.update_graph_by_dropdown()
+            print(f"[INFO] Loaded {len(graphs)} graphs from {os.path.basename(store_path)}")
 
-            for i in range(num_graphs):
-                f_vals, TL_vals, alpha_vals = [], [], []
-                for row in data_lines:
-                    try:
-                        f = float(row[i * 3]) if row[i * 3] else None
-                        tl = float(row[i * 3 + 1]) if row[i * 3 + 1] else None
-                        alpha = float(row[i * 3 + 2]) if row[i * 3 + 2] else None
-                        if f is not None and tl is not None and alpha is not None:
-                            f_vals.append(f)
-                            TL_vals.append(tl)
-                            alpha_vals.append(alpha)
-                    except (IndexError, ValueError):
-                        continue
-
-                legend = meta_lines[3][i * 3 + 1] if len(meta_lines[3]) > i * 3 + 1 else f"Data{self.graph_counter}"
-                material_info = meta_lines[0][i * 3 + 1] if len(meta_lines[0]) > i * 3 + 1 else "-"
-                file_path = meta_lines[1][i * 3 + 1] if len(meta_lines[1]) > i * 3 + 1 else csv_path
-                date = meta_lines[2][i * 3 + 1] if len(meta_lines[2]) > i * 3 + 1 else "-"
-
-                self.graph_info_list.append({
-                    "legend": legend,
-                    "material_info": material_info,
-                    "file_path": file_path,
-                    "date": date,
-                    "f": f_vals,
-                    "TL": TL_vals,
-                    "alpha": alpha_vals
-                })
+        except Exception as e:
+            print(f"[ERROR] Failed to load result store: {e}")
 
-                selected_graph = self.graph_type_dropdown.currentText()
-                y_data = TL_vals if selected_graph == "Transmission Loss" else alpha_vals
-                y_label = "Transmission Loss [dB]" if selected_graph == "Transmission Loss" else "Absorption Coefficient"
+    def load_graph_csv(self, csv_path):
+        try:
+            graphs = read_graph_csv(csv_path)
+            if not graphs:
+                print(f"[INFO] No graphs in {os.path.basename(csv_path)}")
+                return
 
-                ax.plot(f_vals, y_data, linewidth=2, label=legend)
+            if not hasattr(self, 'graph_info_list'):
+                self.graph_info_list = []
+            self.graph_info_list.extend(graphs)
 
-            ax.set_xscale('log')
-            ax.grid(True, which='both', linestyle='--')
-            ax.set_xlabel('Frequency [Hz]', fontsize=12)
-            ax.set_ylabel(y_label, fontsize=12)
-            ax.legend()
+            last = graphs[-1]
+            self.last_result_data = (last["f"], last["TL"], last["alpha"])
+            self.last_result_legend = last["legend"]
+            self.update_graph_by_dropdown()
+            print(f"[INFO] Loaded {len(graphs)} graphs from {os.path.basename(csv_path)}")
 
-            self.last_result_data = (f_vals, TL_vals, alpha_vals)
-            self.last_result_legend = legend
+        except Exception as e:
+            print(f"[ERROR] Failed to load graph CSV: {e}")
 
-            self.canvas_plot.draw()
-            print(f"[INFO] Loaded {num_graphs} graphs from {os.path.basename(csv_path)}")
+    def load_pareto_front(self):
+        csv_path, _ = QFileDialog.getOpenFileName(self, "Select Pareto Front CSV", "", "CSV Files (*.csv)")
+        if not csv_path:
+            print("[INFO] Load canceled (Pareto front).")
+            return
 
+        try:
+            _, objectives, _ = read_front_csv(csv_path)
+            print(f"[INFO] Loaded Pareto front with {len(objectives)} layups from {csv_path}")
+            ParetoFrontDialog(objectives, os.path.basename(csv_path), self).exec()
         except Exception as e:
-            print(f"[ERROR] Failed to load graph CSV: {e}")
+            print(f"[ERROR] Failed to load Pareto front: {e}")
 
     def manage_legends(self):
         if not hasattr(self, 'graph_info_list') or not self.graph_info_list:
@@ -932,7 +1298,8 @@ class SoundInsulationUI(QMainWindow):
             lines = ax.get_lines()
 
             # OK 버튼 누를 때는 이름만 변경
-            for line, new_label in zip(lines, updated_legends):
+            for info, line, new_label in zip(self.graph_info_list, lines, updated_legends):
+                info["legend"] = new_label
                 line.set_label(new_label)
 
             ax.legend()